@@ -1,23 +1,37 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
 from typing import Iterable, Set
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 
 from app.api.deps.services import UserServiceDep
-from app.core.security import decode_access_token
+from app.core.config import settings
+from app.core.security import decode_request_token
 from app.models.user import Role, User
 from app.services.user import UserService
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl='/auth/token')
 
+_ROLE_VALUES = frozenset(role.value for role in Role)
+
+
+@dataclass(frozen=True)
+class TokenPrincipal:
+    """Authenticated caller as described by verified token claims."""
+
+    id: int
+    role: Role
+
 
 async def get_current_user(
-    token: str = Depends(oauth2_scheme), service: UserService = UserServiceDep
+    request: Request,
+    token: str = Depends(oauth2_scheme),
+    service: UserService = UserServiceDep,
 ) -> User:
     try:
-        payload = decode_access_token(token)
+        payload = decode_request_token(request.scope, token)
         sub = payload.get('sub')
         if sub is None:
             raise HTTPException(
@@ -33,10 +47,38 @@ async def get_current_user(
         )
 
 
+async def get_current_principal(
+    request: Request,
+    token: str = Depends(oauth2_scheme),
+    service: UserService = UserServiceDep,
+) -> User | TokenPrincipal:
+    """Caller identity for authorization checks.
+
+    With ``AUTH_TRUST_TOKEN_CLAIMS`` enabled, tokens carrying a valid
+    ``sub`` and ``role`` are trusted without a database round trip
+    (revoked tokens are still rejected); otherwise the user is loaded like
+    in `get_current_user`.
+    """
+    if settings.AUTH_TRUST_TOKEN_CLAIMS:
+        try:
+            payload = decode_request_token(request.scope, token)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail='Invalid token',
+            )
+        sub, role = payload.get('sub'), payload.get('role')
+        if sub is not None and role in _ROLE_VALUES:
+            return TokenPrincipal(id=int(sub), role=Role(role))
+    return await get_current_user(request, token, service)
+
+
 def require_roles(allowed: Iterable[Role]):
     allowed_set: Set[Role] = set(allowed)
 
-    async def verifier(current_user: User = Depends(get_current_user)) -> User:
+    async def verifier(
+        current_user: User | TokenPrincipal = Depends(get_current_principal),
+    ) -> User | TokenPrincipal:
         if current_user.role not in allowed_set:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
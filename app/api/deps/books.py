@@ -0,0 +1,26 @@
+from datetime import datetime
+from typing import Annotated, Literal, Optional
+
+from fastapi import Depends, Query
+
+from app.models.book import BookCategoryEnum
+from app.repositories.book import BookQuery
+
+
+def _book_query(
+    category: Optional[BookCategoryEnum] = Query(None),
+    author: Optional[str] = Query(
+        None, max_length=255, description='Exact author, ignoring case'
+    ),
+    available_only: bool = Query(
+        False, description='Only books with copies available to lend'
+    ),
+    created_after: Optional[datetime] = Query(
+        None, description='Only books added after this instant'
+    ),
+    sort: Literal['id', 'name', 'newest'] = Query('id'),
+) -> BookQuery:
+    return BookQuery(category, author, available_only, created_after, sort)
+
+
+BookQueryDep = Annotated[BookQuery, Depends(_book_query)]
@@ -1,19 +1,77 @@
-from typing import Annotated
+from typing import Annotated, Any, Optional, Sequence
 
 from fastapi import Depends, Query
 
 
 class PaginationParams:
-    def __init__(self, limit: int, offset: int):
+    def __init__(
+        self,
+        limit: int,
+        offset: int,
+        cursor: Optional[str] = None,
+        include_total: bool = True,
+    ):
         self.limit = limit
         self.offset = offset
+        self.include_total = include_total
+        # None selects offset pagination; any string (empty for the first
+        # page) selects keyset pagination.
+        self.cursor = cursor
+
+    @property
+    def keyset(self) -> bool:
+        return self.cursor is not None
+
+    def offset_page(
+        self,
+        items: Sequence[Any],
+        total: Optional[int] = None,
+        total_exact: bool = True,
+    ) -> dict[str, Any]:
+        return {
+            'items': items,
+            'page': (self.offset // self.limit) + 1,
+            'size': len(items),
+            **_total(total, total_exact),
+        }
+
+    @staticmethod
+    def keyset_page(
+        items: Sequence[Any],
+        next_cursor: Optional[str],
+        total: Optional[int] = None,
+        total_exact: bool = True,
+    ) -> dict[str, Any]:
+        return {
+            'items': items,
+            'size': len(items),
+            'next_cursor': next_cursor,
+            **_total(total, total_exact),
+        }
+
+
+def _total(total: Optional[int], exact: bool) -> dict[str, Any]:
+    return {
+        'total': total,
+        'total_exact': exact if total is not None else None,
+    }
 
 
 def _pagination_params(
     limit: int = Query(10, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(
+        None,
+        description=(
+            'Opaque cursor from a previous `next_cursor`; send it empty to '
+            'start keyset pagination from the first page'
+        ),
+    ),
+    include_total: bool = Query(
+        True, description='Return the total number of matching items'
+    ),
 ) -> PaginationParams:
-    return PaginationParams(limit, offset)
+    return PaginationParams(limit, offset, cursor, include_total)
 
 
 PaginationDep = Annotated[PaginationParams, Depends(_pagination_params)]
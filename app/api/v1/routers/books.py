@@ -1,12 +1,17 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, status
+from typing import Annotated, Optional
+
+from fastapi import APIRouter, Query, Request, status
 
 from app.api.deps.auth import AdminOrStaffDep
-from app.api.deps.pagination import PaginationDep
+from app.api.deps.books import BookQueryDep
+from app.api.deps.pagination import PaginationDep, PaginationParams
 from app.api.deps.services import BookServiceDep
 from app.api.v1.schemas.book import BookAvailability, BookCreate, BookRead
+from app.api.v1.schemas.importing import ImportReport
 from app.api.v1.schemas.paginated_response import PaginatedResponse
+from app.services.importing import import_format, parse_rows
 
 router = APIRouter(prefix='/books', tags=['Books Routers'])
 
@@ -14,17 +19,39 @@ router = APIRouter(prefix='/books', tags=['Books Routers'])
 @router.get('/', response_model=PaginatedResponse[BookRead])
 async def list_books(
     pagination: PaginationDep,
+    query: BookQueryDep,
     service=BookServiceDep,
 ):
+    if pagination.keyset:
+        books, next_cursor = await service.list_books_keyset(
+            limit=pagination.limit, cursor=pagination.cursor, query=query
+        )
+        total = (
+            await service.count_books(query)
+            if pagination.include_total
+            else None
+        )
+        return pagination.keyset_page(books, next_cursor, total)
     books, total = await service.list_books(
-        limit=pagination.limit, offset=pagination.offset
+        limit=pagination.limit,
+        offset=pagination.offset,
+        include_total=pagination.include_total,
+        query=query,
     )
-    return {
-        'items': books,
-        'total': total,
-        'page': (pagination.offset // pagination.limit) + 1,
-        'size': len(books),
-    }
+    return pagination.offset_page(books, total)
+
+
+@router.get('/search', response_model=PaginatedResponse[BookRead])
+async def search_books(
+    q: Annotated[str, Query(min_length=1, max_length=200)],
+    limit: Annotated[int, Query(ge=1, le=100)] = 10,
+    cursor: Optional[str] = None,
+    service=BookServiceDep,
+):
+    books, next_cursor = await service.search_books(
+        q, limit=limit, cursor=cursor
+    )
+    return PaginationParams.keyset_page(books, next_cursor)
 
 
 @router.post(
@@ -37,6 +64,30 @@ async def create_book(data: BookCreate, service=BookServiceDep):
     return await service.create_book(data)
 
 
+@router.post(
+    '/import',
+    response_model=ImportReport,
+    dependencies=[AdminOrStaffDep],
+)
+async def import_books(
+    request: Request,
+    upsert: Annotated[
+        bool,
+        Query(description='Add the copies of already catalogued books'),
+    ] = False,
+    service=BookServiceDep,
+):
+    """Bulk-create books from a CSV (``text/csv``) or NDJSON
+    (``application/x-ndjson``) body with ``name``, ``category`` and
+    optional ``author`` and ``total_copies`` fields. Returns a per-row
+    error report and the import throughput."""
+    fmt = import_format(request.headers.get('content-type'))
+    report = await service.import_books(
+        parse_rows(request.stream(), fmt), upsert=upsert
+    )
+    return ImportReport.from_report(report)
+
+
 @router.get(
     '/{book_id}/availability',
     response_model=BookAvailability,
@@ -6,9 +6,13 @@ from app.api.deps.auth import AdminOrStaffDep, AnyRoleDep
 from app.api.deps.pagination import PaginationDep
 from app.api.deps.services import LendingServiceDep
 from app.api.v1.schemas.lending import (
+    LendingBatchCreate,
+    LendingBatchResult,
+    LendingBatchReturn,
     LendingCreate,
     LendingRead,
     LendingReturn,
+    LendingReturnBatchResult,
     LendingReturnResult,
 )
 from app.api.v1.schemas.paginated_response import PaginatedResponse
@@ -26,6 +30,26 @@ async def create_lending(data: LendingCreate, service=LendingServiceDep):
     return await service.create_lending(data)
 
 
+@router.post(
+    '/batch',
+    response_model=LendingBatchResult,
+    dependencies=[AdminOrStaffDep],
+)
+async def create_lendings(data: LendingBatchCreate, service=LendingServiceDep):
+    """Lend several books to one user in a single transaction."""
+    return await service.create_lendings(data)
+
+
+@router.post(
+    '/returns/batch',
+    response_model=LendingReturnBatchResult,
+    dependencies=[AdminOrStaffDep],
+)
+async def return_lendings(data: LendingBatchReturn, service=LendingServiceDep):
+    """Return several lendings in a single transaction, with their fines."""
+    return await service.return_lendings(data)
+
+
 @router.post(
     '/{lending_id}/return',
     response_model=LendingReturnResult,
@@ -47,15 +71,22 @@ async def return_lending(
 async def list_active_lendings(
     pagination: PaginationDep, service=LendingServiceDep
 ):
+    if pagination.keyset:
+        lendings, next_cursor = await service.list_active_lendings_keyset(
+            limit=pagination.limit, cursor=pagination.cursor
+        )
+        total = (
+            await service.count_active_lendings()
+            if pagination.include_total
+            else None
+        )
+        return pagination.keyset_page(lendings, next_cursor, total)
     lendings, total = await service.list_active_lendings(
-        limit=pagination.limit, offset=pagination.offset
+        limit=pagination.limit,
+        offset=pagination.offset,
+        include_total=pagination.include_total,
     )
-    return {
-        'items': lendings,
-        'total': total,
-        'page': (pagination.offset // pagination.limit) + 1,
-        'size': len(lendings),
-    }
+    return pagination.offset_page(lendings, total)
 
 
 @router.get(
@@ -68,12 +99,15 @@ async def user_lending_history(
     pagination: PaginationDep,
     service=LendingServiceDep,
 ):
+    total, exact = None, True
+    if pagination.include_total:
+        total, exact = await service.count_user_lendings(user_id)
+    if pagination.keyset:
+        lendings, next_cursor = await service.user_lending_history_keyset(
+            user_id, limit=pagination.limit, cursor=pagination.cursor
+        )
+        return pagination.keyset_page(lendings, next_cursor, total, exact)
     lendings = await service.user_lending_history(
         user_id, limit=pagination.limit, offset=pagination.offset
     )
-
-    return {
-        'items': lendings,
-        'offset': pagination.offset,
-        'limit': pagination.limit,
-    }
+    return pagination.offset_page(lendings, total, exact)
@@ -2,15 +2,17 @@ from __future__ import annotations
 
 from typing import List
 
-from fastapi import APIRouter, status
+from fastapi import APIRouter, Request, status
 
 from app.api.deps.auth import AdminOnlyDep, AdminOrStaffDep, AnyRoleDep
 from app.api.deps.pagination import PaginationDep
 from app.api.deps.services import UserServiceDep
+from app.api.v1.schemas.importing import ImportReport
 from app.api.v1.schemas.lending import LendingRead
 from app.api.v1.schemas.paginated_response import PaginatedResponse
 from app.api.v1.schemas.user import UserCreate, UserRead
 from app.models.user import User
+from app.services.importing import import_format, parse_rows
 from app.services.user import UserService
 
 router = APIRouter(prefix='/users', tags=['Users Routers'])
@@ -25,15 +27,20 @@ async def list_users(
     pagination: PaginationDep,
     service: UserService = UserServiceDep,
 ):
+    if pagination.keyset:
+        users, next_cursor = await service.list_users_keyset(
+            limit=pagination.limit, cursor=pagination.cursor
+        )
+        total = (
+            await service.count_users() if pagination.include_total else None
+        )
+        return pagination.keyset_page(users, next_cursor, total)
     users, total = await service.list_users(
-        limit=pagination.limit, offset=pagination.offset
+        limit=pagination.limit,
+        offset=pagination.offset,
+        include_total=pagination.include_total,
     )
-    return {
-        'items': users,
-        'total': total,
-        'page': (pagination.offset // pagination.limit) + 1,
-        'size': len(users),
-    }
+    return pagination.offset_page(users, total)
 
 
 @router.post(
@@ -50,6 +57,22 @@ async def create_user(data: UserCreate, service: UserService = UserServiceDep):
     return user
 
 
+@router.post(
+    '/import',
+    response_model=ImportReport,
+    dependencies=[AdminOrStaffDep],
+)
+async def import_users(
+    request: Request, service: UserService = UserServiceDep
+):
+    """Bulk-create users from a CSV (``text/csv``) or NDJSON
+    (``application/x-ndjson``) body with ``name``, ``email``, ``password``
+    and optional ``role`` fields. Returns a per-row error report."""
+    fmt = import_format(request.headers.get('content-type'))
+    report = await service.import_users(parse_rows(request.stream(), fmt))
+    return ImportReport.from_report(report)
+
+
 @router.get(
     '/{user_id}',
     response_model=UserRead,
@@ -60,6 +83,20 @@ async def get_user_by_id(user_id: int, service: UserService = UserServiceDep):
     return user
 
 
+@router.post(
+    '/{user_id}/revoke-tokens',
+    dependencies=[AdminOnlyDep],
+    status_code=status.HTTP_204_NO_CONTENT,
+)
+async def revoke_user_tokens(
+    user_id: int, service: UserService = UserServiceDep
+):
+    """Log the user out everywhere: tokens issued until now are rejected,
+    by the worker that handles this request (revocations are kept per
+    process)."""
+    await service.revoke_tokens(user_id)
+
+
 @router.get(
     '/{user_id}/lendings',
     response_model=List[LendingRead],
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from pydantic import BaseModel
+
+from app.services import importing
+
+
+class ImportRowError(BaseModel):
+    row: int
+    detail: str
+
+
+class ImportReport(BaseModel):
+    created: int
+    updated: int
+    failed: int
+    errors: list[ImportRowError]
+    elapsed_seconds: float
+    rows_per_second: float
+
+    @classmethod
+    def from_report(cls, report: importing.ImportReport) -> ImportReport:
+        return cls(
+            created=report.created,
+            updated=report.updated,
+            failed=report.failed,
+            errors=[
+                ImportRowError(row=error.row, detail=error.detail)
+                for error in report.errors
+            ],
+            elapsed_seconds=report.elapsed_seconds,
+            rows_per_second=report.rows_per_second,
+        )
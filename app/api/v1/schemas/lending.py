@@ -3,7 +3,10 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+# Most items accepted by the batch checkout and return endpoints.
+BATCH_MAX_ITEMS = 100
 
 
 class LendingRead(BaseModel):
@@ -30,3 +33,42 @@ class LendingReturnResult(BaseModel):
     lending_id: int
     returned_at: datetime
     fine: float
+
+
+class LendingBatchCreate(BaseModel):
+    user_id: int
+    book_ids: list[int] = Field(min_length=1, max_length=BATCH_MAX_ITEMS)
+    # Reject the whole cart if any book fails; otherwise lend the rest.
+    atomic: bool = True
+
+
+class LendingBatchItem(BaseModel):
+    book_id: int
+    lending: Optional[LendingRead] = None
+    error: Optional[str] = None
+
+
+class LendingBatchResult(BaseModel):
+    created: int
+    failed: int
+    items: list[LendingBatchItem]
+
+
+class LendingBatchReturn(BaseModel):
+    lending_ids: list[int] = Field(min_length=1, max_length=BATCH_MAX_ITEMS)
+    returned_at: datetime | None = None
+    atomic: bool = True
+
+
+class LendingReturnBatchItem(BaseModel):
+    lending_id: int
+    fine: Optional[float] = None
+    error: Optional[str] = None
+
+
+class LendingReturnBatchResult(BaseModel):
+    returned: int
+    failed: int
+    returned_at: datetime
+    total_fine: float
+    items: list[LendingReturnBatchItem]
@@ -1,4 +1,4 @@
-from typing import Generic, TypeVar
+from typing import Generic, Optional, TypeVar
 
 from pydantic import BaseModel
 
@@ -7,6 +7,12 @@ T = TypeVar('T')
 
 class PaginatedResponse(BaseModel, Generic[T]):
     items: list[T]
-    total: int
-    page: int
+    # `page` is only filled in offset mode; keyset pages carry
+    # `next_cursor` instead (None on the last page). `total` is omitted
+    # when not requested, and `total_exact` is False when it comes from a
+    # short-lived cache and may lag recent writes.
+    total: Optional[int] = None
+    total_exact: Optional[bool] = None
+    page: Optional[int] = None
     size: int
+    next_cursor: Optional[str] = None
@@ -1,6 +1,19 @@
 """Core utilities for the application."""
 
 from .config import settings
-from .security import hash_password, verify_password
+from .security import (
+    hash_password,
+    hash_password_async,
+    needs_rehash,
+    verify_password,
+    verify_password_async,
+)
 
-__all__ = ['hash_password', 'verify_password', 'settings']
+__all__ = [
+    'hash_password',
+    'hash_password_async',
+    'needs_rehash',
+    'verify_password',
+    'verify_password_async',
+    'settings',
+]
@@ -10,9 +10,121 @@ class Config(BaseSettings):
     sqlalchemy_echo: bool = False
     SECRET_KEY: str = 'change-me'
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # Verified access tokens are cached (by hash) so repeated requests skip
+    # the JWT decode; entries never outlive the token's own expiry.
+    TOKEN_CACHE_MAX_ENTRIES: int = 10_000
+    TOKEN_CACHE_TTL_SECONDS: float = 300.0
+    # Authorize role-protected routes from the signed token claims instead
+    # of loading the user from the database on every request.
+    AUTH_TRUST_TOKEN_CLAIMS: bool = False
+    # Totals without a maintained counter (a user's lending history) are
+    # cached per process for this long and reported as estimates.
+    COUNT_CACHE_MAX_ENTRIES: int = 10_000
+    COUNT_CACHE_TTL_SECONDS: float = 30.0
+    # How offset list pages get their total: 'counter' reads the row
+    # counters (a second, primary-key statement); 'window' returns rows and
+    # count(*) OVER () in one statement, one round trip fewer but counting
+    # every matching row, so it pays off on small or filtered tables.
+    LIST_TOTAL_MODE: str = 'counter'
+    # Algorithm ('pbkdf2_sha256' or 'scrypt') and cost (PBKDF2 iterations or
+    # scrypt N) for new password hashes; 0 means the algorithm's default.
+    # Run `python -m app.core.hash_calibration` to size the cost for a host.
+    # Older hashes are upgraded on the next successful login.
+    PASSWORD_HASH_ALGORITHM: str = 'pbkdf2_sha256'
+    PASSWORD_HASH_COST: int = 0
+    # Threads used to hash/verify passwords off the event loop; this caps
+    # how many logins burn CPU at the same time.
+    PASSWORD_HASH_WORKERS: int = 4
+    # Processes hashing passwords for bulk imports; 0 uses every CPU.
+    PASSWORD_HASH_PROCESSES: int = 0
+    # Rows validated, hashed and inserted per transaction by bulk imports.
+    IMPORT_CHUNK_SIZE: int = 1_000
     APP_ENV: str = 'development'
     CREATE_DEV_ADMIN: bool = True
 
+    # Logging: LOG_FORMAT is "json" or "text"; LOG_SUCCESS_SAMPLE_RATE is the
+    # fraction (0..1) of successful requests written to the access log.
+    LOG_LEVEL: str = 'INFO'
+    LOG_FORMAT: str = 'json'
+    LOG_SUCCESS_SAMPLE_RATE: float = 1.0
+
+    # Expose Prometheus metrics on GET /metrics.
+    METRICS_ENABLED: bool = True
+
+    # Per-request SQL tracking: log requests running more statements than
+    # the budget, or repeating one statement this many times (likely N+1).
+    # Server-Timing headers are sent in development.
+    SQL_QUERY_BUDGET: int = 10
+    SQL_N_PLUS_ONE_THRESHOLD: int = 5
+
+    # Rate limiting: "<requests>/<period>" where period is a number of
+    # seconds or second/minute/hour/day (e.g. "10/minute", "100/5minutes").
+    # Rules are keyed by "METHOD /path" or "/path" and override the default.
+    RATE_LIMIT_DEFAULT: str = '10/minute'
+    RATE_LIMIT_RULES: dict[str, str] = {
+        'GET /health': '600/minute',
+        'GET /metrics': '120/minute',
+        'GET /books/': '120/minute',
+        # Search-as-you-type: one request per keystroke or two.
+        'GET /books/search': '240/minute',
+        'POST /auth/token': '5/minute',
+    }
+    # Budgets for authenticated requests, keyed by role and applied when no
+    # route rule matches. Authenticated clients are limited per token
+    # subject; anonymous ones per client IP.
+    RATE_LIMIT_ROLE_RULES: dict[str, str] = {
+        'admin': '600/minute',
+        'librarian': '300/minute',
+        'reader': '60/minute',
+    }
+    # Per-role budgets for routes that have a rule above, keyed like
+    # RATE_LIMIT_RULES and then by role. A role listed here gets this
+    # budget on the route; other roles and anonymous clients get the route
+    # rule.
+    RATE_LIMIT_ROUTE_ROLE_RULES: dict[str, dict[str, str]] = {
+        'GET /books/': {'admin': '600/minute', 'librarian': '300/minute'},
+        'GET /books/search': {
+            'admin': '1200/minute',
+            'librarian': '600/minute',
+        },
+    }
+    # memory://, sqlite:///./ratelimit.db (shared by local workers) or
+    # redis://host:6379/0 (shared by every host).
+    RATE_LIMIT_STORAGE_URL: str = 'memory://'
+    # Cap on keys kept by the in-memory backend (least recently seen keys are
+    # evicted first), how often idle keys are swept, in seconds, and how many
+    # keys one in-memory sweep may look at.
+    RATE_LIMIT_MAX_ENTRIES: int = 100_000
+    RATE_LIMIT_SWEEP_INTERVAL: float = 60.0
+    RATE_LIMIT_SWEEP_BATCH: int = 10_000
+
+    # Plain SELECTs are routed to this database: a replica URL, 'readonly'
+    # for a read-only (mode=ro) connection to the DATABASE_URL file, or ''
+    # to read from the primary. Sessions that wrote read from the primary.
+    DATABASE_READ_URL: str = 'readonly'
+
+    # SQLite connection profile, applied to every new connection. WAL lets
+    # readers run alongside a writer; busy_timeout makes a connection wait
+    # for a lock instead of failing with "database is locked". A negative
+    # cache size is in KiB. SQLITE_BEGIN_MODE is how the driver opens the
+    # transaction before a write (DEFERRED, IMMEDIATE or EXCLUSIVE);
+    # IMMEDIATE takes the write lock up front, so concurrent writers queue
+    # on busy_timeout instead of failing.
+    SQLITE_JOURNAL_MODE: str = 'WAL'
+    SQLITE_SYNCHRONOUS: str = 'NORMAL'
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+    SQLITE_CACHE_SIZE: int = -64_000
+    SQLITE_BUSY_TIMEOUT_MS: int = 5_000
+    SQLITE_TEMP_STORE: str = 'MEMORY'
+    SQLITE_BEGIN_MODE: str = 'IMMEDIATE'
+    # Connection pool for file databases (in-memory ones share a single
+    # connection). Pre-ping costs a round trip per checkout, which a local
+    # SQLite file rarely needs.
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_PRE_PING: bool = False
+
     model_config = SettingsConfigDict(env_file='.env', extra='ignore')
 
     @property
@@ -0,0 +1,49 @@
+"""Short-lived per-process cache of ``count(*)`` results.
+
+Used for totals that have no maintained counter (e.g. a user's lending
+history). A cached value may lag writes by up to the TTL, so callers
+report it as an estimate; a freshly computed count is exact.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Hashable
+
+from app.core.config import settings
+
+
+class CountCache:
+    def __init__(self, max_entries: int, ttl: float) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[Hashable, tuple[float, int]] = OrderedDict()
+
+    async def get_or_count(
+        self, key: Hashable, count: Callable[[], Awaitable[int]]
+    ) -> tuple[int, bool]:
+        """Return ``(total, exact)``, running `count` on a miss."""
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > now:
+            self._entries.move_to_end(key)
+            return entry[1], False
+        total = await count()
+        if self.ttl > 0 and self.max_entries > 0:
+            self._entries[key] = (now + self.ttl, total)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return total, True
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+count_cache = CountCache(
+    settings.COUNT_CACHE_MAX_ENTRIES, settings.COUNT_CACHE_TTL_SECONDS
+)
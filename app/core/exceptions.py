@@ -80,3 +80,13 @@ class LendingNotFound(BaseServiceException):
 class BookNotAvailable(BaseServiceException):
     code = status.HTTP_409_CONFLICT
     detail = 'Book is not available for lending'
+
+
+class UnsupportedImportFormat(BaseServiceException):
+    code = status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+    detail = 'Import body must be text/csv or application/x-ndjson'
+
+
+class InvalidCursor(BaseServiceException):
+    code = status.HTTP_400_BAD_REQUEST
+    detail = 'Invalid pagination cursor'
@@ -0,0 +1,90 @@
+"""Generic Cell Rate Algorithm (GCRA) primitives used by the rate limiter.
+
+A GCRA cell is a single float, the "theoretical arrival time" (TAT) of the
+next request, which makes the limiter constant in memory and time per key.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+
+_PERIODS = {
+    'second': 1,
+    'minute': 60,
+    'hour': 3600,
+    'day': 86400,
+}
+_RATE_RE = re.compile(
+    r'^\s*(?P<limit>\d+)\s*/\s*(?P<count>\d+)?\s*'
+    r'(?:(?P<unit>second|minute|hour|day)s?)?\s*$'
+)
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """A budget of `limit` requests replenished over `period` seconds."""
+
+    limit: int
+    period: float
+
+    @classmethod
+    def parse(cls, value: str) -> RateLimit:
+        """Parse values such as "10/minute", "10/5minutes" or "10/60"."""
+        match = _RATE_RE.match(value)
+        if match is None:
+            raise ValueError(f'Invalid rate limit: {value!r}')
+        limit = int(match['limit'])
+        count = int(match['count'] or 1)
+        unit = match['unit']
+        period = count * _PERIODS[unit] if unit else count
+        if limit < 1 or period <= 0:
+            raise ValueError(f'Invalid rate limit: {value!r}')
+        return cls(limit=limit, period=float(period))
+
+    @property
+    def emission_interval(self) -> float:
+        return self.period / self.limit
+
+    @property
+    def policy(self) -> str:
+        return f'{self.limit};w={int(self.period)}'
+
+
+@dataclass(frozen=True)
+class RateLimitDecision:
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_after: float
+    retry_after: float
+
+
+def gcra(
+    tat: float | None, now: float, rule: RateLimit
+) -> tuple[float | None, RateLimitDecision]:
+    """Apply one request to a GCRA cell.
+
+    Returns the new TAT to store (``None`` when the request is rejected and
+    the stored value must stay untouched) and the decision.
+    """
+    interval = rule.emission_interval
+    tat = now if tat is None or tat < now else tat
+    new_tat = tat + interval
+    allow_at = new_tat - rule.period
+    if now < allow_at:
+        return None, RateLimitDecision(
+            allowed=False,
+            limit=rule.limit,
+            remaining=0,
+            reset_after=tat - now,
+            retry_after=allow_at - now,
+        )
+    remaining = int((now - allow_at) / interval + 1e-9)
+    return new_tat, RateLimitDecision(
+        allowed=True,
+        limit=rule.limit,
+        remaining=remaining,
+        reset_after=new_tat - now,
+        retry_after=0.0,
+    )
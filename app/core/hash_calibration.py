@@ -0,0 +1,41 @@
+"""Pick a password hash cost for this host.
+
+Measures the configured (or given) algorithm and prints the settings that
+make one hash take about the target latency::
+
+    python -m app.core.hash_calibration [--algorithm scrypt] [--target-ms 250]
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from app.core.config import settings
+from app.core.security import HASHERS, calibrate_cost, hash_password
+
+DEFAULT_TARGET_MS = 250.0
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '--algorithm',
+        choices=sorted(HASHERS),
+        default=settings.PASSWORD_HASH_ALGORITHM,
+    )
+    parser.add_argument('--target-ms', type=float, default=DEFAULT_TARGET_MS)
+    args = parser.parse_args(argv)
+
+    cost = calibrate_cost(args.algorithm, args.target_ms / 1000)
+    start = time.perf_counter()
+    hash_password('calibration', cost, algorithm=args.algorithm)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    print(f'# {args.algorithm} cost {cost}: {elapsed_ms:.0f}ms per hash')
+    print(f'PASSWORD_HASH_ALGORITHM={args.algorithm}')
+    print(f'PASSWORD_HASH_COST={cost}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,96 @@
+"""Logging setup.
+
+Records are put on an in-process queue by a `QueueHandler` and written by a
+`QueueListener` thread, so the event loop never waits on log I/O. Formatting
+(JSON or plain text, see ``Config.LOG_FORMAT``) also happens on the listener
+thread: the handler only tags each record with the current request ID.
+
+Call sites should pass arguments lazily (``logger.info('x %s', y)``) and guard
+expensive ones with ``logger.isEnabledFor`` so disabled levels cost nothing.
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
 import logging
+import queue
 import sys
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, TextIO
+
+from app.core.config import settings
+
+request_id_var: ContextVar[str | None] = ContextVar('request_id', default=None)
+
+# Attributes every LogRecord has; anything else was passed through `extra`.
+_RECORD_ATTRS = frozenset(
+    logging.LogRecord('', 0, '', 0, '', (), None).__dict__
+) | {'message', 'asctime', 'request_id'}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including `extra` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data: dict[str, Any] = {
+            'ts': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if getattr(record, 'request_id', None) is not None:
+            data['request_id'] = record.request_id
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                data[key] = value
+        if record.exc_info:
+            data['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(data, default=str)
+
+
+class _ContextQueueHandler(QueueHandler):
+    """Queue records untouched, tagged with the caller's request ID.
+
+    The stock `QueueHandler.prepare` formats the message in the calling
+    thread so records can be pickled; the queue here never leaves the
+    process, so formatting is left to the listener thread instead.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:  # noqa: PLR6301
+        record.request_id = request_id_var.get()
+        return record
+
+
+def configure_logging(
+    level: str = 'INFO', fmt: str = 'json', stream: TextIO = sys.stdout
+) -> QueueListener:
+    """Route root logging through a queue and start its listener thread."""
+    output = logging.StreamHandler(stream)
+    if fmt == 'json':
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(
+            logging.Formatter(
+                '%(asctime)s %(levelname)s %(name)s '
+                '[%(request_id)s] %(message)s'
+            )
+        )
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    listener = QueueListener(log_queue, output, respect_handler_level=True)
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        if isinstance(handler, _ContextQueueHandler):
+            root.removeHandler(handler)
+    root.addHandler(_ContextQueueHandler(log_queue))
+    root.setLevel(level.upper())
+    listener.start()
+    return listener
+
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s %(levelname)s %(name)s %(message)s',
-    stream=sys.stdout,
-)
+listener = configure_logging(settings.LOG_LEVEL, settings.LOG_FORMAT)
+atexit.register(listener.stop)
 
 logger = logging.getLogger('LIBRARY')
@@ -0,0 +1,253 @@
+"""Prometheus metrics.
+
+A small, dependency-free implementation of counters, gauges and histograms
+rendered in the Prometheus text exposition format by ``GET /metrics``.
+
+Updates are plain dict operations without locks: every update happens on the
+event loop thread (middlewares run there even for sync endpoints), so they
+never race. Label values must be low-cardinality, e.g. route templates such
+as ``/books/{book_id}/availability`` rather than raw URLs.
+"""
+
+from __future__ import annotations
+
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Callable, Iterable, Iterator, Mapping
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.075,
+    0.1,
+    0.25,
+    0.5,
+    0.75,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+LabelValues = tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def _labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = ','.join(
+        f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)
+    )
+    return f'{{{pairs}}}' if pairs else ''
+
+
+def _number(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric(ABC):
+    kind = 'untyped'
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Iterable[str] = ()
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    @abstractmethod
+    def samples(self) -> Iterator[tuple[str, str, float]]:
+        """Yield (name suffix, rendered labels, value) triples."""
+
+    def render(self) -> str:
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.kind}',
+        ]
+        lines.extend(
+            f'{self.name}{suffix}{labels} {_number(value)}'
+            for suffix, labels, value in self.samples()
+        )
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Iterable[str] = ()
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.values: dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def samples(self) -> Iterator[tuple[str, str, float]]:
+        for labels, value in self.values.items():
+            yield '', _labels(self.labelnames, labels), value
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) - amount
+
+    def set(self, *labels: str, value: float) -> None:
+        self.values[labels] = value
+
+
+class CallbackGauge(Metric):
+    """Gauge whose values are read from `callback` at scrape time."""
+
+    kind = 'gauge'
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str],
+        callback: Callable[[], Mapping[LabelValues, float]],
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def samples(self) -> Iterator[tuple[str, str, float]]:
+        for labels, value in self.callback().items():
+            yield '', _labels(self.labelnames, labels), value
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [per-bucket counts (+Inf last), sum].
+        self.values: dict[LabelValues, tuple[list[int], list[float]]] = {}
+
+    def observe(self, *labels: str, value: float) -> None:
+        entry = self.values.get(labels)
+        if entry is None:
+            entry = self.values[labels] = ([0] * (len(self.buckets) + 1), [0])
+        entry[0][bisect_left(self.buckets, value)] += 1
+        entry[1][0] += value
+
+    def samples(self) -> Iterator[tuple[str, str, float]]:
+        names = (*self.labelnames, 'le')
+        for labels, (counts, total) in self.values.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float('inf')), counts):
+                cumulative += count
+                yield (
+                    '_bucket',
+                    _labels(names, (*labels, _number(bound))),
+                    cumulative,
+                )
+            rendered = _labels(self.labelnames, labels)
+            yield '_sum', rendered, total[0]
+            yield '_count', rendered, cumulative
+
+
+class Registry:
+    def __init__(self) -> None:
+        self.metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        return (
+            '\n'.join(metric.render() for metric in self.metrics.values())
+            + '\n'
+        )
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.register(
+    Counter(
+        'http_requests_total',
+        'HTTP requests by method, route template and status code.',
+        ('method', 'route', 'status'),
+    )
+)
+HTTP_LATENCY = REGISTRY.register(
+    Histogram(
+        'http_request_duration_seconds',
+        'HTTP request latency by method and route template.',
+        ('method', 'route'),
+    )
+)
+HTTP_IN_FLIGHT = REGISTRY.register(
+    Gauge(
+        'http_requests_in_flight',
+        'HTTP requests currently being served.',
+    )
+)
+RATE_LIMIT_REJECTIONS = REGISTRY.register(
+    Counter(
+        'rate_limit_rejections_total',
+        'Requests rejected by the rate limiter, by rule.',
+        ('rule',),
+    )
+)
+
+_UNMATCHED = '<unmatched>'
+
+
+def route_template(scope: Scope) -> str:
+    """Return the matched route's path template (set by the router)."""
+    route = scope.get('route')
+    return getattr(route, 'path', None) or _UNMATCHED
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording request counts and latencies."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(
+        self, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_and_record(message: Message) -> None:
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_and_record)
+        finally:
+            elapsed = time.perf_counter() - start
+            HTTP_IN_FLIGHT.dec()
+            method, route = scope['method'], route_template(scope)
+            HTTP_REQUESTS.inc(method, route, str(status_code))
+            HTTP_LATENCY.observe(method, route, value=elapsed)
@@ -0,0 +1,434 @@
+"""Storage backends for the rate limiter.
+
+Every backend stores one GCRA theoretical arrival time (TAT) per key and
+applies `gcra` atomically, so the same limit holds no matter how many
+workers share the backend:
+
+- ``memory://`` keeps the TATs in the worker process (single worker only),
+  in an LRU table capped at ``max_entries`` keys.
+- ``sqlite:///path/to/file.db`` shares them between processes on the same
+  host through a WAL-mode SQLite table updated under ``BEGIN IMMEDIATE``.
+- ``redis://host:port/db`` shares them between hosts through any server that
+  speaks the Redis protocol, using ``WATCH``/``MULTI``/``EXEC``.
+
+A key whose TAT lies in the past is indistinguishable from a missing key, so
+idle keys can be dropped at any time without changing any decision;
+`sweep_periodically` does that in the background.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from urllib.parse import urlparse
+
+from app.core.gcra import RateLimit, RateLimitDecision, gcra
+
+logger = logging.getLogger('LIBRARY')
+
+
+class RateLimitStorage(ABC):
+    """Base class for rate limiter storage backends."""
+
+    @abstractmethod
+    async def hit(
+        self, key: str, rule: RateLimit, now: float
+    ) -> RateLimitDecision:
+        """Count one request for `key` and return the decision."""
+
+    @abstractmethod
+    async def reset(self) -> None:
+        """Forget every stored key."""
+
+    async def sweep(self, now: float) -> int:  # noqa: PLR6301
+        """Drop keys that are idle at `now`; return how many were dropped."""
+        return 0
+
+    def stats(self) -> dict[str, int]:  # noqa: PLR6301
+        """Gauges describing the key table (empty when not tracked)."""
+        return {}
+
+    async def close(self) -> None:
+        """Release resources held by the backend."""
+
+
+class MemoryStorage(RateLimitStorage):
+    """TATs in a bounded LRU table local to the worker process.
+
+    Once `max_entries` keys are stored, the least recently seen key is
+    evicted on insert, so memory stays flat regardless of how many distinct
+    clients show up. A sweep looks at no more than `sweep_batch` keys,
+    starting from the least recently seen (the likeliest to be idle), so
+    each tick holds the event loop for a bounded time.
+    """
+
+    def __init__(
+        self, max_entries: int = 100_000, sweep_batch: int = 10_000
+    ) -> None:
+        self.max_entries = max_entries
+        self.sweep_batch = sweep_batch
+        self.tats: OrderedDict[str, float] = OrderedDict()
+        self.evictions = 0
+        self.expirations = 0
+
+    async def hit(
+        self, key: str, rule: RateLimit, now: float
+    ) -> RateLimitDecision:
+        tats = self.tats
+        new_tat, decision = gcra(tats.get(key), now, rule)
+        if new_tat is not None:
+            tats[key] = new_tat
+            tats.move_to_end(key)
+            if len(tats) > self.max_entries:
+                tats.popitem(last=False)
+                self.evictions += 1
+        elif key in tats:
+            # A throttled client is still active: evicting it would hand it
+            # a fresh budget.
+            tats.move_to_end(key)
+        return decision
+
+    async def reset(self) -> None:
+        self.tats.clear()
+
+    async def sweep(self, now: float) -> int:
+        oldest = islice(self.tats.items(), self.sweep_batch)
+        expired = [key for key, tat in oldest if tat <= now]
+        for key in expired:
+            del self.tats[key]
+        self.expirations += len(expired)
+        return len(expired)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            'size': len(self.tats),
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+        }
+
+
+class SQLiteStorage(RateLimitStorage):
+    """TATs in a WAL-mode SQLite table shared by every local worker.
+
+    Each hit runs in a ``BEGIN IMMEDIATE`` transaction, which takes the
+    database write lock before reading, so read-modify-write cycles from
+    different processes never interleave. Work runs on a dedicated thread to
+    keep the event loop free.
+    """
+
+    def __init__(self, path: str, busy_timeout_ms: int = 5000) -> None:
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix='rate-limit-sqlite'
+        )
+        self._conn: sqlite3.Connection | None = None
+        self.size = 0
+        self.expirations = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(
+                self.path, isolation_level=None, check_same_thread=False
+            )
+            conn.execute(f'PRAGMA busy_timeout = {int(self.busy_timeout_ms)}')
+            conn.execute('PRAGMA journal_mode = WAL')
+            conn.execute('PRAGMA synchronous = NORMAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS rate_limits '
+                '(key TEXT PRIMARY KEY, tat REAL NOT NULL) WITHOUT ROWID'
+            )
+            self._conn = conn
+        return self._conn
+
+    def _hit(self, key: str, rule: RateLimit, now: float) -> RateLimitDecision:
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                'SELECT tat FROM rate_limits WHERE key = ?', (key,)
+            ).fetchone()
+            new_tat, decision = gcra(row[0] if row else None, now, rule)
+            if new_tat is not None:
+                conn.execute(
+                    'INSERT INTO rate_limits (key, tat) VALUES (?, ?) '
+                    'ON CONFLICT(key) DO UPDATE SET tat = excluded.tat',
+                    (key, new_tat),
+                )
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+        return decision
+
+    def _reset(self) -> None:
+        self._connect().execute('DELETE FROM rate_limits')
+
+    def _sweep(self, now: float) -> int:
+        cursor = self._connect().execute(
+            'DELETE FROM rate_limits WHERE tat <= ?', (now,)
+        )
+        self.expirations += cursor.rowcount
+        return cursor.rowcount
+
+    def _size(self) -> int:
+        return (
+            self
+            ._connect()
+            .execute('SELECT count(*) FROM rate_limits')
+            .fetchone()[0]
+        )
+
+    def _close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    async def _run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    async def hit(
+        self, key: str, rule: RateLimit, now: float
+    ) -> RateLimitDecision:
+        return await self._run(self._hit, key, rule, now)
+
+    async def reset(self) -> None:
+        await self._run(self._reset)
+
+    async def sweep(self, now: float) -> int:
+        swept = await self._run(self._sweep, now)
+        self.size = await self._run(self._size)
+        return swept
+
+    def stats(self) -> dict[str, int]:
+        # The size is sampled by `sweep` to keep counting off the hot path.
+        return {'size': self.size, 'expirations': self.expirations}
+
+    async def close(self) -> None:
+        await self._run(self._close)
+
+
+class RedisProtocolError(Exception):
+    """Error reply received from a Redis-protocol server."""
+
+
+class _RedisConnection:
+    """Minimal RESP2 client connection (pipelined request/reply)."""
+
+    def __init__(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self.reader = reader
+        self.writer = writer
+
+    @staticmethod
+    def _encode(args: tuple) -> bytes:
+        parts = [f'*{len(args)}\r\n'.encode()]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode()
+            parts.append(f'${len(data)}\r\n'.encode() + data + b'\r\n')
+        return b''.join(parts)
+
+    async def _read_reply(self):
+        line = await self.reader.readline()
+        if not line:
+            raise ConnectionError('Connection closed by server')
+        kind, payload = line[:1], line[1:-2]
+        if kind == b'+':
+            return payload.decode()
+        if kind == b'-':
+            return RedisProtocolError(payload.decode())
+        if kind == b':':
+            return int(payload)
+        if kind in {b'$', b'*'}:
+            size = int(payload)
+            if size < 0:
+                return None
+            if kind == b'$':
+                return (await self.reader.readexactly(size + 2))[:-2]
+            return [await self._read_reply() for _ in range(size)]
+        raise RedisProtocolError(f'Unexpected reply: {line!r}')
+
+    async def pipeline(self, *commands: tuple) -> list:
+        self.writer.write(b''.join(self._encode(cmd) for cmd in commands))
+        await self.writer.drain()
+        replies = [await self._read_reply() for _ in commands]
+        for reply in replies:
+            if isinstance(reply, RedisProtocolError):
+                raise reply
+        return replies
+
+    async def close(self) -> None:
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+class RedisStorage(RateLimitStorage):
+    """TATs in a Redis-protocol server shared by every worker and host.
+
+    Updates use optimistic transactions: ``WATCH``/``GET`` and then
+    ``MULTI``/``SET``/``EXEC`` (two pipelined round trips), retried when
+    another client changed the key in between. Keys expire once their bucket
+    is full again, so idle clients cost nothing.
+    """
+
+    max_retries = 16
+
+    def __init__(
+        self,
+        url: str = 'redis://localhost:6379/0',
+        prefix: str = 'ratelimit:',
+        pool_size: int = 4,
+    ) -> None:
+        parsed = urlparse(url)
+        db = parsed.path.lstrip('/')
+        self.host = parsed.hostname or 'localhost'
+        self.port = parsed.port or 6379
+        self.db = int(db) if db else 0
+        self.password = parsed.password
+        self.prefix = prefix
+        self._pool: asyncio.LifoQueue[_RedisConnection | None] = (
+            asyncio.LifoQueue()
+        )
+        for _ in range(pool_size):
+            self._pool.put_nowait(None)
+        self._connections: list[_RedisConnection] = []
+
+    async def _connect(self) -> _RedisConnection:
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        conn = _RedisConnection(reader, writer)
+        commands = []
+        if self.password:
+            commands.append(('AUTH', self.password))
+        if self.db:
+            commands.append(('SELECT', self.db))
+        if commands:
+            await conn.pipeline(*commands)
+        self._connections.append(conn)
+        return conn
+
+    async def _acquire(self) -> _RedisConnection:
+        conn = await self._pool.get()
+        if conn is None:
+            try:
+                conn = await self._connect()
+            except BaseException:
+                self._pool.put_nowait(None)
+                raise
+        return conn
+
+    def _release(self, conn: _RedisConnection | None) -> None:
+        self._pool.put_nowait(conn)
+
+    def _discard(self, conn: _RedisConnection) -> None:
+        if conn in self._connections:
+            self._connections.remove(conn)
+        conn.writer.close()
+        self._release(None)
+
+    async def _hit(
+        self, conn: _RedisConnection, key: str, rule: RateLimit, now: float
+    ) -> RateLimitDecision:
+        for _ in range(self.max_retries):
+            _, raw = await conn.pipeline(('WATCH', key), ('GET', key))
+            tat = float(raw) if raw is not None else None
+            new_tat, decision = gcra(tat, now, rule)
+            if new_tat is None:
+                await conn.pipeline(('UNWATCH',))
+                return decision
+            ttl_ms = max(1, int((new_tat - now) * 1000) + 1)
+            *_, committed = await conn.pipeline(
+                ('MULTI',),
+                ('SET', key, repr(new_tat), 'PX', ttl_ms),
+                ('EXEC',),
+            )
+            if committed is not None:
+                return decision
+        raise RedisProtocolError(f'Too much contention on key {key!r}')
+
+    async def _reset(self, conn: _RedisConnection) -> None:
+        cursor = '0'
+        while True:
+            [(cursor, keys)] = await conn.pipeline((
+                'SCAN',
+                cursor,
+                'MATCH',
+                self.prefix + '*',
+                'COUNT',
+                500,
+            ))
+            if keys:
+                await conn.pipeline(('DEL', *keys))
+            if int(cursor) == 0:
+                return
+
+    async def _run(self, fn, *args):
+        conn = await self._acquire()
+        try:
+            result = await fn(conn, *args)
+        except BaseException:
+            # The connection may be mid-reply or mid-transaction.
+            self._discard(conn)
+            raise
+        self._release(conn)
+        return result
+
+    async def hit(
+        self, key: str, rule: RateLimit, now: float
+    ) -> RateLimitDecision:
+        return await self._run(self._hit, self.prefix + key, rule, now)
+
+    async def reset(self) -> None:
+        await self._run(self._reset)
+
+    async def close(self) -> None:
+        idle = self._pool.qsize()
+        for _ in range(idle):
+            self._pool.get_nowait()
+        for _ in range(idle):
+            self._pool.put_nowait(None)
+        for conn in self._connections:
+            await conn.close()
+        self._connections.clear()
+
+
+def create_storage(
+    url: str, max_entries: int = 100_000, sweep_batch: int = 10_000
+) -> RateLimitStorage:
+    """Build a storage backend from a URL (see the module docstring)."""
+    parsed = urlparse(url)
+    if parsed.scheme == 'memory':
+        return MemoryStorage(max_entries=max_entries, sweep_batch=sweep_batch)
+    if parsed.scheme == 'sqlite':
+        # sqlite:///relative.db and sqlite:////absolute/path.db
+        path = parsed.path[1:] if parsed.path.startswith('/') else parsed.path
+        return SQLiteStorage(path or ':memory:')
+    if parsed.scheme == 'redis':
+        return RedisStorage(url)
+    raise ValueError(f'Unsupported rate limit storage: {url!r}')
+
+
+async def sweep_periodically(
+    storage: RateLimitStorage, interval: float, clock=time.time
+) -> None:
+    """Sweep idle keys from `storage` every `interval` seconds, forever."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            swept = await storage.sweep(clock())
+        except Exception:
+            logger.exception('Rate limit sweep failed')
+            continue
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                'Rate limit sweep removed %d keys; stats=%s',
+                swept,
+                storage.stats(),
+            )
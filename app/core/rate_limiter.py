@@ -1,38 +1,206 @@
-import time
+"""Request rate limiting.
+
+Implements the Generic Cell Rate Algorithm (GCRA): every client key keeps a
+single "theoretical arrival time" (TAT), so both memory and the work done per
+request are constant no matter how large the configured limit is.
+
+Limits are configured through ``Config.RATE_LIMIT_DEFAULT`` and
+``Config.RATE_LIMIT_RULES``. Rules are keyed either by ``"METHOD /path"`` or by
+``"/path"`` (any method) and take values such as ``"120/minute"``.
+
+Requests carrying a valid bearer token are limited per token subject, with
+``Config.RATE_LIMIT_ROLE_RULES`` replacing the default budget for the token's
+role; anonymous requests are limited per client IP. A route rule replaces the
+role budget on its route, unless ``Config.RATE_LIMIT_ROUTE_ROLE_RULES`` gives
+that route its own budget for the role.
+
+Where the per-key state lives is chosen by ``Config.RATE_LIMIT_STORAGE_URL``
+(see `app.core.rate_limit_storage`); use a shared backend when running more
+than one worker.
+"""
+
+from __future__ import annotations
+
 import logging
-from collections import defaultdict, deque
+import math
+import time
+from typing import Mapping
 
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
 from starlette.responses import Response
 from starlette.status import HTTP_429_TOO_MANY_REQUESTS
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.gcra import RateLimit, RateLimitDecision, gcra
+from app.core.metrics import RATE_LIMIT_REJECTIONS
+from app.core.rate_limit_storage import RateLimitStorage, create_storage
+from app.core.security import bearer_token, decode_request_token
+
+logger = logging.getLogger('LIBRARY')
+
+__all__ = [
+    'RateLimit',
+    'RateLimitDecision',
+    'RateLimitRules',
+    'RateLimitStorage',
+    'RateLimiterMiddleware',
+    'client_identity',
+    'gcra',
+    'rate_limit_headers',
+]
+
+
+class RateLimitRules:
+    """Resolve the rate limit that applies to a request."""
+
+    def __init__(
+        self,
+        default: str,
+        rules: Mapping[str, str],
+        role_rules: Mapping[str, str] | None = None,
+        route_role_rules: Mapping[str, Mapping[str, str]] | None = None,
+    ) -> None:
+        self.default = RateLimit.parse(default)
+        self.rules = {
+            key.strip(): RateLimit.parse(value) for key, value in rules.items()
+        }
+        self.role_rules = {
+            role: RateLimit.parse(value)
+            for role, value in (role_rules or {}).items()
+        }
+        self.route_role_rules = {
+            key.strip(): {
+                role: RateLimit.parse(value) for role, value in roles.items()
+            }
+            for key, roles in (route_role_rules or {}).items()
+        }
 
-RATE_LIMIT = 10
-RATE_PERIOD = 60
+    def resolve(
+        self, method: str, path: str, role: str | None = None
+    ) -> tuple[str, RateLimit]:
+        """Return the rule key and limit for `method`, `path` and `role`.
 
+        For each of ``"METHOD /path"`` and ``"/path"``, in that order, the
+        route's budget for `role` wins over the route rule. Route rules win
+        over role budgets, which win over the default. The rule key is part
+        of the client's bucket key, so every rule keeps its own budget.
+        """
+        for key in (f'{method} {path}', path):
+            by_role = self.route_role_rules.get(key)
+            rule = by_role.get(role) if by_role and role else None
+            if rule is not None:
+                return f'{key} role:{role}', rule
+            rule = self.rules.get(key)
+            if rule is not None:
+                return key, rule
+        rule = self.role_rules.get(role) if role else None
+        if rule is not None:
+            return f'role:{role}', rule
+        return '*', self.default
 
-class RateLimiterMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app):
-        super().__init__(app)
-        self.requests = defaultdict(deque)
 
-    async def dispatch(self, request: Request, call_next):
-        client_ip = request.client.host if request.client else "unknown"
-        now = time.time()
-        q = self.requests[client_ip]
+def client_identity(scope: Scope) -> tuple[str, str | None]:
+    """Return the quota identity and role for a request.
 
-        while q and now - q[0] > RATE_PERIOD:
-            q.popleft()
-        if len(q) >= RATE_LIMIT:
-            logging.warning(f"Rate limit exceeded for IP {client_ip}")
-            return Response(
-                'Rate limit exceeded. Max 10 requests per minute.',
+    Uses the bearer token's ``sub``/``role`` claims when the token is valid,
+    falling back to the client IP for anonymous requests.
+    """
+    token = bearer_token(scope)
+    if token is not None:
+        try:
+            claims = decode_request_token(scope, token)
+        except ValueError:
+            claims = {}
+        sub = claims.get('sub')
+        if sub is not None:
+            return f'user:{sub}', claims.get('role')
+    client = scope.get('client')
+    return f'ip:{client[0] if client else "unknown"}', None
+
+
+def rate_limit_headers(
+    rule: RateLimit, decision: RateLimitDecision
+) -> dict[str, str]:
+    headers = {
+        'RateLimit-Limit': str(decision.limit),
+        'RateLimit-Remaining': str(decision.remaining),
+        'RateLimit-Reset': str(math.ceil(decision.reset_after)),
+        'RateLimit-Policy': rule.policy,
+    }
+    if not decision.allowed:
+        headers['Retry-After'] = str(math.ceil(decision.retry_after))
+    return headers
+
+
+class RateLimiterMiddleware:
+    """Pure ASGI rate limiting middleware.
+
+    Runs in the same task as the application (no `BaseHTTPMiddleware`
+    streams), and only touches the ``http.response.start`` message to append
+    the rate limit headers, so streaming responses pass straight through.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        rules: RateLimitRules | None = None,
+        storage: RateLimitStorage | None = None,
+    ) -> None:
+        self.app = app
+        self.rules = rules or RateLimitRules(
+            settings.RATE_LIMIT_DEFAULT,
+            settings.RATE_LIMIT_RULES,
+            settings.RATE_LIMIT_ROLE_RULES,
+            settings.RATE_LIMIT_ROUTE_ROLE_RULES,
+        )
+        self.storage = storage or create_storage(
+            settings.RATE_LIMIT_STORAGE_URL,
+            settings.RATE_LIMIT_MAX_ENTRIES,
+            settings.RATE_LIMIT_SWEEP_BATCH,
+        )
+
+    async def __call__(
+        self, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        identity, role = client_identity(scope)
+        rule_key, rule = self.rules.resolve(
+            scope['method'], scope['path'], role
+        )
+        key = f'{identity}|{rule_key}'
+        decision = await self.storage.hit(key, rule, time.time())
+        headers = rate_limit_headers(rule, decision)
+
+        if not decision.allowed:
+            logger.warning('Rate limit exceeded for %s', identity)
+            RATE_LIMIT_REJECTIONS.inc(rule_key)
+            response = Response(
+                f'Rate limit exceeded. Max {rule.limit} requests per '
+                f'{int(rule.period)} seconds.',
                 status_code=HTTP_429_TOO_MANY_REQUESTS,
+                headers=headers,
             )
-        q.append(now)
+            await response(scope, receive, send)
+            return
+
+        raw_headers = [
+            (name.lower().encode('latin-1'), value.encode('latin-1'))
+            for name, value in headers.items()
+        ]
+
+        async def send_with_headers(message: Message) -> None:
+            if message['type'] == 'http.response.start':
+                message['headers'] = [
+                    *message.get('headers', ()),
+                    *raw_headers,
+                ]
+            await send(message)
+
         try:
-            response = await call_next(request)
+            await self.app(scope, receive, send_with_headers)
         except Exception as exc:
-            logging.error(f"Error processing request from {client_ip}: {exc}")
+            logger.error('Error processing request from %s: %s', identity, exc)
             raise
-        return response
@@ -5,38 +5,98 @@ Provides a small, well-tested interface used by domain models and services.
 
 from __future__ import annotations
 
+import asyncio
 import base64
 import hashlib
+import multiprocessing
 import os
 import secrets
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, Optional
+from functools import partial
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    MutableMapping,
+    Optional,
+    Sequence,
+)
 
 from jose import JWTError, jwt
 
 from app.core.config import settings
+from app.core.token_cache import token_cache, token_revocations
 
-_ALGORITHM = 'pbkdf2_sha256'
-_ITERATIONS = 120_000
 _SALT_SIZE = 16  # bytes
 TOKEN_ALGORITHM = 'HS256'
+_TOKEN_CLAIMS_STATE = 'token_claims'
+
+# scrypt block size and parallelism are fixed; its cost is the CPU/memory
+# parameter N, which must be a power of two.
+_SCRYPT_R = 8
+_SCRYPT_P = 1
+
+
+def _pbkdf2_sha256(password: bytes, salt: bytes, cost: int) -> bytes:
+    return hashlib.pbkdf2_hmac('sha256', password, salt, cost)
+
+
+def _scrypt(password: bytes, salt: bytes, cost: int) -> bytes:
+    return hashlib.scrypt(
+        password,
+        salt=salt,
+        n=cost,
+        r=_SCRYPT_R,
+        p=_SCRYPT_P,
+        maxmem=256 * _SCRYPT_R * cost,
+    )
+
+
+# Key derivation functions by the algorithm name stored in each hash.
+HASHERS: Dict[str, Callable[[bytes, bytes, int], bytes]] = {
+    'pbkdf2_sha256': _pbkdf2_sha256,
+    'scrypt': _scrypt,
+}
+DEFAULT_COSTS: Dict[str, int] = {
+    'pbkdf2_sha256': 120_000,
+    'scrypt': 2**14,
+}
+
+
+def hash_settings() -> tuple[str, int]:
+    """The configured ``(algorithm, cost)`` for new password hashes."""
+    algorithm = settings.PASSWORD_HASH_ALGORITHM
+    if algorithm not in HASHERS:
+        raise ValueError(f'Unknown password hash algorithm: {algorithm}')
+    cost = settings.PASSWORD_HASH_COST or DEFAULT_COSTS[algorithm]
+    return algorithm, cost
 
 
 def hash_password(
-    password: str, iterations: int = _ITERATIONS, salt: Optional[bytes] = None
+    password: str,
+    cost: Optional[int] = None,
+    salt: Optional[bytes] = None,
+    algorithm: Optional[str] = None,
 ) -> str:
-    """Return a salted PBKDF2-SHA256 hashed password string.
+    """Return a salted hashed password string.
 
-    Format: "{algorithm}${iterations}${salt_b64}${dk_b64}"
+    Uses the configured algorithm and cost unless given. Format:
+    "{algorithm}${cost}${salt_b64}${dk_b64}"
     """
+    if algorithm is None:
+        algorithm, default_cost = hash_settings()
+    else:
+        default_cost = DEFAULT_COSTS[algorithm]
+    if cost is None:
+        cost = default_cost
     if salt is None:
         salt = os.urandom(_SALT_SIZE)
-    dk = hashlib.pbkdf2_hmac(
-        'sha256', password.encode('utf-8'), salt, iterations
-    )
+    dk = HASHERS[algorithm](password.encode('utf-8'), salt, cost)
     salt_b64 = base64.b64encode(salt).decode('ascii')
     dk_b64 = base64.b64encode(dk).decode('ascii')
-    return f'{_ALGORITHM}${iterations}${salt_b64}${dk_b64}'
+    return f'{algorithm}${cost}${salt_b64}${dk_b64}'
 
 
 def verify_password(stored: str, password: str) -> bool:
@@ -44,23 +104,153 @@ def verify_password(stored: str, password: str) -> bool:
     Verify the provided password against the stored hash.
     """
     try:
-        algorithm, iterations_s, salt_b64, dk_b64 = stored.split('$')
+        algorithm, cost_s, salt_b64, dk_b64 = stored.split('$')
     except ValueError:
         return False
-    if algorithm != _ALGORITHM:
+    hasher = HASHERS.get(algorithm)
+    if hasher is None:
         return False
     try:
-        iterations = int(iterations_s)
+        cost = int(cost_s)
         salt = base64.b64decode(salt_b64)
         dk = base64.b64decode(dk_b64)
+        new_dk = hasher(password.encode('utf-8'), salt, cost)
     except Exception:
         return False
-    new_dk = hashlib.pbkdf2_hmac(
-        'sha256', password.encode('utf-8'), salt, iterations
-    )
     return secrets.compare_digest(new_dk, dk)
 
 
+def needs_rehash(stored: str) -> bool:
+    """True if `stored` was not made with the configured algorithm/cost."""
+    algorithm, cost = hash_settings()
+    return not stored.startswith(f'{algorithm}${cost}$')
+
+
+def calibrate_cost(
+    algorithm: str,
+    target_seconds: float,
+    password: str = 'calibration',
+    timer: Callable[[], float] = time.perf_counter,
+) -> int:
+    """Largest cost whose hash takes at most `target_seconds` on this host,
+    as measured by `timer`.
+
+    PBKDF2 time grows linearly with its iteration count, so one timed
+    sample is scaled; scrypt's N is doubled until the next step would
+    overshoot the target.
+    """
+    hasher = HASHERS[algorithm]
+    salt = os.urandom(_SALT_SIZE)
+
+    def timed(cost: int) -> float:
+        start = timer()
+        hasher(password.encode('utf-8'), salt, cost)
+        return timer() - start
+
+    if algorithm == 'pbkdf2_sha256':
+        sample = 50_000
+        per_iteration = min(timed(sample) for _ in range(3)) / sample
+        return max(1_000, int(target_seconds / per_iteration) // 1000 * 1000)
+
+    cost = 2**10
+    while timed(cost * 2) <= target_seconds:
+        cost *= 2
+    return cost
+
+
+_hash_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_hash_executor() -> ThreadPoolExecutor:
+    # hashlib's PBKDF2 and scrypt release the GIL while they run, so a small
+    # thread pool gives real parallelism without the pickling cost of a
+    # process pool.
+    global _hash_executor  # noqa: PLW0603
+    if _hash_executor is None:
+        _hash_executor = ThreadPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_WORKERS,
+            thread_name_prefix='password-hash',
+        )
+    return _hash_executor
+
+
+async def hash_password_async(
+    password: str,
+    cost: Optional[int] = None,
+    salt: Optional[bytes] = None,
+    algorithm: Optional[str] = None,
+) -> str:
+    """`hash_password` run on the bounded hashing pool, off the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _get_hash_executor(),
+        partial(hash_password, password, cost, salt, algorithm),
+    )
+
+
+async def verify_password_async(stored: str, password: str) -> bool:
+    """`verify_password` run on the bounded hashing pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _get_hash_executor(), verify_password, stored, password
+    )
+
+
+_bulk_hash_executor: Optional[ProcessPoolExecutor] = None
+
+
+def _bulk_hash_workers() -> int:
+    return settings.PASSWORD_HASH_PROCESSES or os.cpu_count() or 1
+
+
+def _get_bulk_hash_executor() -> ProcessPoolExecutor:
+    # Bulk imports hash thousands of passwords back to back; a separate
+    # process pool keeps them from starving interactive logins on the
+    # thread pool. Workers are spawned, not forked, as the parent process
+    # runs an event loop and other threads.
+    global _bulk_hash_executor  # noqa: PLW0603
+    if _bulk_hash_executor is None:
+        _bulk_hash_executor = ProcessPoolExecutor(
+            max_workers=_bulk_hash_workers(),
+            mp_context=multiprocessing.get_context('spawn'),
+        )
+    return _bulk_hash_executor
+
+
+def _hash_many(
+    passwords: Sequence[str], algorithm: str, cost: int
+) -> list[str]:
+    return [hash_password(p, cost, None, algorithm) for p in passwords]
+
+
+async def hash_passwords_bulk(passwords: Sequence[str]) -> list[str]:
+    """Hash `passwords` in parallel on the process pool, keeping order."""
+    if not passwords:
+        return []
+    algorithm, cost = hash_settings()
+    executor = _get_bulk_hash_executor()
+    size = -(-len(passwords) // _bulk_hash_workers())
+    loop = asyncio.get_running_loop()
+    batches = await asyncio.gather(
+        *(
+            loop.run_in_executor(
+                executor, _hash_many, passwords[i : i + size], algorithm, cost
+            )
+            for i in range(0, len(passwords), size)
+        )
+    )
+    return [hashed for batch in batches for hashed in batch]
+
+
+def shutdown_hash_executors() -> None:
+    """Stop the password hashing pools (on application shutdown)."""
+    global _hash_executor, _bulk_hash_executor  # noqa: PLW0603
+    for executor in (_hash_executor, _bulk_hash_executor):
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+    _hash_executor = _bulk_hash_executor = None
+
+
 def create_access_token(
     data: Dict[str, Any],
     expires_delta: Optional[timedelta] = None,
@@ -69,8 +259,8 @@ def create_access_token(
     to_encode = data.copy()
     if expires_delta is None:
         expires_delta = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    expire = datetime.now(timezone.utc) + expires_delta
-    to_encode.update({'exp': expire})
+    now = datetime.now(timezone.utc)
+    to_encode.update({'iat': now, 'exp': now + expires_delta})
     token = jwt.encode(
         to_encode, settings.SECRET_KEY, algorithm=TOKEN_ALGORITHM
     )
@@ -91,3 +281,54 @@ def decode_access_token(token: str) -> Dict[str, Any]:
         return payload
     except JWTError as exc:
         raise ValueError('Invalid token') from exc
+
+
+def verify_access_token(token: str) -> Dict[str, Any]:
+    """`decode_access_token` backed by the verified-token cache.
+
+    Also rejects tokens revoked through `token_revocations`. Raises
+    ValueError on failure.
+    """
+    now = time.time()
+    payload = token_cache.get(token, now)
+    if payload is None:
+        payload = decode_access_token(token)
+        token_cache.put(token, payload, now)
+    if token_revocations.is_revoked(payload):
+        raise ValueError('Token revoked')
+    return payload
+
+
+def bearer_token(scope: MutableMapping[str, Any]) -> Optional[str]:
+    """Return the bearer token from an ASGI scope's headers, if any."""
+    for name, value in scope.get('headers', ()):
+        if name == b'authorization':
+            scheme, _, token = value.decode('latin-1').partition(' ')
+            if scheme.lower() == 'bearer' and token:
+                return token.strip()
+            return None
+    return None
+
+
+def decode_request_token(
+    scope: MutableMapping[str, Any], token: str
+) -> Dict[str, Any]:
+    """Decode `token` at most once per request.
+
+    The outcome is memoised in the request state (``scope['state']``), so the
+    rate limiter and the auth dependencies share a single verification.
+    Raises ValueError like `verify_access_token`.
+    """
+    state = scope.setdefault('state', {})
+    cached = state.get(_TOKEN_CLAIMS_STATE)
+    if cached is not None and cached[0] == token:
+        payload = cached[1]
+    else:
+        try:
+            payload = verify_access_token(token)
+        except ValueError:
+            payload = None
+        state[_TOKEN_CLAIMS_STATE] = (token, payload)
+    if payload is None:
+        raise ValueError('Invalid token')
+    return payload
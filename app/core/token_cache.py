@@ -0,0 +1,101 @@
+"""In-memory caches backing access token verification.
+
+`TokenCache` remembers the claims of tokens whose signature was already
+verified, so repeated requests with the same bearer token skip the JWT
+decode. Entries are keyed by the token's SHA-256 digest (tokens themselves
+are never stored), bounded in number, and never outlive the token's ``exp``.
+
+`TokenRevocations` records subjects whose tokens were invalidated (through
+``POST /users/{id}/revoke-tokens``): any token for that subject issued at or
+before the revocation is rejected, whether it comes from the cache or not.
+Both structures are per process, so a revocation only reaches the worker
+that handled it and is lost on restart.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+
+
+class TokenCache:
+    def __init__(self, max_entries: int, ttl: float) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[bytes, tuple[float, Dict[str, Any]]] = (
+            OrderedDict()
+        )
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode('utf-8')).digest()
+
+    def get(self, token: str, now: float) -> Optional[Dict[str, Any]]:
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, claims = entry
+        if expires_at <= now:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return claims
+
+    def put(self, token: str, claims: Dict[str, Any], now: float) -> None:
+        expires_at = now + self.ttl
+        exp = claims.get('exp')
+        if isinstance(exp, (int, float)):
+            expires_at = min(expires_at, exp)
+        if expires_at <= now or self.max_entries <= 0:
+            return
+        key = self._key(token)
+        self._entries[key] = (expires_at, claims)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class TokenRevocations:
+    def __init__(self, retention: float) -> None:
+        # Revocations older than the longest token lifetime can be dropped.
+        self.retention = retention
+        self._revoked_at: dict[str, int] = {}
+
+    def revoke(self, subject: str | int, now: float) -> None:
+        """Invalidate every token for `subject` issued before `now`.
+
+        `iat` only has second resolution, so tokens issued within the
+        second of `now` stay valid: a login right after the revocation
+        must not be rejected.
+        """
+        self._revoked_at[str(subject)] = int(now)
+        cutoff = now - self.retention
+        for sub in [s for s, t in self._revoked_at.items() if t < cutoff]:
+            del self._revoked_at[sub]
+
+    def is_revoked(self, claims: Dict[str, Any]) -> bool:
+        revoked_at = self._revoked_at.get(str(claims.get('sub')))
+        if revoked_at is None:
+            return False
+        return claims.get('iat', 0) < revoked_at
+
+    def clear(self) -> None:
+        self._revoked_at.clear()
+
+
+token_cache = TokenCache(
+    settings.TOKEN_CACHE_MAX_ENTRIES, settings.TOKEN_CACHE_TTL_SECONDS
+)
+token_revocations = TokenRevocations(
+    retention=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+)
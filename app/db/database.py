@@ -1,7 +1,9 @@
 from __future__ import annotations
 
-from typing import AsyncGenerator
+from typing import Any, AsyncGenerator
 
+from fastapi import Request
+from sqlalchemy import Engine, event, make_url
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
@@ -10,25 +12,128 @@ from sqlalchemy.ext.asyncio import (
 )
 
 from app.core.config import settings
-from app.models.base import Base
+from app.db.migrations import migrate
+from app.db.routing import RoutingSession, read_only_url, use_primary
+
+
+def is_memory_database(url: str) -> bool:
+    parsed = make_url(url)
+    return parsed.database in {None, '', ':memory:'} or (
+        parsed.query.get('mode') == 'memory'
+    )
+
+
+def sqlite_pragmas(read_only: bool = False) -> dict[str, Any]:
+    """PRAGMAs applied to each new SQLite connection, from `Config`.
+
+    Read-only connections skip the ones that would write to the file.
+    """
+    pragmas = {
+        'journal_mode': settings.SQLITE_JOURNAL_MODE,
+        'synchronous': settings.SQLITE_SYNCHRONOUS,
+        'mmap_size': settings.SQLITE_MMAP_SIZE,
+        'cache_size': settings.SQLITE_CACHE_SIZE,
+        'busy_timeout': settings.SQLITE_BUSY_TIMEOUT_MS,
+        'temp_store': settings.SQLITE_TEMP_STORE,
+    }
+    if read_only:
+        del pragmas['journal_mode']
+    return pragmas
+
+
+def _configure_sqlite(
+    sync_engine: Engine, pragmas: dict[str, Any], begin_mode: str
+) -> None:
+    @event.listens_for(sync_engine, 'connect')
+    def _on_connect(dbapi_connection, connection_record):
+        # The driver opens a transaction before the first write of a unit
+        # of work; this picks how (e.g. BEGIN IMMEDIATE).
+        dbapi_connection.isolation_level = begin_mode
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
 
-engine: AsyncEngine = create_async_engine(
-    settings.DATABASE_URL, echo=settings.sqlalchemy_echo, future=True
-)
+
+def create_engine(
+    url: str | None = None, read_only: bool = False, **options: Any
+) -> AsyncEngine:
+    """Create an async engine with the configured SQLite profile.
+
+    File databases get the pool settings from `Config`; `options` are
+    passed on to `create_async_engine` and win over the defaults.
+    """
+    url = url or settings.DATABASE_URL
+    defaults: dict[str, Any] = {
+        'echo': settings.sqlalchemy_echo,
+        'future': True,
+    }
+    if not is_memory_database(url):
+        defaults.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_pre_ping=settings.DB_POOL_PRE_PING,
+        )
+    new_engine = create_async_engine(url, **{**defaults, **options})
+    if new_engine.dialect.name == 'sqlite':
+        _configure_sqlite(
+            new_engine.sync_engine,
+            sqlite_pragmas(read_only),
+            settings.SQLITE_BEGIN_MODE,
+        )
+    return new_engine
+
+
+def create_read_engine(url: str | None = None) -> AsyncEngine | None:
+    """Engine for routed reads, per ``Config.DATABASE_READ_URL``."""
+    url = url or settings.DATABASE_URL
+    read_url = settings.DATABASE_READ_URL
+    if not read_url or is_memory_database(url):
+        return None
+    if read_url == 'readonly':
+        read_url = read_only_url(url)
+    return create_engine(read_url, read_only=True)
+
+
+engine: AsyncEngine = create_engine()
+read_engine: AsyncEngine | None = create_read_engine()
 
 async_session: async_sessionmaker[AsyncSession] = async_sessionmaker(
-    bind=engine, expire_on_commit=False, class_=AsyncSession
+    bind=engine,
+    expire_on_commit=False,
+    class_=AsyncSession,
+    sync_session_class=RoutingSession,
+    reader=read_engine,
 )
 
+# Clients send this header on a request that must see their latest writes
+# even if the read database lags behind the primary.
+READ_YOUR_WRITES_HEADER = 'x-read-your-writes'
+
 
-async def get_session() -> AsyncGenerator[AsyncSession, None]:
+async def get_session(
+    request: Request,
+) -> AsyncGenerator[AsyncSession, None]:
     async with async_session() as session:
+        if request.headers.get(READ_YOUR_WRITES_HEADER):
+            use_primary(session)
         yield session
 
 
+def pool_stats(chosen_engine: AsyncEngine | None = None) -> dict[str, int]:
+    """Connection pool gauges, for pools that track them."""
+    pool = (chosen_engine or engine).pool
+    stats = {}
+    for name in ('size', 'checkedin', 'checkedout', 'overflow'):
+        getter = getattr(pool, name, None)
+        if callable(getter):
+            stats[name] = getter()
+    return stats
+
+
 async def create_db_and_tables(
     engine_override: AsyncEngine | None = None,
 ) -> None:
-    chosen_engine = engine_override or engine
-    async with chosen_engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    """Create or upgrade the schema through the migration runner."""
+    await migrate(engine_override or engine)
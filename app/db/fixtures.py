@@ -8,7 +8,7 @@ from sqlalchemy.ext.asyncio import (
     async_sessionmaker,
 )
 
-from app.db.database import engine as default_engine
+from app.db.database import async_session
 from app.models.user import Role
 from app.repositories.user import UserRepository
 from app.services.user import UserService
@@ -18,10 +18,11 @@ async def create_dev_admin(
     engine_override: Optional[AsyncEngine] = None,
 ) -> None:
     """Ensure a default admin user exists (Used in development only)."""
-    chosen = engine_override or default_engine
-    session_factory = async_sessionmaker(
-        bind=chosen, expire_on_commit=False, class_=AsyncSession
-    )
+    session_factory = async_session
+    if engine_override is not None:
+        session_factory = async_sessionmaker(
+            bind=engine_override, expire_on_commit=False, class_=AsyncSession
+        )
     async with session_factory() as session:
         repo = UserRepository(session)
         svc = UserService(repo, session=session)
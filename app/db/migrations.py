@@ -0,0 +1,334 @@
+"""Small versioned schema migration runner.
+
+Applied versions are recorded in the ``schema_version`` table. A fresh
+database is created from the models and stamped with every version; a
+database created before migrations existed (tables but no
+``schema_version``) is stamped with the baseline and upgraded from there.
+
+Migrations are additive and idempotent (``IF NOT EXISTS``), each in its own
+short transaction, so a database can be upgraded in place while the API is
+serving: in WAL mode readers keep going while an index is built, and each
+step holds the write lock, so processes migrating at once wait for each
+other. Add new entries to `MIGRATIONS` with the next version number and
+mirror schema changes in the models; never edit shipped migrations.
+Objects the models cannot express (triggers, seed rows) go in migrations
+marked ``replay_on_create``, which also run after a fresh ``create_all``.
+Steps that need Python (backfills, conditional DDL) go in ``run``, called
+with the synchronous connection after the statements.
+"""
+
+from __future__ import annotations
+
+import logging
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Optional
+
+from sqlalchemy import Connection, inspect, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from app.models.base import Base
+from app.models.book import title_key
+
+logger = logging.getLogger('LIBRARY')
+
+VERSION_TABLE = 'schema_version'
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    description: str
+    statements: tuple[str, ...] = ()
+    replay_on_create: bool = False
+    run: Optional[Callable[[Connection], None]] = None
+
+
+def _add_book_title_key(conn: Connection) -> None:
+    columns = {c['name'] for c in inspect(conn).get_columns('books')}
+    if 'title_key' not in columns:
+        conn.exec_driver_sql(
+            'ALTER TABLE books ADD COLUMN title_key VARCHAR(511) '
+            "NOT NULL DEFAULT ''"
+        )
+    rows = conn.exec_driver_sql(
+        'SELECT id, name, author FROM books ORDER BY id'
+    ).all()
+    seen: set[str] = set()
+    updates = []
+    for book_id, name, author in rows:
+        key = title_key(name, author)
+        if key in seen:
+            # Duplicates created before the constraint keep a key of
+            # their own; new books still collide with the first copy.
+            key = f'{key}\x1f{book_id}'
+        seen.add(key)
+        updates.append({'key': key, 'id': book_id})
+    if updates:
+        conn.execute(
+            text('UPDATE books SET title_key = :key WHERE id = :id'), updates
+        )
+    conn.exec_driver_sql(
+        'CREATE UNIQUE INDEX IF NOT EXISTS ux_books_title_key '
+        'ON books (title_key)'
+    )
+
+
+BOOKS_FTS_TRIGGERS = (
+    'CREATE TRIGGER IF NOT EXISTS trg_books_fts_insert '
+    'AFTER INSERT ON books BEGIN '
+    'INSERT INTO books_fts (rowid, name, author) '
+    'VALUES (NEW.id, NEW.name, NEW.author); END',
+    'CREATE TRIGGER IF NOT EXISTS trg_books_fts_delete '
+    'AFTER DELETE ON books BEGIN '
+    'INSERT INTO books_fts (books_fts, rowid, name, author) '
+    "VALUES ('delete', OLD.id, OLD.name, OLD.author); END",
+    'CREATE TRIGGER IF NOT EXISTS trg_books_fts_update '
+    'AFTER UPDATE OF name, author ON books BEGIN '
+    'INSERT INTO books_fts (books_fts, rowid, name, author) '
+    "VALUES ('delete', OLD.id, OLD.name, OLD.author); "
+    'INSERT INTO books_fts (rowid, name, author) '
+    'VALUES (NEW.id, NEW.name, NEW.author); END',
+)
+
+
+def _create_books_fts(conn: Connection) -> None:
+    try:
+        conn.exec_driver_sql(
+            'CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5('
+            "name, author, content='books', content_rowid='id', "
+            "tokenize='unicode61 remove_diacritics 2')"
+        )
+    except OperationalError:
+        logger.warning('SQLite has no FTS5 support; book search will use LIKE')
+        return
+    for statement in BOOKS_FTS_TRIGGERS:
+        conn.exec_driver_sql(statement)
+    conn.exec_driver_sql(
+        "INSERT INTO books_fts (books_fts) VALUES ('rebuild')"
+    )
+
+
+MIGRATIONS: tuple[Migration, ...] = (
+    Migration(1, 'initial schema'),
+    Migration(
+        2,
+        'indexes for lending, user and book lookups',
+        (
+            'CREATE INDEX IF NOT EXISTS ix_lendings_user_id '
+            'ON lendings (user_id)',
+            'CREATE INDEX IF NOT EXISTS ix_lendings_book_id '
+            'ON lendings (book_id)',
+            'CREATE INDEX IF NOT EXISTS ix_lendings_returned_at '
+            'ON lendings (returned_at)',
+            'CREATE INDEX IF NOT EXISTS ix_lendings_active_user_book '
+            'ON lendings (user_id, book_id) WHERE returned_at IS NULL',
+            'CREATE INDEX IF NOT EXISTS ix_users_name ON users (name)',
+            'CREATE INDEX IF NOT EXISTS ix_books_name_author '
+            'ON books (name, author)',
+        ),
+    ),
+    Migration(
+        3,
+        'row counters for books, users and active lendings',
+        (
+            'CREATE TABLE IF NOT EXISTS row_counts ('
+            'name VARCHAR(64) NOT NULL PRIMARY KEY, '
+            'total INTEGER NOT NULL)',
+            'CREATE TRIGGER IF NOT EXISTS trg_books_count_insert '
+            'AFTER INSERT ON books BEGIN '
+            "UPDATE row_counts SET total = total + 1 WHERE name = 'books'; "
+            'END',
+            'CREATE TRIGGER IF NOT EXISTS trg_books_count_delete '
+            'AFTER DELETE ON books BEGIN '
+            "UPDATE row_counts SET total = total - 1 WHERE name = 'books'; "
+            'END',
+            'CREATE TRIGGER IF NOT EXISTS trg_users_count_insert '
+            'AFTER INSERT ON users BEGIN '
+            "UPDATE row_counts SET total = total + 1 WHERE name = 'users'; "
+            'END',
+            'CREATE TRIGGER IF NOT EXISTS trg_users_count_delete '
+            'AFTER DELETE ON users BEGIN '
+            "UPDATE row_counts SET total = total - 1 WHERE name = 'users'; "
+            'END',
+            'CREATE TRIGGER IF NOT EXISTS trg_active_lendings_insert '
+            'AFTER INSERT ON lendings WHEN NEW.returned_at IS NULL BEGIN '
+            'UPDATE row_counts SET total = total + 1 '
+            "WHERE name = 'active_lendings'; END",
+            'CREATE TRIGGER IF NOT EXISTS trg_active_lendings_delete '
+            'AFTER DELETE ON lendings WHEN OLD.returned_at IS NULL BEGIN '
+            'UPDATE row_counts SET total = total - 1 '
+            "WHERE name = 'active_lendings'; END",
+            'CREATE TRIGGER IF NOT EXISTS trg_active_lendings_return '
+            'AFTER UPDATE OF returned_at ON lendings '
+            'WHEN OLD.returned_at IS NULL AND NEW.returned_at IS NOT NULL '
+            'BEGIN UPDATE row_counts SET total = total - 1 '
+            "WHERE name = 'active_lendings'; END",
+            'CREATE TRIGGER IF NOT EXISTS trg_active_lendings_reopen '
+            'AFTER UPDATE OF returned_at ON lendings '
+            'WHEN OLD.returned_at IS NOT NULL AND NEW.returned_at IS NULL '
+            'BEGIN UPDATE row_counts SET total = total + 1 '
+            "WHERE name = 'active_lendings'; END",
+            'INSERT OR REPLACE INTO row_counts (name, total) '
+            "SELECT 'books', count(*) FROM books",
+            'INSERT OR REPLACE INTO row_counts (name, total) '
+            "SELECT 'users', count(*) FROM users",
+            'INSERT OR REPLACE INTO row_counts (name, total) '
+            "SELECT 'active_lendings', count(*) FROM lendings "
+            'WHERE returned_at IS NULL',
+        ),
+        replay_on_create=True,
+    ),
+    Migration(
+        4,
+        'normalized unique (name, author) key for books',
+        run=_add_book_title_key,
+    ),
+    Migration(
+        5,
+        'full-text index over book names and authors (FTS5)',
+        replay_on_create=True,
+        run=_create_books_fts,
+    ),
+    Migration(
+        6,
+        'indexes for book listing filters and sorts',
+        (
+            'CREATE INDEX IF NOT EXISTS ix_books_category_name '
+            'ON books (category, name)',
+            'CREATE INDEX IF NOT EXISTS ix_books_available_category '
+            'ON books (category) WHERE available_copies > 0',
+            'CREATE INDEX IF NOT EXISTS ix_books_author_nocase '
+            'ON books (author COLLATE NOCASE)',
+            'CREATE INDEX IF NOT EXISTS ix_books_created_at '
+            'ON books (created_at)',
+        ),
+    ),
+    Migration(
+        7,
+        'indexes matching the book listing keyset orders',
+        (
+            'CREATE INDEX IF NOT EXISTS ix_books_name ON books (name)',
+            'CREATE INDEX IF NOT EXISTS ix_books_category ON books (category)',
+            'CREATE INDEX IF NOT EXISTS ix_books_available '
+            'ON books (id) WHERE available_copies > 0',
+        ),
+    ),
+)
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+@asynccontextmanager
+async def _locked(engine: AsyncEngine) -> AsyncIterator[AsyncConnection]:
+    # Take SQLite's write lock up front: DDL and the version bump commit
+    # together, and concurrent runners wait for each other.
+    async with engine.begin() as conn:
+        await conn.exec_driver_sql('BEGIN IMMEDIATE')
+        yield conn
+
+
+async def _ensure_version_table(conn: AsyncConnection) -> None:
+    await conn.execute(
+        text(
+            f'CREATE TABLE IF NOT EXISTS {VERSION_TABLE} ('
+            'version INTEGER PRIMARY KEY, '
+            'description TEXT NOT NULL, '
+            'applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP)'
+        )
+    )
+
+
+async def _stamp(conn: AsyncConnection, migration: Migration) -> None:
+    await conn.execute(
+        text(
+            f'INSERT OR IGNORE INTO {VERSION_TABLE} (version, description) '
+            'VALUES (:version, :description)'
+        ),
+        {
+            'version': migration.version,
+            'description': migration.description,
+        },
+    )
+
+
+async def _apply(conn: AsyncConnection, migration: Migration) -> None:
+    for statement in migration.statements:
+        await conn.execute(text(statement))
+    if migration.run is not None:
+        await conn.run_sync(migration.run)
+
+
+async def current_version(conn: AsyncConnection) -> int:
+    """Highest applied version, or 0 for an unversioned database."""
+    has_table = await conn.run_sync(
+        lambda sync_conn: inspect(sync_conn).has_table(VERSION_TABLE)
+    )
+    if not has_table:
+        return 0
+    result = await conn.execute(
+        text(f'SELECT coalesce(max(version), 0) FROM {VERSION_TABLE}')
+    )
+    return result.scalar_one()
+
+
+class SchemaOutdated(RuntimeError):
+    """The database is behind the migrations this code expects."""
+
+
+async def check_schema(engine: AsyncEngine) -> int:
+    """Return the schema version, raising `SchemaOutdated` if it is behind.
+
+    A single read without DDL or write locks, cheap enough for every
+    process start. Newer versions are accepted, so code from before an
+    additive migration keeps running during a rolling deploy.
+    """
+    try:
+        async with engine.connect() as conn:
+            result = await conn.execute(
+                text(f'SELECT max(version) FROM {VERSION_TABLE}')
+            )
+            version = result.scalar_one() or 0
+    except OperationalError:  # no version table yet
+        version = 0
+    if version < LATEST_VERSION:
+        raise SchemaOutdated(
+            f'Database schema is at version {version}, expected '
+            f'{LATEST_VERSION}; run `python -m app.db.setup`'
+        )
+    return version
+
+
+async def migrate(engine: AsyncEngine) -> list[int]:
+    """Bring the schema up to `LATEST_VERSION`; return applied versions."""
+    async with _locked(engine) as conn:
+        await _ensure_version_table(conn)
+        if await current_version(conn) == 0:
+            existing = await conn.run_sync(
+                lambda sync_conn: inspect(sync_conn).get_table_names()
+            )
+            if set(Base.metadata.tables).isdisjoint(existing):
+                await conn.run_sync(Base.metadata.create_all)
+                for migration in MIGRATIONS:
+                    if migration.replay_on_create:
+                        await _apply(conn, migration)
+                    await _stamp(conn, migration)
+                logger.info('Created schema at version %d', LATEST_VERSION)
+                return [migration.version for migration in MIGRATIONS]
+            await _stamp(conn, MIGRATIONS[0])
+
+    applied = []
+    for migration in MIGRATIONS:
+        async with _locked(engine) as conn:
+            if migration.version <= await current_version(conn):
+                continue
+            await _apply(conn, migration)
+            await _stamp(conn, migration)
+        logger.info(
+            'Applied migration %d: %s',
+            migration.version,
+            migration.description,
+        )
+        applied.append(migration.version)
+    return applied
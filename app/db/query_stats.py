@@ -0,0 +1,162 @@
+"""Per-request SQL statement counting and timing.
+
+SQLAlchemy cursor events are recorded into the `QueryStats` of the current
+context (set by `track_queries`). The listeners are installed on the
+`Engine` class, so every engine, including test engines, is covered; outside
+a tracked context they return after a single context variable lookup.
+
+`QueryStatsMiddleware` tracks every HTTP request: it adds a
+``Server-Timing`` header when enabled, and logs requests that exceed
+``Config.SQL_QUERY_BUDGET`` statements or repeat one statement at least
+``Config.SQL_N_PLUS_ONE_THRESHOLD`` times (the usual N+1 signature).
+Tests can use `assert_max_queries`.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+logger = logging.getLogger('LIBRARY')
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    duration: float = 0.0
+    statements: Counter[str] = field(default_factory=Counter)
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """Statements executed at least `threshold` times."""
+        return [
+            (statement, count)
+            for statement, count in self.statements.most_common()
+            if count >= threshold
+        ]
+
+
+query_stats_var: ContextVar[QueryStats | None] = ContextVar(
+    'query_stats', default=None
+)
+
+
+@event.listens_for(Engine, 'before_cursor_execute', named=True)
+def _before_cursor_execute(conn, **kw):
+    if query_stats_var.get() is not None:
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute', named=True)
+def _after_cursor_execute(conn, statement, **kw):
+    stats = query_stats_var.get()
+    if stats is None:
+        return
+    starts = conn.info.get('query_start')
+    if starts:
+        stats.duration += time.perf_counter() - starts.pop()
+    stats.count += 1
+    stats.statements[statement] += 1
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Record the statements executed in this context."""
+    stats = QueryStats()
+    token = query_stats_var.set(stats)
+    try:
+        yield stats
+    finally:
+        query_stats_var.reset(token)
+
+
+@contextmanager
+def assert_max_queries(limit: int) -> Iterator[QueryStats]:
+    """Fail if the block executes more than `limit` SQL statements."""
+    with track_queries() as stats:
+        yield stats
+    if stats.count > limit:
+        listing = '\n'.join(
+            f'  {count}x {statement}'
+            for statement, count in stats.statements.most_common()
+        )
+        raise AssertionError(
+            f'Expected at most {limit} queries, got {stats.count}:\n{listing}'
+        )
+
+
+class QueryStatsMiddleware:
+    """Pure ASGI middleware tracking the SQL statements of each request."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        budget: int | None = None,
+        server_timing: bool | None = None,
+    ) -> None:
+        self.app = app
+        self.budget = settings.SQL_QUERY_BUDGET if budget is None else budget
+        self.server_timing = (
+            settings.APP_ENV == 'development'
+            if server_timing is None
+            else server_timing
+        )
+
+    async def __call__(
+        self, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries() as stats:
+
+            async def send_with_timing(message: Message) -> None:
+                if message['type'] == 'http.response.start':
+                    timing = (
+                        f'db;dur={stats.duration * 1000:.1f};'
+                        f'desc="{stats.count} queries"'
+                    )
+                    message['headers'] = [
+                        *message.get('headers', ()),
+                        (b'server-timing', timing.encode('latin-1')),
+                    ]
+                await send(message)
+
+            await self.app(
+                scope,
+                receive,
+                send_with_timing if self.server_timing else send,
+            )
+        self._report(scope, stats)
+
+    def _report(self, scope: Scope, stats: QueryStats) -> None:
+        if stats.count > self.budget:
+            logger.warning(
+                'Query budget exceeded: %d queries (budget %d) for %s %s',
+                stats.count,
+                self.budget,
+                scope['method'],
+                scope['path'],
+                extra={'query_count': stats.count},
+            )
+        for statement, count in stats.repeated(
+            settings.SQL_N_PLUS_ONE_THRESHOLD
+        ):
+            logger.warning(
+                'Possible N+1: statement ran %d times for %s %s: %s',
+                count,
+                scope['method'],
+                scope['path'],
+                statement,
+            )
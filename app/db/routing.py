@@ -0,0 +1,71 @@
+"""Read/write routing for ORM sessions.
+
+`RoutingSession` sends plain SELECTs to a read-only engine (a replica, or a
+``mode=ro`` connection to the same SQLite file) and everything else to the
+primary. Once a session has written, or `use_primary` was called on it, all
+of its statements go to the primary so it reads its own writes.
+
+Services that read in order to decide a write (duplicate checks, stock
+and limit checks, a login that may rehash) call `use_primary` before the
+first read: a lagging reader would check against stale rows.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Optional
+
+from sqlalchemy import URL, event, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import Session
+
+_PRIMARY = 'read_from_primary'
+
+
+def read_only_url(url: str) -> str:
+    """URL of a read-only connection to the SQLite file behind `url`."""
+    parsed: URL = make_url(url)
+    database = parsed.database
+    if parsed.get_backend_name() != 'sqlite' or database in {
+        None,
+        '',
+        ':memory:',
+    }:
+        raise ValueError(f'No read-only SQLite file for {url!r}')
+    if not database.startswith('file:'):
+        database = f'file:{database}'
+    query = {**parsed.query, 'mode': 'ro', 'uri': 'true'}
+    return parsed.set(database=database, query=query).render_as_string(
+        hide_password=False
+    )
+
+
+class RoutingSession(Session):
+    def __init__(
+        self, *args: Any, reader: Optional[AsyncEngine] = None, **kw: Any
+    ) -> None:
+        super().__init__(*args, **kw)
+        self.reader = None if reader is None else reader.sync_engine
+
+    def get_bind(self, mapper=None, *, clause=None, **kw):
+        if (
+            self.reader is not None
+            and not self.info.get(_PRIMARY)
+            and clause is not None
+            and clause.is_select
+            and getattr(clause, '_for_update_arg', None) is None
+        ):
+            return self.reader
+        if clause is not None and clause.is_dml:
+            self.info[_PRIMARY] = True
+        return super().get_bind(mapper, clause=clause, **kw)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _after_flush(session, flush_context):
+    session.info[_PRIMARY] = True
+
+
+def use_primary(session: AsyncSession) -> AsyncSession:
+    """Route every further statement of `session` to the primary."""
+    session.info[_PRIMARY] = True
+    return session
@@ -0,0 +1,51 @@
+"""One-shot database setup: apply migrations and load fixtures.
+
+Run once per deploy (or whenever the schema changes), before starting the
+API processes, which only check the schema version on boot::
+
+    python -m app.db.setup [--no-dev-admin]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+from app.core.logging_config import logger
+from app.db.database import engine as default_engine
+from app.db.fixtures import create_dev_admin
+from app.db.migrations import migrate
+
+
+async def setup_database(
+    engine_override: Optional[AsyncEngine] = None, dev_admin: bool = True
+) -> list[int]:
+    """Migrate the schema and, in development, ensure the admin user."""
+    applied = await migrate(engine_override or default_engine)
+    if (
+        dev_admin
+        and settings.APP_ENV == 'development'
+        and settings.CREATE_DEV_ADMIN
+    ):
+        await create_dev_admin(engine_override)
+    return applied
+
+
+async def main(dev_admin: bool) -> None:
+    applied = await setup_database(dev_admin=dev_admin)
+    logger.info(
+        'Database ready; applied migrations: %s',
+        ', '.join(map(str, applied)) or 'none',
+    )
+    await default_engine.dispose()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--no-dev-admin', action='store_true')
+    args = parser.parse_args()
+    asyncio.run(main(dev_admin=not args.no_dev_admin))
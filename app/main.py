@@ -1,8 +1,15 @@
-from contextlib import asynccontextmanager
+import asyncio
+import logging
+import random
+import string
+import time
+import uuid
+from contextlib import asynccontextmanager, suppress
 
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
+from starlette.status import HTTP_400_BAD_REQUEST
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.api.v1.routers.auth import router as auth
 from app.api.v1.routers.books import router as books
@@ -10,39 +17,164 @@ from app.api.v1.routers.lendings import router as lendings
 from app.api.v1.routers.users import router as users
 from app.core.config import settings
 from app.core.exceptions import BaseServiceException
-from app.core.logging_config import logger
+from app.core.logging_config import logger, request_id_var
+from app.core.metrics import (
+    CONTENT_TYPE,
+    REGISTRY,
+    CallbackGauge,
+    MetricsMiddleware,
+)
+from app.core.rate_limit_storage import create_storage, sweep_periodically
 from app.core.rate_limiter import RateLimiterMiddleware
-from app.db.database import create_db_and_tables
-from app.db.fixtures import create_dev_admin
+from app.core.security import shutdown_hash_executors
+from app.db.database import engine, pool_stats
+from app.db.migrations import SchemaOutdated, check_schema
+from app.db.query_stats import QueryStatsMiddleware
+from app.db.setup import setup_database
+
+_MAX_REQUEST_ID = 128
+_REQUEST_ID_CHARS = frozenset(
+    (string.ascii_letters + string.digits + '-_.').encode()
+)
+
+rate_limit_storage = create_storage(
+    settings.RATE_LIMIT_STORAGE_URL,
+    settings.RATE_LIMIT_MAX_ENTRIES,
+    settings.RATE_LIMIT_SWEEP_BATCH,
+)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info('STARTING WEB LIBRARY API...')
-    await create_db_and_tables()
-    if settings.APP_ENV == 'development' and settings.CREATE_DEV_ADMIN:
-        await create_dev_admin()
+    try:
+        await check_schema(engine)
+    except SchemaOutdated:
+        # Development databases are set up on the fly; elsewhere run
+        # `python -m app.db.setup` once before starting the workers.
+        if settings.APP_ENV != 'development':
+            raise
+        await setup_database()
+    sweeper = asyncio.create_task(
+        sweep_periodically(
+            rate_limit_storage, settings.RATE_LIMIT_SWEEP_INTERVAL
+        )
+    )
     yield
+    sweeper.cancel()
+    with suppress(asyncio.CancelledError):
+        await sweeper
+    await rate_limit_storage.close()
+    shutdown_hash_executors()
+
+
+class LoggingMiddleware:
+    """Pure ASGI access logging and request correlation middleware.
+
+    Each request gets an ID (a well-formed incoming ``X-Request-ID`` header or
+    a fresh one) that tags every log record emitted while handling it and is
+    echoed back in the response. Successful responses are logged for a
+    ``Config.LOG_SUCCESS_SAMPLE_RATE`` fraction of requests; errors always.
+    """
+
+    def __init__(self, app: ASGIApp, sample_rate: float | None = None):
+        self.app = app
+        self.sample_rate = (
+            settings.LOG_SUCCESS_SAMPLE_RATE
+            if sample_rate is None
+            else sample_rate
+        )
 
+    @staticmethod
+    def _request_id(scope: Scope) -> str:
+        for name, value in scope.get('headers', ()):
+            if name == b'x-request-id':
+                if 0 < len(value) <= _MAX_REQUEST_ID and (
+                    _REQUEST_ID_CHARS.issuperset(value)
+                ):
+                    return value.decode('ascii')
+                break
+        return uuid.uuid4().hex
 
-class LoggingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request, call_next):
-        logger.info(f'REQUEST: {request.method} {request.url}')
-        response = await call_next(request)
-        logger.info(f'RESPONSE: {response.status_code} {request.url}')
-        return response
+    async def __call__(
+        self, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        request_id = self._request_id(scope)
+        context_token = request_id_var.set(request_id)
+        start = time.perf_counter()
+        status_code = 500
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('REQUEST: %s %s', scope['method'], scope['path'])
+
+        async def send_with_request_id(message: Message) -> None:
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+                message['headers'] = [
+                    *message.get('headers', ()),
+                    (b'x-request-id', request_id.encode('ascii')),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            sampled = (
+                status_code >= HTTP_400_BAD_REQUEST
+                or random.random() < self.sample_rate
+            )
+            if sampled and logger.isEnabledFor(logging.INFO):
+                duration_ms = (time.perf_counter() - start) * 1000
+                logger.info(
+                    'RESPONSE: %s %s %s %.1fms',
+                    status_code,
+                    scope['method'],
+                    scope['path'],
+                    duration_ms,
+                    extra={
+                        'method': scope['method'],
+                        'path': scope['path'],
+                        'status': status_code,
+                        'duration_ms': round(duration_ms, 3),
+                    },
+                )
+            request_id_var.reset(context_token)
 
 
 app = FastAPI(lifespan=lifespan)
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(RateLimiterMiddleware, storage=rate_limit_storage)
 app.add_middleware(LoggingMiddleware)
-app.add_middleware(RateLimiterMiddleware)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+REGISTRY.register(
+    CallbackGauge(
+        'rate_limit_keys',
+        'Rate limiter key table gauges (size, evictions, expirations).',
+        ('stat',),
+        lambda: {(k,): v for k, v in rate_limit_storage.stats().items()},
+    )
+)
+REGISTRY.register(
+    CallbackGauge(
+        'db_pool_connections',
+        'Database connection pool gauges.',
+        ('stat',),
+        lambda: {(k,): v for k, v in pool_stats().items()},
+    )
+)
 
 
 @app.exception_handler(BaseServiceException)
 async def service_exception_handler(
     request: Request, exc: BaseServiceException
 ):
-    logger.error(f'ServiceException: {exc.detail}')
+    logger.error('ServiceException: %s', exc.detail)
     return JSONResponse(status_code=exc.code, content={'detail': exc.detail})
 
 
@@ -55,3 +187,8 @@ app.include_router(lendings)
 @app.get('/health')
 def health():
     return {'status': 'ok'}
+
+
+@app.get('/metrics', include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
@@ -3,6 +3,15 @@
 from .base import Base, TimeStampMixin
 from .book import Book
 from .lending import Lending
+from .row_count import RowCount
 from .user import Role, User
 
-__all__ = ['Base', 'TimeStampMixin', 'User', 'Role', 'Book', 'Lending']
+__all__ = [
+    'Base',
+    'TimeStampMixin',
+    'User',
+    'Role',
+    'Book',
+    'Lending',
+    'RowCount',
+]
@@ -4,8 +4,9 @@ from enum import StrEnum
 from typing import Optional
 
 from sqlalchemy import Enum as SAEnum
-from sqlalchemy import Integer, String
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import Index, Integer, String, text
+from sqlalchemy.engine.default import DefaultExecutionContext
+from sqlalchemy.orm import Mapped, mapped_column, validates
 
 from .base import Base, TimeStampMixin
 
@@ -17,14 +18,54 @@ class BookCategoryEnum(StrEnum):
     OTHER = 'other'
 
 
+def title_key(name: str, author: Optional[str]) -> str:
+    """Case- and whitespace-folded ``(name, author)`` identity of a book."""
+
+    def fold(value: Optional[str]) -> str:
+        return ' '.join((value or '').casefold().split())
+
+    return f'{fold(name)}\x1f{fold(author)}'
+
+
+def _title_key_default(context: DefaultExecutionContext) -> str:
+    # Fills the key for Core inserts (bulk imports) that do not set it.
+    params = context.get_current_parameters()
+    return title_key(params['name'], params.get('author'))
+
+
 class Book(Base, TimeStampMixin):
     """SQLAlchemy model for books."""
 
     __tablename__ = 'books'
+    # Keep in sync with app/db/migrations.py, which adds these to existing
+    # databases.
+    __table_args__ = (
+        Index('ix_books_name_author', 'name', 'author'),
+        Index('ux_books_title_key', 'title_key', unique=True),
+        Index('ix_books_category_name', 'category', 'name'),
+        Index(
+            'ix_books_available_category',
+            'category',
+            sqlite_where=text('available_copies > 0'),
+        ),
+        Index('ix_books_author_nocase', text('author COLLATE NOCASE')),
+        Index('ix_books_created_at', 'created_at'),
+        Index('ix_books_name', 'name'),
+        Index('ix_books_category', 'category'),
+        Index(
+            'ix_books_available',
+            'id',
+            sqlite_where=text('available_copies > 0'),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     name: Mapped[str] = mapped_column(String(255), nullable=False)
     author: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    # Unique: one row per title, whatever the casing or spacing.
+    title_key: Mapped[str] = mapped_column(
+        String(511), nullable=False, default=_title_key_default
+    )
     total_copies: Mapped[int] = mapped_column(
         Integer, nullable=False, default=1
     )
@@ -50,6 +91,14 @@ class Book(Base, TimeStampMixin):
         if getattr(self, 'available_copies', None) is None:
             self.available_copies = self.total_copies
 
+    @validates('name', 'author')
+    def _refresh_title_key(self, field: str, value: Optional[str]):
+        name = value if field == 'name' else self.name
+        author = value if field == 'author' else self.author
+        if name is not None:
+            self.title_key = title_key(name, author)
+        return value
+
     def lending(self, qty: int = 1) -> None:
         if qty <= 0:
             raise ValueError('qty must be positive')
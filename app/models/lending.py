@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import DateTime, ForeignKey, Integer, func
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, func, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .base import Base, TimeStampMixin
@@ -18,6 +18,19 @@ class Lending(Base, TimeStampMixin):
     """
 
     __tablename__ = 'lendings'
+    # Keep in sync with app/db/migrations.py, which adds these to existing
+    # databases.
+    __table_args__ = (
+        Index('ix_lendings_user_id', 'user_id'),
+        Index('ix_lendings_book_id', 'book_id'),
+        Index('ix_lendings_returned_at', 'returned_at'),
+        Index(
+            'ix_lendings_active_user_book',
+            'user_id',
+            'book_id',
+            sqlite_where=text('returned_at IS NULL'),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     user_id: Mapped[int] = mapped_column(
@@ -34,27 +47,11 @@ class Lending(Base, TimeStampMixin):
         DateTime(timezone=True), nullable=True
     )
 
-    user: Mapped['User'] = relationship('User', lazy='joined')
-    book: Mapped['Book'] = relationship('Book', lazy='joined')
-
-    def apply(self) -> None:
-        if self.quantity <= 0:
-            raise ValueError('qty must be positive')
-        if self.book is None:
-            raise ValueError('lending has no associated book instance')
-        if self.book.available_copies < self.quantity:
-            raise ValueError('not enough copies available to lend')
-        self.book.available_copies -= self.quantity
-
-    def mark_returned(self) -> None:
-        if self.returned_at is not None:
-            raise ValueError('already returned')
-        if self.book is None:
-            raise ValueError('lending has no associated book instance')
-        if self.book.available_copies + self.quantity > self.book.total_copies:
-            raise ValueError('return would exceed total copies')
-        self.book.available_copies += self.quantity
-        self.returned_at = datetime.utcnow()
+    # Not loaded unless a query asks for them (joinedload/selectinload):
+    # reads that only need lending columns skip the joins, and a forgotten
+    # eager load raises instead of emitting SQL from attribute access.
+    user: Mapped['User'] = relationship('User', lazy='raise_on_sql')
+    book: Mapped['Book'] = relationship('Book', lazy='raise_on_sql')
 
     @property
     def is_active(self) -> bool:
@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+from sqlalchemy import Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class RowCount(Base):
+    """Running row totals for list endpoints.
+
+    Maintained by triggers (migration 3) in the same transaction as the
+    insert, return or delete they count, so reading a total is a primary
+    key lookup instead of a ``count(*)`` scan.
+    """
+
+    __tablename__ = 'row_counts'
+
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    total: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
@@ -3,10 +3,16 @@ from __future__ import annotations
 from enum import StrEnum
 
 from sqlalchemy import Enum as SAEnum
-from sqlalchemy import Integer, String
+from sqlalchemy import Index, Integer, String
 from sqlalchemy.orm import Mapped, mapped_column
 
-from app.core.security import hash_password, verify_password
+from app.core.security import (
+    hash_password,
+    hash_password_async,
+    needs_rehash,
+    verify_password,
+    verify_password_async,
+)
 
 from .base import Base, TimeStampMixin
 
@@ -21,6 +27,7 @@ class User(Base, TimeStampMixin):
     """SQLAlchemy model for users."""
 
     __tablename__ = 'users'
+    __table_args__ = (Index('ix_users_name', 'name'),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     name: Mapped[str] = mapped_column(String(255), nullable=False)
@@ -40,6 +47,15 @@ class User(Base, TimeStampMixin):
     def check_password(self, password: str) -> bool:
         return verify_password(self.password, password)
 
+    async def set_password_async(self, password: str) -> None:
+        self.password = await hash_password_async(password)
+
+    async def check_password_async(self, password: str) -> bool:
+        return await verify_password_async(self.password, password)
+
+    def password_needs_rehash(self) -> bool:
+        return needs_rehash(self.password)
+
     def __repr__(self) -> str:  # pragma: no cover - simple repr
         return (
             f'<User id={self.id!r} '
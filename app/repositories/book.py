@@ -1,11 +1,96 @@
 from __future__ import annotations
 
-from typing import Optional, Sequence
+import re
+from dataclasses import dataclass, replace
+from datetime import datetime, timezone
+from typing import Any, Iterable, Optional, Sequence
 
-from sqlalchemy import func, select
+from sqlalchemy import (
+    Float,
+    Select,
+    bindparam,
+    case,
+    column,
+    func,
+    insert,
+    literal_column,
+    or_,
+    select,
+    table,
+    text,
+    update,
+)
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.book import Book
+from app.models.book import Book, BookCategoryEnum
+from app.repositories.pagination import (
+    KeysetOrder,
+    keyset_page,
+    windowed_page,
+)
+from app.repositories.row_count import RowCountRepository
+
+BY_ID = KeysetOrder('id', (Book.id,))
+# Sort keys accepted by GET /books/. A single-column SQLite index ends in
+# the rowid, so ix_books_name and ix_books_created_at walk the (key, id)
+# keysets in order without a sort step.
+BOOK_ORDERS = {
+    'id': BY_ID,
+    'name': KeysetOrder('name', (Book.name, Book.id)),
+    'newest': KeysetOrder(
+        'newest', (Book.created_at, Book.id), descending=True
+    ),
+}
+
+# External-content FTS5 index over books.name/author (migration 5). Its
+# hidden `rank` column is the bm25 score: lower is more relevant.
+books_fts = table('books_fts', column('rowid'), column('rank', Float))
+SEARCH_TERM = re.compile(r'\w+')
+
+
+@dataclass(frozen=True)
+class BookQuery:
+    """Filters and sort for book listings; `sort` is a key of
+    `BOOK_ORDERS`. A single filter, the category+name and
+    category+available pairs, and created_after with the newest sort walk
+    an index in keyset order (see ``Book.__table_args__``); other
+    combinations filter through one index and sort the matches."""
+
+    category: Optional[BookCategoryEnum] = None
+    author: Optional[str] = None
+    available_only: bool = False
+    created_after: Optional[datetime] = None
+    sort: str = 'id'
+
+    @property
+    def order(self) -> KeysetOrder:
+        return BOOK_ORDERS[self.sort]
+
+    @property
+    def filtered(self) -> bool:
+        return replace(self, sort='id') != BookQuery()
+
+    def apply(self, stmt: Select) -> Select:
+        if self.category is not None:
+            stmt = stmt.where(Book.category == self.category)
+        if self.author is not None:
+            stmt = stmt.where(Book.author.collate('NOCASE') == self.author)
+        if self.available_only:
+            # Inline literal: SQLite only uses the partial indexes
+            # ix_books_available(_category) when the condition matches
+            # their WHERE clause verbatim, not through a bound parameter.
+            stmt = stmt.where(Book.available_copies > literal_column('0'))
+        if self.created_after is not None:
+            stmt = stmt.where(Book.created_at > _utc(self.created_after))
+        return stmt
+
+
+def _utc(value: datetime) -> datetime:
+    # created_at is stored as naive UTC (CURRENT_TIMESTAMP).
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
 
 
 class BookRepository:
@@ -13,22 +98,154 @@ class BookRepository:
         self.session = session
 
     async def list_books(
-        self, limit: int = 10, offset: int = 0
-    ) -> tuple[Sequence[Book], int]:
-        stmt = select(Book).limit(limit).offset(offset)
-        result = await self.session.execute(stmt)
+        self,
+        limit: int = 10,
+        offset: int = 0,
+        total_mode: Optional[str] = 'counter',
+        query: BookQuery = BookQuery(),
+    ) -> tuple[Sequence[Book], Optional[int]]:
+        """One offset page of books and, unless `total_mode` is None, the
+        number matching `query`: from the row counter ('counter') or in
+        the same statement ('window', see `windowed_page`)."""
+        order = query.order
+        stmt = query.apply(select(Book)).order_by(
+            *(key.desc() if order.descending else key for key in order.keys)
+        )
+        if total_mode == 'window':
+            return await windowed_page(self.session, stmt, limit, offset)
+        result = await self.session.execute(stmt.limit(limit).offset(offset))
         items = result.scalars().all()
-
-        count_stmt = select(func.count()).select_from(Book)
-        count_result = await self.session.execute(count_stmt)
-        total = count_result.scalar_one()
+        total = await self.count_books(query) if total_mode else None
         return items, total
 
+    async def count_books(self, query: BookQuery = BookQuery()) -> int:
+        if not query.filtered:
+            return await RowCountRepository(self.session).total(
+                'books', select(Book.id)
+            )
+        stmt = query.apply(select(func.count()).select_from(Book))
+        result = await self.session.execute(stmt)
+        return result.scalar_one()
+
+    async def list_books_keyset(
+        self,
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        query: BookQuery = BookQuery(),
+    ) -> tuple[Sequence[Book], Optional[str]]:
+        return await keyset_page(
+            self.session, query.apply(select(Book)), query.order, limit, cursor
+        )
+
+    async def search_books(
+        self, query: str, limit: int = 10, cursor: Optional[str] = None
+    ) -> tuple[Sequence[Book], Optional[str]]:
+        """Books whose name or author contain every word of `query` (the
+        last one as a prefix), most relevant first; `LIKE` substring
+        matching by id when the database has no full-text index."""
+        terms = SEARCH_TERM.findall(query)
+        if not terms:
+            return [], None
+        try:
+            return await self._search_fts(terms, limit, cursor)
+        except OperationalError as exc:
+            if 'books_fts' not in str(exc.orig):
+                raise
+        return await self._search_like(terms, limit, cursor)
+
+    async def _search_fts(
+        self, terms: list[str], limit: int, cursor: Optional[str]
+    ) -> tuple[Sequence[Book], Optional[str]]:
+        # Whole words, except the last one, which may still be being typed.
+        match = ' '.join(f'"{term}"' for term in terms) + '*'
+        matches = (
+            select(books_fts.c.rowid.label('book_id'), books_fts.c.rank)
+            .where(text('books_fts MATCH :match').bindparams(match=match))
+            .subquery()
+        )
+        stmt = select(Book, matches.c.rank).join(
+            matches, matches.c.book_id == Book.id
+        )
+        order = KeysetOrder('relevance', (matches.c.rank, Book.id))
+        return await keyset_page(self.session, stmt, order, limit, cursor)
+
+    async def _search_like(
+        self, terms: list[str], limit: int, cursor: Optional[str]
+    ) -> tuple[Sequence[Book], Optional[str]]:
+        stmt = select(Book)
+        for term in terms:
+            pattern = '%' + term.replace('_', '\\_') + '%'
+            stmt = stmt.where(
+                or_(
+                    Book.name.ilike(pattern, escape='\\'),
+                    Book.author.ilike(pattern, escape='\\'),
+                )
+            )
+        return await keyset_page(self.session, stmt, BY_ID, limit, cursor)
+
     async def create_book(self, book: Book) -> Book:
         self.session.add(book)
         await self.session.flush()
         return book
 
+    async def existing_title_keys(self, keys: Iterable[str]) -> dict[str, int]:
+        """Ids of the books whose title key is in `keys`, in one query."""
+        stmt = select(Book.title_key, Book.id).where(
+            Book.title_key.in_(list(keys))
+        )
+        result = await self.session.execute(stmt)
+        return dict(result.tuples().all())
+
+    async def insert_books(self, rows: Sequence[dict[str, Any]]) -> None:
+        """Insert many books with a single executemany statement."""
+        if rows:
+            await self.session.execute(insert(Book), rows)
+
+    async def add_copies(self, copies: dict[int, int]) -> None:
+        """Add copies to many books (id -> quantity) with one executemany,
+        increasing total and available copies as `Book.add_copies` does."""
+        if not copies:
+            return
+        books = Book.__table__
+        stmt = (
+            update(books)
+            .where(books.c.id == bindparam('book_id'))
+            .values(
+                total_copies=books.c.total_copies + bindparam('qty'),
+                available_copies=books.c.available_copies + bindparam('qty'),
+            )
+        )
+        params = [{'book_id': id_, 'qty': qty} for id_, qty in copies.items()]
+        await self.session.execute(stmt, params)
+
+    async def take_copies(self, book_ids: Iterable[int]) -> set[int]:
+        """Take one available copy of each book, in one statement, and
+        return the ids of the books that had one. The decrement is guarded
+        in SQL, so concurrent checkouts can never oversell a book."""
+        stmt = (
+            update(Book)
+            .where(Book.id.in_(set(book_ids)), Book.available_copies > 0)
+            .values(available_copies=Book.available_copies - 1)
+            .returning(Book.id)
+        )
+        result = await self.session.execute(stmt)
+        return set(result.scalars().all())
+
+    async def put_back_copies(self, copies: dict[int, int]) -> None:
+        """Put copies back on the shelf (id -> quantity) with one relative
+        update, so it composes with concurrent checkouts and returns."""
+        if not copies:
+            return
+        stmt = (
+            update(Book)
+            .where(Book.id.in_(list(copies)))
+            .values(
+                available_copies=Book.available_copies
+                + case(copies, value=Book.id)
+            )
+        )
+        await self.session.execute(stmt)
+
     async def get_by_id(self, book_id: int) -> Optional[Book]:
         stmt = select(Book).where(Book.id == book_id)
         result = await self.session.execute(stmt)
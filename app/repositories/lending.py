@@ -1,11 +1,20 @@
 from __future__ import annotations
 
-from typing import Optional, Sequence
+from datetime import datetime
+from typing import Any, Iterable, Optional, Sequence
 
-from sqlalchemy import and_, func, select
+from sqlalchemy import func, insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.lending import Lending
+from app.repositories.pagination import (
+    KeysetOrder,
+    keyset_page,
+    windowed_page,
+)
+from app.repositories.row_count import RowCountRepository
+
+BY_ID = KeysetOrder('id', (Lending.id,))
 
 
 class LendingRepository:
@@ -17,58 +26,85 @@ class LendingRepository:
         await self.session.flush()
         return lending
 
-    async def get_active_lendings_by_user(
-        self, user_id: int
+    async def insert_lendings(
+        self, rows: Sequence[dict[str, Any]]
     ) -> Sequence[Lending]:
-        stmt = select(Lending).where(
-            and_(
-                Lending.user_id == user_id,
-                Lending.returned_at == None,  # noqa: E711
-            )
+        """Insert many lendings with a single statement. The rows come back
+        in no particular order."""
+        result = await self.session.scalars(
+            insert(Lending).returning(Lending), rows
+        )
+        return result.all()
+
+    async def active_book_ids(self, user_id: int) -> list[int]:
+        """The books the user has on loan, one entry per active lending."""
+        stmt = select(Lending.book_id).where(
+            Lending.user_id == user_id,
+            Lending.returned_at == None,  # noqa: E711
         )
         result = await self.session.execute(stmt)
-        return result.scalars().all()
+        return list(result.scalars().all())
 
-    async def get_lending_by_user_and_book(
-        self, user_id: int, book_id: int
-    ) -> Optional[Lending]:
-        stmt = select(Lending).where(
-            and_(
-                Lending.user_id == user_id,
-                Lending.book_id == book_id,
+    async def close_lendings(
+        self, lending_ids: Iterable[int], returned_at: datetime
+    ) -> set[int]:
+        """Mark the still open lendings among `lending_ids` returned, in one
+        statement, and return their ids. A lending closed concurrently is
+        left out, so its copy can't be put back twice."""
+        stmt = (
+            update(Lending)
+            .where(
+                Lending.id.in_(list(lending_ids)),
                 Lending.returned_at == None,  # noqa: E711
             )
+            .values(returned_at=returned_at)
+            .returning(Lending.id)
         )
         result = await self.session.execute(stmt)
-        return result.scalars().first()
+        return set(result.scalars().all())
 
     async def get_lending_by_id(self, lending_id: int) -> Optional[Lending]:
         stmt = select(Lending).where(Lending.id == lending_id)
         result = await self.session.execute(stmt)
         return result.scalars().first()
 
+    async def get_lendings_by_ids(
+        self, lending_ids: Iterable[int]
+    ) -> dict[int, Lending]:
+        """Lendings by id, in one query."""
+        stmt = select(Lending).where(Lending.id.in_(list(lending_ids)))
+        result = await self.session.execute(stmt)
+        return {lending.id: lending for lending in result.scalars()}
+
     async def list_active_lendings(
-        self, limit: int = 10, offset: int = 0
-    ) -> tuple[Sequence[Lending], int]:
-        stmt = (
-            select(Lending)
-            .where(Lending.returned_at == None)  # noqa: E711
-            .limit(limit)
-            .offset(offset)
+        self,
+        limit: int = 10,
+        offset: int = 0,
+        total_mode: Optional[str] = 'counter',
+    ) -> tuple[Sequence[Lending], Optional[int]]:
+        active = select(Lending).where(
+            Lending.returned_at == None  # noqa: E711
         )
+        if total_mode == 'window':
+            return await windowed_page(self.session, active, limit, offset)
+        stmt = active.limit(limit).offset(offset)
         result = await self.session.execute(stmt)
         items = result.scalars().all()
+        total = await self.count_active_lendings() if total_mode else None
+        return items, total
 
-        count_stmt = (
-            select(func.count())
-            .select_from(Lending)
-            .where(
+    async def count_active_lendings(self) -> int:
+        return await RowCountRepository(self.session).total(
+            'active_lendings',
+            select(Lending.id).where(
                 Lending.returned_at == None  # noqa: E711
-            )
+            ),
         )
-        count_result = await self.session.execute(count_stmt)
-        total = count_result.scalar_one()
-        return items, total
+
+    async def count_user_lendings(self, user_id: int) -> int:
+        stmt = select(func.count()).where(Lending.user_id == user_id)
+        result = await self.session.execute(stmt)
+        return result.scalar_one()
 
     async def user_lending_history(
         self, user_id: int, limit: int = 10, offset: int = 0
@@ -81,3 +117,17 @@ class LendingRepository:
         )
         result = await self.session.execute(stmt)
         return result.scalars().all()
+
+    async def list_active_lendings_keyset(
+        self, limit: int = 10, cursor: Optional[str] = None
+    ) -> tuple[Sequence[Lending], Optional[str]]:
+        stmt = select(Lending).where(
+            Lending.returned_at == None  # noqa: E711
+        )
+        return await keyset_page(self.session, stmt, BY_ID, limit, cursor)
+
+    async def user_lending_history_keyset(
+        self, user_id: int, limit: int = 10, cursor: Optional[str] = None
+    ) -> tuple[Sequence[Lending], Optional[str]]:
+        stmt = select(Lending).where(Lending.user_id == user_id)
+        return await keyset_page(self.session, stmt, BY_ID, limit, cursor)
@@ -0,0 +1,140 @@
+"""Pagination helpers for repositories.
+
+Pages are ordered by a sort key plus the primary key as tie-breaker, and
+the next page starts strictly after the last row seen, so deep pages cost
+the same as the first one and concurrent inserts do not shift them.
+Cursors are opaque to clients: URL-safe base64 of the sort name and the
+last row's key values. `windowed_page` serves offset pages together with
+their total in a single statement.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Optional, Sequence
+
+from sqlalchemy import ColumnElement, Row, Select, func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+
+from app.core.exceptions import InvalidCursor
+
+
+@dataclass(frozen=True)
+class KeysetOrder:
+    """A named page order: sort key columns ending with the primary key,
+    all ascending or all descending. Keys that are not attributes of the
+    selected entity (e.g. a search rank) must be selected as extra
+    columns under the same name."""
+
+    name: str
+    keys: tuple[InstrumentedAttribute | ColumnElement, ...]
+    descending: bool = False
+
+
+def _jsonable(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def encode_cursor(sort: str, values: Sequence[Any]) -> str:
+    payload = json.dumps(
+        {'s': sort, 'k': [_jsonable(v) for v in values]},
+        separators=(',', ':'),
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, order: KeysetOrder) -> list[Any]:
+    """Key values stored in `cursor`, converted to the keys' types."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded))
+        values = payload['k']
+        if payload['s'] != order.name or len(values) != len(order.keys):
+            raise InvalidCursor()
+        return [
+            _decode_value(key.type.python_type, value)
+            for key, value in zip(order.keys, values)
+        ]
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise InvalidCursor() from None
+
+
+def _decode_value(python_type: type, value: Any) -> Any:
+    # Keys are never NULL (sort columns are NOT NULL); anything that is not
+    # of the column's type would fail in the driver, not as a bad cursor.
+    if python_type is datetime and isinstance(value, str):
+        return datetime.fromisoformat(value)
+    if python_type is float and type(value) is int:
+        return float(value)
+    if isinstance(value, bool) or not isinstance(value, python_type):
+        raise InvalidCursor()
+    return value
+
+
+async def keyset_page(
+    session: AsyncSession,
+    stmt: Select,
+    order: KeysetOrder,
+    limit: int,
+    cursor: Optional[str] = None,
+) -> tuple[Sequence[Any], Optional[str]]:
+    """Run `stmt` as one keyset page in `order`.
+
+    Returns the rows and the cursor of the next page, or None on the last
+    page. An empty `cursor` asks for the first page.
+    """
+    keys = order.keys
+    if cursor:
+        after = decode_cursor(cursor, order)
+        row = keys[0] if len(keys) == 1 else tuple_(*keys)
+        bound = after[0] if len(keys) == 1 else tuple_(*after)
+        stmt = stmt.where(row < bound if order.descending else row > bound)
+    stmt = stmt.order_by(
+        *(key.desc() for key in keys) if order.descending else keys
+    ).limit(limit + 1)
+    result = await session.execute(stmt)
+    rows = result.all()
+    items = [row[0] for row in rows[:limit]]
+    if len(rows) <= limit:
+        return items, None
+    return items, encode_cursor(
+        order.name, [_key_value(rows[limit - 1], key) for key in keys]
+    )
+
+
+def _key_value(row: Row, key: InstrumentedAttribute | ColumnElement) -> Any:
+    if key.key in row._fields:
+        return getattr(row, key.key)
+    return getattr(row[0], key.key)
+
+
+async def windowed_page(
+    session: AsyncSession, stmt: Select, limit: int, offset: int
+) -> tuple[Sequence[Any], int]:
+    """One LIMIT/OFFSET page of `stmt` and the number of rows it matches.
+
+    The total rides along on every row as ``count(*) OVER ()``, computed
+    before LIMIT applies, so a non-empty page costs one round trip. An
+    empty page carries no total: at offset 0 it is 0, past the end it is
+    counted separately.
+    """
+    windowed = (
+        stmt
+        .add_columns(func.count().over().label('window_total'))
+        .limit(limit)
+        .offset(offset)
+    )
+    result = await session.execute(windowed)
+    rows = result.all()
+    if rows:
+        return [row[0] for row in rows], rows[0].window_total
+    if offset == 0:
+        return [], 0
+    count = select(func.count()).select_from(stmt.subquery())
+    result = await session.execute(count)
+    return [], result.scalar_one()
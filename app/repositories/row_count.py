@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+from typing import Optional
+
+from sqlalchemy import Select, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.row_count import RowCount
+
+
+class RowCountRepository:
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+
+    async def get(self, name: str) -> Optional[int]:
+        stmt = select(RowCount.total).where(RowCount.name == name)
+        result = await self.session.execute(stmt)
+        return result.scalar_one_or_none()
+
+    async def total(self, name: str, fallback: Select) -> int:
+        """Counter `name`, or `fallback` counted when it is not tracked."""
+        value = await self.get(name)
+        if value is not None:
+            return value
+        stmt = select(func.count()).select_from(fallback.subquery())
+        result = await self.session.execute(stmt)
+        return result.scalar_one()
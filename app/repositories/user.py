@@ -1,12 +1,20 @@
 from __future__ import annotations
 
-from typing import Optional, Sequence
+from typing import Any, Iterable, Optional, Sequence
 
-from sqlalchemy import func, select
+from sqlalchemy import insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.lending import Lending
 from app.models.user import User
+from app.repositories.pagination import (
+    KeysetOrder,
+    keyset_page,
+    windowed_page,
+)
+from app.repositories.row_count import RowCountRepository
+
+BY_ID = KeysetOrder('id', (User.id,))
 
 
 class UserRepository:
@@ -14,22 +22,49 @@ class UserRepository:
         self.session = session
 
     async def list_users(
-        self, limit: int = 100, offset: int = 0
-    ) -> tuple[Sequence[User], int]:
+        self,
+        limit: int = 100,
+        offset: int = 0,
+        total_mode: Optional[str] = 'counter',
+    ) -> tuple[Sequence[User], Optional[int]]:
+        if total_mode == 'window':
+            return await windowed_page(
+                self.session, select(User), limit, offset
+            )
         stmt = select(User).limit(limit).offset(offset)
         result = await self.session.execute(stmt)
         items = result.scalars().all()
-
-        count_stmt = select(func.count()).select_from(User)
-        count_result = await self.session.execute(count_stmt)
-        total = count_result.scalar_one()
+        total = await self.count_users() if total_mode else None
         return items, total
 
+    async def count_users(self) -> int:
+        return await RowCountRepository(self.session).total(
+            'users', select(User.id)
+        )
+
+    async def list_users_keyset(
+        self, limit: int = 100, cursor: Optional[str] = None
+    ) -> tuple[Sequence[User], Optional[str]]:
+        return await keyset_page(
+            self.session, select(User), BY_ID, limit, cursor
+        )
+
     async def create_user(self, user: User) -> User:
         self.session.add(user)
         await self.session.flush()
         return user
 
+    async def existing_emails(self, emails: Iterable[str]) -> set[str]:
+        """Which of `emails` are already registered, in one query."""
+        stmt = select(User.email).where(User.email.in_(list(emails)))
+        result = await self.session.execute(stmt)
+        return set(result.scalars().all())
+
+    async def insert_users(self, rows: Sequence[dict[str, Any]]) -> None:
+        """Insert many users with a single executemany statement."""
+        if rows:
+            await self.session.execute(insert(User), rows)
+
     async def get_by_id(self, user_id: int) -> Optional[User]:
         stmt = select(User).where(User.id == user_id)
         result = await self.session.execute(stmt)
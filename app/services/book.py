@@ -1,17 +1,29 @@
 from __future__ import annotations
 
-from typing import Sequence
+import time
+from typing import Any, AsyncIterable, Optional, Sequence
 
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.v1.schemas.book import BookAvailability, BookCreate
+from app.core.config import settings
 from app.core.exceptions import (
     BookAlreadyExists,
     BookNotFound,
     InvalidBookData,
 )
-from app.models.book import Book
-from app.repositories.book import BookRepository
+from app.db.routing import use_primary
+from app.models.book import Book, BookCategoryEnum, title_key
+from app.repositories.book import BookQuery, BookRepository
+from app.services.importing import (
+    ImportReport,
+    ImportRow,
+    chunked,
+    retry_on_conflict,
+)
+
+_IMPORT_FIELDS = ('name', 'category')
 
 
 class BookService:
@@ -22,9 +34,36 @@ class BookService:
         self.session = session
 
     async def list_books(
-        self, limit: int = 10, offset: int = 0
-    ) -> tuple[Sequence[Book], int]:
-        return await self.repo.list_books(limit=limit, offset=offset)
+        self,
+        limit: int = 10,
+        offset: int = 0,
+        include_total: bool = True,
+        query: BookQuery = BookQuery(),
+    ) -> tuple[Sequence[Book], Optional[int]]:
+        return await self.repo.list_books(
+            limit=limit,
+            offset=offset,
+            total_mode=settings.LIST_TOTAL_MODE if include_total else None,
+            query=query,
+        )
+
+    async def count_books(self, query: BookQuery = BookQuery()) -> int:
+        return await self.repo.count_books(query)
+
+    async def list_books_keyset(
+        self,
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        query: BookQuery = BookQuery(),
+    ) -> tuple[Sequence[Book], Optional[str]]:
+        return await self.repo.list_books_keyset(
+            limit=limit, cursor=cursor, query=query
+        )
+
+    async def search_books(
+        self, query: str, limit: int = 10, cursor: Optional[str] = None
+    ) -> tuple[Sequence[Book], Optional[str]]:
+        return await self.repo.search_books(query, limit=limit, cursor=cursor)
 
     async def create_book(self, data: BookCreate) -> Book:
         if not data.name or not data.category:
@@ -32,10 +71,6 @@ class BookService:
         if data.total_copies < 1:
             raise InvalidBookData(detail='Total copies must be at least 1')
 
-        books, _ = await self.repo.list_books()
-        for b in books:
-            if b.name == data.name and b.author == data.author:
-                raise BookAlreadyExists()
         book = Book(
             name=data.name,
             author=data.author,
@@ -43,7 +78,15 @@ class BookService:
             available_copies=data.total_copies,
             category=data.category,
         )
-        book = await self.repo.create_book(book)
+        try:
+            # The unique title key index is the duplicate check: one index
+            # probe inside the insert, with no race between check and write.
+            book = await self.repo.create_book(book)
+        except IntegrityError as exc:
+            await self.repo.session.rollback()
+            if 'title_key' in str(exc.orig):
+                raise BookAlreadyExists() from None
+            raise
         if self.session is not None:
             await self.session.commit()
         return book
@@ -57,3 +100,107 @@ class BookService:
             available_copies=book.available_copies,
             is_available=book.available_copies > 0,
         )
+
+    async def import_books(
+        self,
+        rows: AsyncIterable[ImportRow],
+        chunk_size: int | None = None,
+        upsert: bool = False,
+    ) -> ImportReport:
+        """Create books from a stream of rows, one transaction per chunk.
+
+        Each chunk is validated and deduplicated by title key in memory,
+        matched against the catalogue with a single query and inserted with
+        one executemany. With `upsert`, a row for a book that already
+        exists adds its copies to it (as `Book.add_copies`) instead of
+        failing. Rows that fail are reported, not raised.
+        """
+        use_primary(self.repo.session)
+        report = ImportReport()
+        started = time.perf_counter()
+        async for chunk in chunked(
+            rows, chunk_size or settings.IMPORT_CHUNK_SIZE
+        ):
+            candidates: dict[str, tuple[int, dict[str, Any]]] = {}
+            for row in chunk:
+                error = row.error
+                if error is None:
+                    values, error = self._import_values(row.data)
+                if error is None and values['title_key'] in candidates:
+                    if upsert:
+                        _, first = candidates[values['title_key']]
+                        first['total_copies'] += values['total_copies']
+                        report.updated += 1
+                        continue
+                    error = 'Duplicate book in import'
+                if error is not None:
+                    report.fail(row.number, error)
+                    continue
+                candidates[values['title_key']] = (row.number, values)
+            await self._import_chunk(candidates, report, upsert)
+        report.elapsed_seconds = time.perf_counter() - started
+        return report
+
+    @staticmethod
+    def _import_values(
+        data: dict[str, Any],
+    ) -> tuple[dict[str, Any], str | None]:
+        values = {key: str(data.get(key) or '').strip() for key in data}
+        missing = [key for key in _IMPORT_FIELDS if not values.get(key)]
+        if missing:
+            return values, f'Missing field(s): {", ".join(missing)}'
+        try:
+            category = BookCategoryEnum(values['category'].lower())
+        except ValueError:
+            return values, f'Invalid category: {values["category"]}'
+        raw_copies = data.get('total_copies')
+        try:
+            copies = 1 if raw_copies in {None, ''} else int(str(raw_copies))
+        except (TypeError, ValueError):
+            copies = 0
+        if copies < 1:
+            return values, f'Invalid total_copies: {raw_copies}'
+        author = values.get('author') or None
+        return {
+            'name': values['name'],
+            'author': author,
+            'category': category,
+            'total_copies': copies,
+            'title_key': title_key(values['name'], author),
+        }, None
+
+    async def _import_chunk(
+        self,
+        candidates: dict[str, tuple[int, dict[str, Any]]],
+        report: ImportReport,
+        upsert: bool,
+    ) -> None:
+        if not candidates:
+            return
+
+        async def attempt() -> tuple[dict[str, int], int, int]:
+            existing = await self.repo.existing_title_keys(candidates)
+            copies = {
+                existing[key]: values['total_copies']
+                for key, (_, values) in candidates.items()
+                if upsert and key in existing
+            }
+            new = [
+                {**values, 'available_copies': values['total_copies']}
+                for key, (_, values) in candidates.items()
+                if key not in existing
+            ]
+            await self.repo.add_copies(copies)
+            await self.repo.insert_books(new)
+            if self.session is not None:
+                await self.session.commit()
+            return existing, len(new), len(copies)
+
+        existing, created, updated = await retry_on_conflict(
+            self.repo.session, attempt
+        )
+        for key, (number, _) in candidates.items():
+            if key in existing and not upsert:
+                report.fail(number, BookAlreadyExists.detail)
+        report.created += created
+        report.updated += updated
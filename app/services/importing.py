@@ -0,0 +1,180 @@
+"""Streaming row parsing and reporting shared by the bulk import endpoints.
+
+Request bodies are parsed incrementally, one line at a time, so an import
+never holds more than the current chunk of rows in memory. CSV bodies need
+a header line; quoted fields spanning several lines are not supported.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import codecs
+import csv
+import json
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    TypeVar,
+)
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.exceptions import UnsupportedImportFormat
+
+T = TypeVar('T')
+
+CSV = 'csv'
+NDJSON = 'ndjson'
+
+_FORMATS = {
+    'text/csv': CSV,
+    'application/x-ndjson': NDJSON,
+    'application/ndjson': NDJSON,
+    'application/jsonl': NDJSON,
+}
+
+
+@dataclass
+class ImportRow:
+    """One data row; `number` is 1-based and excludes the CSV header."""
+
+    number: int
+    data: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class ImportRowError:
+    row: int
+    detail: str
+
+
+@dataclass
+class ImportReport:
+    created: int = 0
+    # Rows merged into a book that already existed or came earlier in the
+    # import, when duplicates are upserted.
+    updated: int = 0
+    errors: List[ImportRowError] = field(default_factory=list)
+    elapsed_seconds: float = 0.0
+
+    @property
+    def failed(self) -> int:
+        return len(self.errors)
+
+    @property
+    def rows_per_second(self) -> float:
+        rows = self.created + self.updated + self.failed
+        return rows / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    def fail(self, row: int, detail: str) -> None:
+        self.errors.append(ImportRowError(row=row, detail=detail))
+
+
+def import_format(content_type: Optional[str]) -> str:
+    """Map a request ``Content-Type`` to an import format."""
+    media_type = (content_type or '').split(';', 1)[0].strip().lower()
+    try:
+        return _FORMATS[media_type]
+    except KeyError:
+        raise UnsupportedImportFormat() from None
+
+
+async def _lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder('utf-8-sig')()
+    pending = ''
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split('\n')
+        for line in lines:
+            yield line.rstrip('\r')
+    pending += decoder.decode(b'', final=True)
+    if pending:
+        yield pending.rstrip('\r')
+
+
+async def parse_rows(
+    chunks: AsyncIterable[bytes], fmt: str
+) -> AsyncIterator[ImportRow]:
+    """Yield the rows of a CSV or NDJSON byte stream; blank lines are
+    skipped. Malformed rows are yielded with an `error` instead of data."""
+    header: Optional[List[str]] = None
+    number = 0
+    async for line in _lines(chunks):
+        if not line.strip():
+            continue
+        if fmt == CSV:
+            values = next(csv.reader([line]))
+            if header is None:
+                header = [name.strip() for name in values]
+                continue
+            number += 1
+            if len(values) != len(header):
+                yield ImportRow(
+                    number,
+                    error=f'Expected {len(header)} columns, got {len(values)}',
+                )
+            else:
+                yield ImportRow(number, data=dict(zip(header, values)))
+            continue
+
+        number += 1
+        try:
+            data = json.loads(line)
+        except ValueError:
+            yield ImportRow(number, error='Invalid JSON')
+            continue
+        if not isinstance(data, dict):
+            yield ImportRow(number, error='Expected a JSON object')
+        else:
+            yield ImportRow(number, data=data)
+
+
+async def file_chunks(
+    path: str, size: int = 64 * 1024
+) -> AsyncIterator[bytes]:
+    """Stream a file as byte chunks, reading off the event loop."""
+    with open(path, 'rb') as file:
+        while chunk := await asyncio.to_thread(file.read, size):
+            yield chunk
+
+
+async def chunked(
+    rows: AsyncIterable[ImportRow], size: int
+) -> AsyncIterator[List[ImportRow]]:
+    chunk: List[ImportRow] = []
+    async for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+async def retry_on_conflict(
+    session: AsyncSession, attempt: Callable[[], Awaitable[T]]
+) -> T:
+    """Run `attempt`, a chunk's check-then-insert, retrying it once.
+
+    A concurrent insert can take one of the chunk's keys between the check
+    and the insert; the attempt is rolled back and run again, so it looks
+    again and reports those rows. A second conflict is raised.
+    """
+    try:
+        return await attempt()
+    except IntegrityError:
+        await session.rollback()
+    try:
+        return await attempt()
+    except IntegrityError:
+        await session.rollback()
+        raise
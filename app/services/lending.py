@@ -1,21 +1,33 @@
 from __future__ import annotations
 
+from collections import Counter
 from datetime import datetime, timedelta
-from typing import Sequence
+from typing import Optional, Sequence
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.v1.schemas.lending import (
+    LendingBatchCreate,
+    LendingBatchItem,
+    LendingBatchResult,
+    LendingBatchReturn,
     LendingCreate,
+    LendingRead,
     LendingReturn,
+    LendingReturnBatchItem,
+    LendingReturnBatchResult,
     LendingReturnResult,
 )
+from app.core.config import settings
+from app.core.count_cache import count_cache
 from app.core.exceptions import (
+    BaseServiceException,
     BookNotAvailable,
     LendingAlreadyExists,
     LendingLimitReached,
     LendingNotFound,
 )
+from app.db.routing import use_primary
 from app.models.lending import Lending
 from app.repositories.book import BookRepository
 from app.repositories.lending import LendingRepository
@@ -37,30 +49,13 @@ class LendingService:
         self.session = session
 
     async def create_lending(self, data: LendingCreate) -> Lending:
-        active = await self.lending_repo.get_active_lendings_by_user(
-            data.user_id
-        )
-
-        if len(active) >= MAX_LENDINGS:
-            raise LendingLimitReached()
-
-        if await self.lending_repo.get_lending_by_user_and_book(
-            data.user_id, data.book_id
-        ):
-            raise LendingAlreadyExists()
-
-        book = await self.book_repo.get_by_id(data.book_id)
-
-        if not book or book.available_copies < 1:
-            raise BookNotAvailable()
-
+        await self._take_copies(data.user_id, [data.book_id], atomic=True)
         lending = Lending(
             user_id=data.user_id,
             book_id=data.book_id,
             quantity=1,
             lending_date=datetime.now(),
         )
-        book.available_copies -= 1
         self.session.add(lending)
         await self.session.flush()
         await self.session.commit()
@@ -69,31 +64,210 @@ class LendingService:
     async def return_lending(
         self, lending_id: int, data: LendingReturn
     ) -> LendingReturnResult:
+        use_primary(self.session)
         lending = await self.lending_repo.get_lending_by_id(lending_id)
 
         if not lending or lending.returned_at:
             raise LendingNotFound()
 
         now = data.returned_at or datetime.now()
-        lending.returned_at = now
+        if not await self._close([lending], now):
+            await self.session.rollback()
+            raise LendingNotFound()
+        await self.session.commit()
+        return LendingReturnResult(
+            lending_id=lending.id,
+            returned_at=now,
+            fine=self._fine(lending, now),
+        )
 
-        due_date = lending.lending_date + timedelta(days=LENDING_DAYS)
-        days_late = (now.date() - due_date.date()).days
-        fine = FINE_PER_DAY * max(0, days_late)
+    async def create_lendings(
+        self, data: LendingBatchCreate
+    ) -> LendingBatchResult:
+        """Lend a cart of books to one user in a single transaction.
 
-        book = await self.book_repo.get_by_id(lending.book_id)
-        if book:
-            book.available_copies += 1
+        Copies are taken and checked as `_take_copies` describes, and the
+        lendings are written with one insert and one commit. With `atomic`
+        the first failure rejects the whole cart, otherwise the others are
+        still lent.
+        """
+        checked = await self._take_copies(
+            data.user_id, data.book_ids, atomic=data.atomic
+        )
+        now = datetime.now()
+        rows = [
+            {
+                'user_id': data.user_id,
+                'book_id': book_id,
+                'quantity': 1,
+                'lending_date': now,
+            }
+            for book_id, error in checked
+            if error is None
+        ]
+        lendings: dict[int, Lending] = {}
+        if rows:
+            inserted = await self.lending_repo.insert_lendings(rows)
+            lendings = {lending.book_id: lending for lending in inserted}
         await self.session.commit()
-        return LendingReturnResult(
-            lending_id=lending.id, returned_at=now, fine=fine
+
+        items = [
+            LendingBatchItem(book_id=book_id, error=error.detail)
+            if error is not None
+            else LendingBatchItem(
+                book_id=book_id,
+                lending=LendingRead.model_validate(
+                    lendings[book_id], from_attributes=True
+                ),
+            )
+            for book_id, error in checked
+        ]
+        return LendingBatchResult(
+            created=len(lendings),
+            failed=len(items) - len(lendings),
+            items=items,
         )
 
+    async def return_lendings(
+        self, data: LendingBatchReturn
+    ) -> LendingReturnBatchResult:
+        """Return many lendings at once, loading them with one query and
+        closing them and putting their copies back with one update each.
+        With `atomic` an unknown or already returned lending rejects the
+        whole batch; otherwise it is reported and the others are
+        returned."""
+        use_primary(self.session)
+        lendings = await self.lending_repo.get_lendings_by_ids(
+            data.lending_ids
+        )
+        returning: set[int] = set()
+        for lending_id in data.lending_ids:
+            lending = lendings.get(lending_id)
+            is_open = lending is not None and lending.returned_at is None
+            if not is_open or lending_id in returning:
+                if data.atomic:
+                    raise LendingNotFound()
+                continue
+            returning.add(lending_id)
+
+        now = data.returned_at or datetime.now()
+        closed = await self._close([lendings[i] for i in returning], now)
+        if data.atomic and closed != returning:
+            await self.session.rollback()
+            raise LendingNotFound()
+        items = []
+        for lending_id in data.lending_ids:
+            if lending_id in closed:
+                closed.discard(lending_id)
+                fine = self._fine(lendings[lending_id], now)
+                items.append(
+                    LendingReturnBatchItem(lending_id=lending_id, fine=fine)
+                )
+            else:
+                items.append(
+                    LendingReturnBatchItem(
+                        lending_id=lending_id, error=LendingNotFound.detail
+                    )
+                )
+        await self.session.commit()
+        returned = [item for item in items if item.error is None]
+        return LendingReturnBatchResult(
+            returned=len(returned),
+            failed=len(items) - len(returned),
+            returned_at=now,
+            total_fine=sum(item.fine for item in returned),
+            items=items,
+        )
+
+    async def _take_copies(
+        self, user_id: int, book_ids: Sequence[int], atomic: bool
+    ) -> list[tuple[int, Optional[BaseServiceException]]]:
+        """Take a copy of each book for `user_id` and check the lendings.
+
+        The guarded decrement is the transaction's first write, so it also
+        takes the database write lock: the user's active lendings are read
+        after it and the checks see every concurrent checkout. Books are
+        checked in order against the lending limit, the books the user
+        holds and the copies taken. With `atomic` the first failure rolls
+        the transaction back and is raised; otherwise the copies taken
+        for failed books are put back and each book is returned with its
+        error, or None.
+        """
+        use_primary(self.session)
+        taken = await self.book_repo.take_copies(book_ids)
+        on_loan = await self.lending_repo.active_book_ids(user_id)
+        active, held = len(on_loan), set(on_loan)
+
+        checked: list[tuple[int, Optional[BaseServiceException]]] = []
+        for book_id in book_ids:
+            error: Optional[BaseServiceException] = None
+            if active >= MAX_LENDINGS:
+                error = LendingLimitReached()
+            elif book_id in held:
+                error = LendingAlreadyExists()
+            elif book_id not in taken:
+                error = BookNotAvailable()
+            else:
+                active += 1
+                held.add(book_id)
+            if error is not None and atomic:
+                await self.session.rollback()
+                raise error
+            checked.append((book_id, error))
+
+        lent = {book_id for book_id, error in checked if error is None}
+        await self.book_repo.put_back_copies(dict.fromkeys(taken - lent, 1))
+        return checked
+
+    async def _close(
+        self, lendings: Sequence[Lending], now: datetime
+    ) -> set[int]:
+        """Mark `lendings` returned at `now` and put their copies back on
+        the shelf. Returns the ids actually closed: one returned
+        concurrently is left out."""
+        if not lendings:
+            return set()
+        closed = await self.lending_repo.close_lendings(
+            (lending.id for lending in lendings), now
+        )
+        await self.book_repo.put_back_copies(
+            Counter(
+                lending.book_id for lending in lendings if lending.id in closed
+            )
+        )
+        return closed
+
+    @staticmethod
+    def _fine(lending: Lending, now: datetime) -> float:
+        """The late fine for `lending` returned at `now`."""
+        due_date = lending.lending_date + timedelta(days=LENDING_DAYS)
+        days_late = (now.date() - due_date.date()).days
+        return FINE_PER_DAY * max(0, days_late)
+
     async def list_active_lendings(
-        self, limit: int = 10, offset: int = 0
-    ) -> tuple[Sequence[Lending], int]:
+        self, limit: int = 10, offset: int = 0, include_total: bool = True
+    ) -> tuple[Sequence[Lending], Optional[int]]:
         return await self.lending_repo.list_active_lendings(
-            limit=limit, offset=offset
+            limit=limit,
+            offset=offset,
+            total_mode=settings.LIST_TOTAL_MODE if include_total else None,
+        )
+
+    async def count_active_lendings(self) -> int:
+        return await self.lending_repo.count_active_lendings()
+
+    async def count_user_lendings(self, user_id: int) -> tuple[int, bool]:
+        """A user's lending count and whether it is exact (not cached)."""
+        return await count_cache.get_or_count(
+            ('user_lendings', user_id),
+            lambda: self.lending_repo.count_user_lendings(user_id),
+        )
+
+    async def list_active_lendings_keyset(
+        self, limit: int = 10, cursor: Optional[str] = None
+    ) -> tuple[Sequence[Lending], Optional[str]]:
+        return await self.lending_repo.list_active_lendings_keyset(
+            limit=limit, cursor=cursor
         )
 
     async def user_lending_history(
@@ -102,3 +276,10 @@ class LendingService:
         return await self.lending_repo.user_lending_history(
             user_id, limit=limit, offset=offset
         )
+
+    async def user_lending_history_keyset(
+        self, user_id: int, limit: int = 10, cursor: Optional[str] = None
+    ) -> tuple[Sequence[Lending], Optional[str]]:
+        return await self.lending_repo.user_lending_history_keyset(
+            user_id, limit=limit, cursor=cursor
+        )
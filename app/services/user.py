@@ -1,19 +1,32 @@
 from __future__ import annotations
 
-from typing import Optional, Sequence
+import time
+from typing import Any, AsyncIterable, Optional, Sequence
 
 from email_validator import EmailNotValidError, validate_email
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.core.exceptions import (
     EmailAlreadyExists,
     IncorrectPassword,
     InvalidEmail,
     UserNotFound,
 )
+from app.core.security import hash_passwords_bulk
+from app.core.token_cache import token_revocations
+from app.db.routing import use_primary
 from app.models.lending import Lending
 from app.models.user import Role, User
 from app.repositories.user import UserRepository
+from app.services.importing import (
+    ImportReport,
+    ImportRow,
+    chunked,
+    retry_on_conflict,
+)
+
+_IMPORT_FIELDS = ('name', 'email', 'password')
 
 
 class UserService:
@@ -24,9 +37,21 @@ class UserService:
         self.session = session
 
     async def list_users(
-        self, limit: int = 100, offset: int = 0
-    ) -> tuple[Sequence[User], int]:
-        return await self.repo.list_users(limit=limit, offset=offset)
+        self, limit: int = 100, offset: int = 0, include_total: bool = True
+    ) -> tuple[Sequence[User], Optional[int]]:
+        return await self.repo.list_users(
+            limit=limit,
+            offset=offset,
+            total_mode=settings.LIST_TOTAL_MODE if include_total else None,
+        )
+
+    async def count_users(self) -> int:
+        return await self.repo.count_users()
+
+    async def list_users_keyset(
+        self, limit: int = 100, cursor: Optional[str] = None
+    ) -> tuple[Sequence[User], Optional[str]]:
+        return await self.repo.list_users_keyset(limit=limit, cursor=cursor)
 
     async def create_user(
         self, name: str, email: str, password: str, role: Role = Role.READER
@@ -36,6 +61,7 @@ class UserService:
         except EmailNotValidError:
             raise InvalidEmail()
 
+        use_primary(self.repo.session)
         existing = await self.repo.get_by_email(email)
         if existing is not None:
             raise EmailAlreadyExists()
@@ -43,7 +69,7 @@ class UserService:
         user = User()
         user.name = name
         user.email = email
-        user.set_password(password)
+        await user.set_password_async(password)
         user.role = role
         created = await self.repo.create_user(user)
         if self.session is not None:
@@ -63,12 +89,119 @@ class UserService:
         return await self.repo.get_by_email(email)
 
     async def authenticate_user(self, email: str, password: str) -> User:
+        # A lagging reader could still accept a changed password, and a
+        # rehash writes the row it just read.
+        use_primary(self.repo.session)
         user = await self.get_user_by_email(email)
         if user is None:
             raise UserNotFound()
-        if not user.check_password(password):
+        if not await user.check_password_async(password):
             raise IncorrectPassword()
+        if user.password_needs_rehash():
+            # Upgrade hashes made with an older algorithm or cost while the
+            # plaintext is at hand.
+            await user.set_password_async(password)
+            if self.session is not None:
+                await self.session.commit()
         return user
 
+    async def revoke_tokens(self, user_id: int) -> None:
+        """Reject every access token issued to the user so far.
+
+        Revocations live in this process's `token_revocations`: with
+        several workers, each one only rejects the tokens it was told
+        about, and a restart forgets them.
+        """
+        await self.get_user(user_id)
+        token_revocations.revoke(user_id, time.time())
+
     async def list_lendings(self, user_id: int) -> Sequence[Lending]:
         return await self.repo.list_lendings_for_user(user_id)
+
+    async def import_users(
+        self, rows: AsyncIterable[ImportRow], chunk_size: int | None = None
+    ) -> ImportReport:
+        """Create users from a stream of rows, one transaction per chunk.
+
+        Each chunk is validated in memory, checked for registered emails
+        with a single query, hashed on the process pool and inserted with
+        one executemany. Rows that fail are reported, not raised.
+        """
+        use_primary(self.repo.session)
+        report = ImportReport()
+        started = time.perf_counter()
+        seen: set[str] = set()
+        async for chunk in chunked(
+            rows, chunk_size or settings.IMPORT_CHUNK_SIZE
+        ):
+            candidates: list[tuple[int, dict[str, Any]]] = []
+            for row in chunk:
+                error = row.error
+                if error is None:
+                    values, error = self._import_values(row.data)
+                if error is None and values['email'] in seen:
+                    error = 'Duplicate email in import'
+                if error is not None:
+                    report.fail(row.number, error)
+                    continue
+                seen.add(values['email'])
+                candidates.append((row.number, values))
+            report.created += await self._insert_chunk(candidates, report)
+        report.elapsed_seconds = time.perf_counter() - started
+        return report
+
+    @staticmethod
+    def _import_values(
+        data: dict[str, Any],
+    ) -> tuple[dict[str, Any], str | None]:
+        values = {key: str(data.get(key) or '').strip() for key in data}
+        missing = [key for key in _IMPORT_FIELDS if not values.get(key)]
+        if missing:
+            return values, f'Missing field(s): {", ".join(missing)}'
+        try:
+            validate_email(values['email'], check_deliverability=False)
+        except EmailNotValidError:
+            return values, InvalidEmail.detail
+        try:
+            role = Role(values.get('role') or Role.READER)
+        except ValueError:
+            return values, f'Invalid role: {values["role"]}'
+        return {
+            'name': values['name'],
+            'email': values['email'],
+            'password': str(data['password']),
+            'role': role,
+        }, None
+
+    async def _insert_chunk(
+        self,
+        candidates: list[tuple[int, dict[str, Any]]],
+        report: ImportReport,
+    ) -> int:
+        async def attempt() -> int:
+            nonlocal candidates
+            existing = await self.repo.existing_emails(
+                values['email'] for _, values in candidates
+            )
+            for number, values in candidates:
+                if values['email'] in existing:
+                    report.fail(number, EmailAlreadyExists.detail)
+            candidates = [
+                (number, values)
+                for number, values in candidates
+                if values['email'] not in existing
+            ]
+            if not candidates:
+                return 0
+            hashes = await hash_passwords_bulk([
+                values['password'] for _, values in candidates
+            ])
+            await self.repo.insert_users([
+                {**values, 'password': hashed}
+                for (_, values), hashed in zip(candidates, hashes)
+            ])
+            if self.session is not None:
+                await self.session.commit()
+            return len(candidates)
+
+        return await retry_on_conflict(self.repo.session, attempt)
@@ -0,0 +1,133 @@
+"""Catalogue import throughput: `POST /books/import` vs `POST /books/`.
+
+Streams a generated NDJSON body of N books into a file-backed SQLite
+database through the import endpoint, then re-imports it with ``upsert``
+(every row adds copies to an existing book), and compares both with
+creating a sample of books one request at a time.
+
+Run with::
+
+    python -m benchmarks.bench_book_import [--books N] [--chunk-size C]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from app.api.deps.auth import TokenPrincipal, get_current_principal
+from app.api.v1.routers.books import router as books
+from app.core.config import settings
+from app.db.database import create_db_and_tables, get_session
+from app.models.user import Role
+
+SINGLE_REQUESTS = 1_000
+LINES_PER_CHUNK = 1_000
+
+
+def book(i: int) -> dict:
+    return {
+        'name': f'Title {i}',
+        'author': f'Author {i % 5_000}',
+        'category': ('fiction', 'nonfiction', 'tech', 'other')[i % 4],
+        'total_copies': 1 + i % 3,
+    }
+
+
+async def body(count: int):
+    batch = []
+    for i in range(count):
+        batch.append(json.dumps(book(i)))
+        if len(batch) == LINES_PER_CHUNK:
+            yield ('\n'.join(batch) + '\n').encode()
+            batch = []
+    if batch:
+        yield '\n'.join(batch).encode()
+
+
+async def bulk(client: httpx.AsyncClient, count: int, upsert: bool) -> None:
+    start = time.perf_counter()
+    resp = await client.post(
+        '/books/import',
+        params={'upsert': upsert},
+        content=body(count),
+        headers={'Content-Type': 'application/x-ndjson'},
+    )
+    elapsed = time.perf_counter() - start
+    resp.raise_for_status()
+    report = resp.json()
+    label = 'upsert' if upsert else 'import'
+    print(
+        f'  {label:<12} created {report["created"]:>8} '
+        f'updated {report["updated"]:>8} failed {report["failed"]} '
+        f'in {elapsed:6.1f}s ({count / elapsed:>9,.0f} rows/s)'
+    )
+
+
+async def one_by_one(client: httpx.AsyncClient, count: int) -> None:
+    start = time.perf_counter()
+    for i in range(count):
+        resp = await client.post('/books/', json=book(-1 - i))
+        resp.raise_for_status()
+    elapsed = time.perf_counter() - start
+    print(
+        f'  {"POST /books/":<12} created {count:>8} '
+        f'in {elapsed:6.1f}s ({count / elapsed:>9,.0f} rows/s)'
+    )
+
+
+async def main(count: int, chunk_size: int) -> None:
+    logging.getLogger().handlers[:] = [logging.NullHandler()]
+    settings.IMPORT_CHUNK_SIZE = chunk_size
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(
+            f'sqlite+aiosqlite:///{Path(tmp) / "bench.db"}'
+        )
+        await create_db_and_tables(engine_override=engine)
+        session_factory = async_sessionmaker(
+            bind=engine, expire_on_commit=False, class_=AsyncSession
+        )
+
+        async def _session():
+            async with session_factory() as session:
+                yield session
+
+        app = FastAPI()
+        app.dependency_overrides[get_session] = _session
+        app.dependency_overrides[get_current_principal] = lambda: (
+            TokenPrincipal(id=0, role=Role.ADMIN)
+        )
+        app.include_router(books)
+
+        print(f'{count:,} books, chunks of {chunk_size}:')
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url='http://bench', timeout=None
+        ) as client:
+            await bulk(client, count, upsert=False)
+            await bulk(client, count, upsert=True)
+            await one_by_one(client, min(count, SINGLE_REQUESTS))
+        await engine.dispose()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--books', type=int, default=100_000)
+    parser.add_argument(
+        '--chunk-size', type=int, default=settings.IMPORT_CHUNK_SIZE
+    )
+    args = parser.parse_args()
+    asyncio.run(main(args.books, args.chunk_size))
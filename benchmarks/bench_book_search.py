@@ -0,0 +1,93 @@
+"""Latency of a catalogue search, FTS5 index vs the ``LIKE`` fallback.
+
+Seeds a file database with N books and runs `BookRepository.search_books`
+for a few queries, first with the FTS5 index (migration 5), then after
+dropping it, as on a SQLite build without FTS5.
+
+Run with::
+
+    python -m benchmarks.bench_book_search [--books N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.db.database import create_engine
+from app.db.migrations import BOOKS_FTS_TRIGGERS
+from app.db.setup import setup_database
+from app.models.book import Book, BookCategoryEnum
+from app.repositories.book import BookRepository
+
+QUERIES = ('herbert', 'dune messiah', 'title 4242', 'nothing here')
+REPEATS = 20
+WORDS = ('dune', 'messiah', 'shadow', 'river', 'glass', 'harbor', 'winter')
+
+
+async def seed(session_factory, books: int) -> None:
+    rows = [
+        {
+            'name': f'{WORDS[i % 7]} {WORDS[i // 7 % 7]} title {i}',
+            'author': 'Frank Herbert' if i % 1000 == 0 else f'Author {i}',
+            'category': BookCategoryEnum.FICTION,
+            'total_copies': 1,
+        }
+        for i in range(books)
+    ]
+    async with session_factory() as session:
+        await session.execute(insert(Book), rows)
+        await session.commit()
+
+
+async def timings(session_factory) -> list[str]:
+    results = []
+    async with session_factory() as session:
+        repo = BookRepository(session)
+        for query in QUERIES:
+            samples = []
+            for _ in range(REPEATS):
+                start = time.perf_counter()
+                await repo.search_books(query, limit=20)
+                samples.append(time.perf_counter() - start)
+            results.append(
+                f'{query!r} {statistics.median(samples) * 1000:7.2f}ms'
+            )
+    return results
+
+
+async def main(books: int) -> None:
+    logging.getLogger().handlers[:] = [logging.NullHandler()]
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f'sqlite+aiosqlite:///{Path(tmp) / "b.db"}')
+        try:
+            await setup_database(engine, dev_admin=False)
+            session_factory = async_sessionmaker(
+                bind=engine, expire_on_commit=False, class_=AsyncSession
+            )
+            await seed(session_factory, books)
+            print('fts5:', '  '.join(await timings(session_factory)))
+            async with engine.begin() as conn:
+                for statement in BOOKS_FTS_TRIGGERS:
+                    await conn.execute(
+                        text(f'DROP TRIGGER {statement.split()[5]}')
+                    )
+                await conn.execute(text('DROP TABLE books_fts'))
+            print('like:', '  '.join(await timings(session_factory)))
+        finally:
+            await engine.dispose()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--books', type=int, default=200_000)
+    args = parser.parse_args()
+    asyncio.run(main(args.books))
@@ -0,0 +1,132 @@
+"""Desk checkout and return of a cart of books: one call per book vs batch.
+
+Each of N users borrows a cart of ``MAX_LENDINGS`` books and returns it,
+through ``LendingService.create_lending``/``return_lending`` per book and
+through ``create_lendings``/``return_lendings`` for the whole cart, against
+a file database with the configured SQLite profile. Reports the median
+time and the statements per cart.
+
+Run with::
+
+    python -m benchmarks.bench_lending_batch [--carts N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.api.v1.schemas.lending import (
+    LendingBatchCreate,
+    LendingBatchReturn,
+    LendingCreate,
+    LendingReturn,
+)
+from app.db.database import create_engine
+from app.db.query_stats import track_queries
+from app.db.setup import setup_database
+from app.models.book import Book, BookCategoryEnum
+from app.models.user import User
+from app.repositories.book import BookRepository
+from app.repositories.lending import LendingRepository
+from app.services.lending import MAX_LENDINGS, LendingService
+
+
+async def one_by_one(service: LendingService, user_id: int, books) -> None:
+    lendings = [
+        await service.create_lending(LendingCreate(user_id=user_id, book_id=b))
+        for b in books
+    ]
+    for lending in lendings:
+        await service.return_lending(lending.id, LendingReturn())
+
+
+async def batch(service: LendingService, user_id: int, books) -> None:
+    result = await service.create_lendings(
+        LendingBatchCreate(user_id=user_id, book_ids=books)
+    )
+    await service.return_lendings(
+        LendingBatchReturn(
+            lending_ids=[item.lending.id for item in result.items]
+        )
+    )
+
+
+async def measure(session_factory, path, carts: int) -> tuple[float, float]:
+    timings, statements = [], []
+    async with session_factory() as session:
+        service = LendingService(
+            LendingRepository(session), BookRepository(session), session
+        )
+        for user_id in range(1, carts + 1):
+            books = [
+                (user_id * MAX_LENDINGS + i) % carts + 1
+                for i in range(MAX_LENDINGS)
+            ]
+            with track_queries() as stats:
+                start = time.perf_counter()
+                await path(service, user_id, books)
+                timings.append(time.perf_counter() - start)
+            statements.append(stats.count)
+    return statistics.median(timings) * 1000, statistics.mean(statements)
+
+
+async def main(carts: int) -> None:
+    logging.getLogger().handlers[:] = [logging.NullHandler()]
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f'sqlite+aiosqlite:///{Path(tmp) / "b.db"}')
+        try:
+            await setup_database(engine, dev_admin=False)
+            session_factory = async_sessionmaker(
+                bind=engine, expire_on_commit=False, class_=AsyncSession
+            )
+            async with session_factory() as session:
+                await session.execute(
+                    insert(User),
+                    [
+                        {
+                            'name': f'user {i}',
+                            'email': f'user{i}@example.com',
+                            'password': 'x',
+                        }
+                        for i in range(carts)
+                    ],
+                )
+                await session.execute(
+                    insert(Book),
+                    [
+                        {
+                            'name': f'Book {i}',
+                            'title_key': f'book {i}',
+                            'category': BookCategoryEnum.FICTION,
+                            'total_copies': carts,
+                            'available_copies': carts,
+                        }
+                        for i in range(carts)
+                    ],
+                )
+                await session.commit()
+            print(f'{carts} carts of {MAX_LENDINGS} books, lend + return:')
+            for label, path in (('one by one', one_by_one), ('batch', batch)):
+                ms, statements = await measure(session_factory, path, carts)
+                print(
+                    f'  {label:<12} {ms:7.2f}ms per cart, '
+                    f'{statements:4.1f} statements'
+                )
+        finally:
+            await engine.dispose()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--carts', type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(main(args.carts))
@@ -0,0 +1,110 @@
+"""Latency of the first page of books with its total, by total strategy.
+
+* two queries: the page plus ``SELECT count(*)`` (the original path);
+* counter: the page plus a primary-key read of ``row_counts``;
+* window: rows and ``count(*) OVER ()`` in a single statement.
+
+Every path runs through aiosqlite's worker thread against a file database,
+for several table sizes.
+
+Run with::
+
+    python -m benchmarks.bench_list_totals [--sizes 100,10000,200000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.db.database import create_engine
+from app.db.setup import setup_database
+from app.models.book import Book, BookCategoryEnum
+from app.repositories.book import BookRepository
+
+LIMIT = 20
+REPEATS = 200
+
+
+async def two_queries(session: AsyncSession) -> int:
+    await BookRepository(session).list_books(LIMIT, 0, None)
+    result = await session.execute(select(func.count()).select_from(Book))
+    return result.scalar_one()
+
+
+async def counter(session: AsyncSession) -> int:
+    _, total = await BookRepository(session).list_books(LIMIT)
+    return total
+
+
+async def window(session: AsyncSession) -> int:
+    _, total = await BookRepository(session).list_books(
+        LIMIT, total_mode='window'
+    )
+    return total
+
+
+async def measure(session_factory, path) -> float:
+    timings = []
+    async with session_factory() as session:
+        for _ in range(REPEATS):
+            start = time.perf_counter()
+            await path(session)
+            timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+async def run(size: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f'sqlite+aiosqlite:///{Path(tmp) / "b.db"}')
+        try:
+            await setup_database(engine, dev_admin=False)
+            session_factory = async_sessionmaker(
+                bind=engine, expire_on_commit=False, class_=AsyncSession
+            )
+            async with session_factory() as session:
+                await session.execute(
+                    insert(Book),
+                    [
+                        {
+                            'name': f'Book {i}',
+                            'author': f'Author {i % 997}',
+                            'category': BookCategoryEnum.FICTION,
+                            'total_copies': 1,
+                        }
+                        for i in range(size)
+                    ],
+                )
+                await session.commit()
+            results = [
+                f'{label} {await measure(session_factory, path):6.3f}ms'
+                for label, path in (
+                    ('two queries', two_queries),
+                    ('counter', counter),
+                    ('window', window),
+                )
+            ]
+            print(f'{size:>8} books: ' + '  '.join(results))
+        finally:
+            await engine.dispose()
+
+
+async def main(sizes: list[int]) -> None:
+    logging.getLogger().handlers[:] = [logging.NullHandler()]
+    for size in sizes:
+        await run(size)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='100,10000,200000')
+    args = parser.parse_args()
+    asyncio.run(main([int(size) for size in args.sizes.split(',')]))
@@ -0,0 +1,139 @@
+"""``GET /books/`` latency during a login storm, sync vs offloaded hashing.
+
+Runs a few clients hammering ``POST /auth/token`` while one client reads
+``GET /books/`` and records its latency, first with PBKDF2 verification on
+the event loop (the previous behaviour) and then on the hashing pool.
+
+Run with::
+
+    python -m benchmarks.bench_login_storm [--seconds S] [--logins N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from app.api.v1.routers.auth import router as auth
+from app.api.v1.routers.books import router as books
+from app.db.database import create_db_and_tables, get_session
+from app.models.book import Book, BookCategoryEnum
+from app.models.user import User
+from app.repositories.user import UserRepository
+from app.services.user import UserService
+
+EMAIL = 'storm@example.com'
+PASSWORD = 'storm-password'
+BOOKS = 20
+PERCENTILES = 100
+
+
+@contextmanager
+def blocking_verification():
+    """Temporarily verify passwords on the event loop, as before."""
+    original = User.check_password_async
+
+    async def check_on_loop(self, password):
+        return self.check_password(password)
+
+    User.check_password_async = check_on_loop
+    try:
+        yield
+    finally:
+        User.check_password_async = original
+
+
+async def run_storm(app: FastAPI, seconds: float, logins: int) -> list[float]:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url='http://bench'
+    ) as client:
+        deadline = time.perf_counter() + seconds
+        latencies: list[float] = []
+
+        async def login():
+            while time.perf_counter() < deadline:
+                resp = await client.post(
+                    '/auth/token',
+                    data={'username': EMAIL, 'password': PASSWORD},
+                )
+                resp.raise_for_status()
+
+        async def read():
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                (await client.get('/books/')).raise_for_status()
+                latencies.append(time.perf_counter() - start)
+                await asyncio.sleep(0.005)
+
+        await asyncio.gather(read(), *[login() for _ in range(logins)])
+    return latencies
+
+
+def summary(latencies: list[float]) -> str:
+    cuts = statistics.quantiles(latencies, n=PERCENTILES)
+    return (
+        f'p50={cuts[49] * 1000:7.1f}ms  p99={cuts[98] * 1000:7.1f}ms  '
+        f'(n={len(latencies)})'
+    )
+
+
+async def main(seconds: float, logins: int) -> None:
+    logging.getLogger().handlers[:] = [logging.NullHandler()]
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(
+            f'sqlite+aiosqlite:///{Path(tmp) / "bench.db"}'
+        )
+        await create_db_and_tables(engine_override=engine)
+        session_factory = async_sessionmaker(
+            bind=engine, expire_on_commit=False, class_=AsyncSession
+        )
+        async with session_factory() as session:
+            await UserService(UserRepository(session), session).create_user(
+                'storm', EMAIL, PASSWORD
+            )
+            session.add_all([
+                Book(name=f'Book {i}', category=BookCategoryEnum.TECH)
+                for i in range(BOOKS)
+            ])
+            await session.commit()
+
+        async def _session():
+            async with session_factory() as session:
+                yield session
+
+        app = FastAPI()
+        app.dependency_overrides[get_session] = _session
+        app.include_router(auth)
+        app.include_router(books)
+
+        with blocking_verification():
+            before = await run_storm(app, seconds, logins)
+        after = await run_storm(app, seconds, logins)
+        await engine.dispose()
+
+    print(f'GET /books/ with {logins} concurrent login loops:')
+    print(f'  verify on event loop : {summary(before)}')
+    print(f'  verify on hash pool  : {summary(after)}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--logins', type=int, default=8)
+    args = parser.parse_args()
+    asyncio.run(main(args.seconds, args.logins))
@@ -0,0 +1,162 @@
+"""Requests/sec through the middleware stack, before and after going ASGI.
+
+Compares the current pure ASGI `LoggingMiddleware`/`RateLimiterMiddleware`
+against equivalent `BaseHTTPMiddleware` versions (the previous
+implementation) on ``GET /health`` and ``GET /books/``.
+
+Run with::
+
+    python -m benchmarks.bench_middleware [--requests N] [--concurrency C]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import time
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.api.v1.routers.books import router as books
+from app.core.logging_config import logger
+from app.core.rate_limit_storage import MemoryStorage
+from app.core.rate_limiter import (
+    RateLimiterMiddleware,
+    RateLimitRules,
+    rate_limit_headers,
+)
+from app.db.database import create_db_and_tables, get_session
+from app.main import LoggingMiddleware
+from app.models.book import Book, BookCategoryEnum
+
+BOOKS = 50
+UNLIMITED = '1000000000/second'
+
+
+class LegacyLoggingMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):  # noqa: PLR6301
+        logger.info(f'REQUEST: {request.method} {request.url}')
+        response = await call_next(request)
+        logger.info(f'RESPONSE: {response.status_code} {request.url}')
+        return response
+
+
+class LegacyRateLimiterMiddleware(BaseHTTPMiddleware):
+    def __init__(self, app):
+        super().__init__(app)
+        self.rules = RateLimitRules(UNLIMITED, {})
+        self.storage = MemoryStorage()
+
+    async def dispatch(self, request, call_next):
+        client_ip = request.client.host if request.client else 'unknown'
+        rule_key, rule = self.rules.resolve(request.method, request.url.path)
+        decision = await self.storage.hit(
+            f'{client_ip}|{rule_key}', rule, time.time()
+        )
+        response = await call_next(request)
+        response.headers.update(rate_limit_headers(rule, decision))
+        return response
+
+
+def build_app(session_factory, legacy: bool) -> FastAPI:
+    app = FastAPI()
+    if legacy:
+        app.add_middleware(LegacyLoggingMiddleware)
+        app.add_middleware(LegacyRateLimiterMiddleware)
+    else:
+        app.add_middleware(LoggingMiddleware)
+        app.add_middleware(
+            RateLimiterMiddleware,
+            rules=RateLimitRules(UNLIMITED, {}),
+            storage=MemoryStorage(),
+        )
+
+    async def _session():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_session] = _session
+    app.include_router(books)
+
+    @app.get('/health')
+    def health():
+        return {'status': 'ok'}
+
+    return app
+
+
+async def measure(app: FastAPI, path: str, requests: int, concurrency: int):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url='http://bench'
+    ) as client:
+        # Warm up routing, validation and connection pools.
+        for _ in range(20):
+            (await client.get(path)).raise_for_status()
+
+        remaining = requests
+
+        async def worker():
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                (await client.get(path)).raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        elapsed = time.perf_counter() - start
+    return requests / elapsed
+
+
+async def main(requests: int, concurrency: int) -> None:
+    # Keep the log lines' cost (they are part of the middleware) but not
+    # the terminal I/O.
+    logging.getLogger().handlers[:] = [logging.NullHandler()]
+
+    engine = create_async_engine('sqlite+aiosqlite:///:memory:')
+    await create_db_and_tables(engine_override=engine)
+    session_factory = async_sessionmaker(
+        bind=engine, expire_on_commit=False, class_=AsyncSession
+    )
+    async with session_factory() as session:
+        session.add_all([
+            Book(name=f'Book {i}', category=BookCategoryEnum.TECH)
+            for i in range(BOOKS)
+        ])
+        await session.commit()
+
+    print(f'{"path":<10} {"BaseHTTPMiddleware":>20} {"pure ASGI":>12} {"":>8}')
+    for path in ('/health', '/books/'):
+        before = await measure(
+            build_app(session_factory, legacy=True),
+            path,
+            requests,
+            concurrency,
+        )
+        after = await measure(
+            build_app(session_factory, legacy=False),
+            path,
+            requests,
+            concurrency,
+        )
+        print(
+            f'{path:<10} {before:>16.0f} r/s {after:>8.0f} r/s '
+            f'{(after / before - 1) * 100:>+7.1f}%'
+        )
+    await engine.dispose()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=3000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
@@ -0,0 +1,103 @@
+"""Cost of one page of `GET /books/` at increasing depths, offset vs keyset.
+
+Seeds a file database with N books and fetches a page at several depths,
+through `BookRepository.list_books` (LIMIT/OFFSET, no total) and
+`BookRepository.list_books_keyset` (cursor taken from the previous row),
+then compares the page total from ``count(*)`` with the row counter.
+
+Run with::
+
+    python -m benchmarks.bench_pagination [--books N] [--limit L]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.db.database import create_engine
+from app.db.setup import setup_database
+from app.models.book import Book, BookCategoryEnum
+from app.repositories.book import BY_ID, BookRepository
+from app.repositories.pagination import encode_cursor
+
+REPEATS = 20
+
+
+async def seed(session_factory, books: int) -> None:
+    rows = [
+        {
+            'name': f'Book {i}',
+            'author': f'Author {i % 997}',
+            'category': BookCategoryEnum.FICTION,
+            'total_copies': 1,
+        }
+        for i in range(books)
+    ]
+    async with session_factory() as session:
+        await session.execute(insert(Book), rows)
+        await session.commit()
+
+
+async def timed(call) -> float:
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        await call()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+async def main(books: int, limit: int) -> None:
+    logging.getLogger().handlers[:] = [logging.NullHandler()]
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f'sqlite+aiosqlite:///{Path(tmp) / "b.db"}')
+        try:
+            await setup_database(engine, dev_admin=False)
+            session_factory = async_sessionmaker(
+                bind=engine, expire_on_commit=False, class_=AsyncSession
+            )
+            await seed(session_factory, books)
+            async with session_factory() as session:
+                repo = BookRepository(session)
+                for depth in (0, books // 10, books // 2, books - limit):
+                    # Ids start at 1: the row before `depth` has id depth.
+                    cursor = encode_cursor(BY_ID.name, [depth])
+                    offset_ms = await timed(
+                        lambda d=depth: repo.list_books(limit, d, None)
+                    )
+                    keyset_ms = await timed(
+                        lambda c=cursor: repo.list_books_keyset(limit, c)
+                    )
+                    print(
+                        f'depth {depth:>8}: offset {offset_ms:7.2f}ms  '
+                        f'keyset {keyset_ms:7.2f}ms'
+                    )
+                count_ms = await timed(
+                    lambda: session.execute(
+                        select(func.count()).select_from(Book)
+                    )
+                )
+                counter_ms = await timed(repo.count_books)
+                print(
+                    f'total: count(*) {count_ms:7.2f}ms  '
+                    f'row counter {counter_ms:7.2f}ms'
+                )
+        finally:
+            await engine.dispose()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--books', type=int, default=200_000)
+    parser.add_argument('--limit', type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.books, args.limit))
@@ -0,0 +1,122 @@
+"""Mixed read/write throughput, default aiosqlite engine vs tuned profile.
+
+Concurrent workers run a 80/20 mix of ``list_books`` reads and lending-like
+writes (read a book, change its available copies, commit) against a
+file-backed database, while a reporting task keeps long read transactions
+open. It runs first on a plain ``create_async_engine`` and then on
+`app.db.database.create_engine` (WAL, pragmas, IMMEDIATE transactions,
+sized pool). Failed operations are usually "database is locked": in the
+default rollback-journal mode a long reader blocks every writer's commit.
+
+Run with::
+
+    python -m benchmarks.bench_sqlite_profile [--seconds S] [--workers N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from app.db.database import create_db_and_tables, create_engine
+from app.models.book import Book, BookCategoryEnum
+from app.repositories.book import BookRepository
+
+BOOKS = 200
+WRITE_RATIO = 0.2
+REPORT_SECONDS = 0.5
+
+
+async def run_mix(
+    engine: AsyncEngine, seconds: float, workers: int
+) -> tuple[int, int]:
+    await create_db_and_tables(engine_override=engine)
+    session_factory = async_sessionmaker(
+        bind=engine, expire_on_commit=False, class_=AsyncSession
+    )
+    async with session_factory() as session:
+        session.add_all([
+            Book(
+                name=f'Book {i}',
+                category=BookCategoryEnum.TECH,
+                total_copies=1_000_000,
+                available_copies=1_000_000,
+            )
+            for i in range(BOOKS)
+        ])
+        await session.commit()
+
+    deadline = time.perf_counter() + seconds
+    done = failed = 0
+
+    async def worker(rng: random.Random):
+        nonlocal done, failed
+        while time.perf_counter() < deadline:
+            async with session_factory() as session:
+                repo = BookRepository(session)
+                try:
+                    if rng.random() < WRITE_RATIO:
+                        book = await repo.get_by_id(rng.randint(1, BOOKS))
+                        book.available_copies -= 1
+                        await session.commit()
+                    else:
+                        await repo.list_books(limit=20)
+                        await session.commit()
+                    done += 1
+                except OperationalError:
+                    failed += 1
+                    await session.rollback()
+
+    async def report():
+        while time.perf_counter() < deadline:
+            async with engine.connect() as conn:
+                await conn.exec_driver_sql('BEGIN')
+                await conn.exec_driver_sql('SELECT count(*) FROM books')
+                await asyncio.sleep(REPORT_SECONDS)
+                await conn.exec_driver_sql('COMMIT')
+
+    await asyncio.gather(
+        report(), *(worker(random.Random(seed)) for seed in range(workers))
+    )
+    await engine.dispose()
+    return done, failed
+
+
+async def main(seconds: float, workers: int) -> None:
+    logging.getLogger().handlers[:] = [logging.NullHandler()]
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, factory in (
+            ('default engine', create_async_engine),
+            ('tuned profile ', create_engine),
+        ):
+            url = f'sqlite+aiosqlite:///{Path(tmp) / label.strip()}.db'
+            results[label] = await run_mix(factory(url), seconds, workers)
+
+    print(f'{workers} workers, {WRITE_RATIO:.0%} writes, {seconds:.0f}s:')
+    for label, (done, failed) in results.items():
+        print(
+            f'  {label}: {done / seconds:8.1f} ops/s  '
+            f'{failed} failed operations'
+        )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--workers', type=int, default=16)
+    args = parser.parse_args()
+    asyncio.run(main(args.seconds, args.workers))
@@ -0,0 +1,95 @@
+"""Database work done by each API process on boot, before vs after.
+
+Before: ``create_all`` on every start plus ``create_dev_admin`` with its own
+sessionmaker. After: a single schema version read (`check_schema`). Both
+run against an already set-up file database with a fresh engine per boot,
+as a new worker would, alone and with several workers booting at once.
+
+Run with::
+
+    python -m benchmarks.bench_startup [--boots N] [--workers W]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from app.db.database import create_engine
+from app.db.migrations import check_schema
+from app.db.setup import setup_database
+from app.models.base import Base
+from app.repositories.user import UserRepository
+
+
+async def legacy_boot(url: str) -> None:
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(
+        bind=engine, expire_on_commit=False, class_=AsyncSession
+    )
+    async with session_factory() as session:
+        await UserRepository(session).get_by_name('admin')
+    await engine.dispose()
+
+
+async def versioned_boot(url: str) -> None:
+    engine = create_engine(url)
+    await check_schema(engine)
+    await engine.dispose()
+
+
+async def measure(boot, url: str, boots: int, workers: int) -> list[float]:
+    timings = []
+    for _ in range(boots):
+        start = time.perf_counter()
+        await asyncio.gather(*(boot(url) for _ in range(workers)))
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def summary(timings: list[float]) -> str:
+    return (
+        f'mean={statistics.fmean(timings) * 1000:6.1f}ms  '
+        f'p50={statistics.median(timings) * 1000:6.1f}ms'
+    )
+
+
+async def main(boots: int, workers: int) -> None:
+    logging.getLogger().handlers[:] = [logging.NullHandler()]
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f'sqlite+aiosqlite:///{Path(tmp) / "bench.db"}'
+        engine = create_engine(url)
+        await setup_database(engine, dev_admin=False)
+        await engine.dispose()
+
+        for label, boot in (
+            ('create_all + admin check', legacy_boot),
+            ('schema version check   ', versioned_boot),
+        ):
+            single = await measure(boot, url, boots, 1)
+            crowd = await measure(boot, url, boots, workers)
+            print(
+                f'{label}: 1 worker {summary(single)} | '
+                f'{workers} workers {summary(crowd)}'
+            )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--boots', type=int, default=30)
+    parser.add_argument('--workers', type=int, default=8)
+    args = parser.parse_args()
+    asyncio.run(main(args.boots, args.workers))
@@ -0,0 +1,109 @@
+"""Bulk user import throughput through ``POST /users/import``.
+
+Streams a generated NDJSON body of N users into a file-backed SQLite
+database and reports rows per second, with the configured hash algorithm
+and cost (set ``PASSWORD_HASH_COST`` to try other costs).
+
+Run with::
+
+    python -m benchmarks.bench_user_import [--users N] [--chunk-size C]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from app.api.deps.auth import TokenPrincipal, get_current_principal
+from app.api.v1.routers.users import router as users
+from app.core.config import settings
+from app.core.security import hash_settings, shutdown_hash_executors
+from app.db.database import create_db_and_tables, get_session
+from app.models.user import Role
+
+
+async def body(count: int):
+    batch = []
+    for i in range(count):
+        batch.append(
+            json.dumps({
+                'name': f'reader {i}',
+                'email': f'reader{i}@example.com',
+                'password': f'password-{i}',
+            })
+        )
+        if len(batch) == 1000:  # noqa: PLR2004
+            yield ('\n'.join(batch) + '\n').encode()
+            batch = []
+    if batch:
+        yield '\n'.join(batch).encode()
+
+
+async def main(count: int, chunk_size: int) -> None:
+    logging.getLogger().handlers[:] = [logging.NullHandler()]
+    settings.IMPORT_CHUNK_SIZE = chunk_size
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(
+            f'sqlite+aiosqlite:///{Path(tmp) / "bench.db"}'
+        )
+        await create_db_and_tables(engine_override=engine)
+        session_factory = async_sessionmaker(
+            bind=engine, expire_on_commit=False, class_=AsyncSession
+        )
+
+        async def _session():
+            async with session_factory() as session:
+                yield session
+
+        app = FastAPI()
+        app.dependency_overrides[get_session] = _session
+        app.dependency_overrides[get_current_principal] = lambda: (
+            TokenPrincipal(id=0, role=Role.ADMIN)
+        )
+        app.include_router(users)
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url='http://bench', timeout=None
+        ) as client:
+            start = time.perf_counter()
+            resp = await client.post(
+                '/users/import',
+                content=body(count),
+                headers={'Content-Type': 'application/x-ndjson'},
+            )
+            elapsed = time.perf_counter() - start
+        resp.raise_for_status()
+        await engine.dispose()
+    shutdown_hash_executors()
+
+    algorithm, cost = hash_settings()
+    report = resp.json()
+    print(f'{algorithm} cost {cost}, chunks of {chunk_size}:')
+    print(
+        f'  created {report["created"]} failed {report["failed"]} '
+        f'in {elapsed:.1f}s ({report["created"] / elapsed:,.0f} rows/s)'
+    )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=10_000)
+    parser.add_argument(
+        '--chunk-size', type=int, default=settings.IMPORT_CHUNK_SIZE
+    )
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.chunk_size))
@@ -1,27 +1,33 @@
+from contextlib import contextmanager
+
 import pytest_asyncio as pytest
 from fastapi.testclient import TestClient
-from sqlalchemy.ext.asyncio import (
-    AsyncSession,
-    async_sessionmaker,
-    create_async_engine,
-)
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from app import main as app_main
-from app.api.deps.services import get_user_service
+from app.api.deps.auth import TokenPrincipal, get_current_principal
+from app.api.deps.services import (
+    get_book_service,
+    get_lending_service,
+    get_user_service,
+)
 from app.core.config import settings as app_settings
-from app.db.database import create_db_and_tables
+from app.db.database import create_db_and_tables, create_engine
 from app.models.book import Book, BookCategoryEnum
 from app.models.lending import Lending
 from app.models.user import Role
 from app.repositories.book import BookRepository
+from app.repositories.lending import LendingRepository
 from app.repositories.user import UserRepository
 from app.services.book import BookService
+from app.services.lending import LendingService
 from app.services.user import UserService
 
 
 @pytest.fixture
 async def engine():
-    engine = create_async_engine('sqlite+aiosqlite:///:memory:', future=True)
+    engine = create_engine('sqlite+aiosqlite:///:memory:')
     yield engine
     await engine.dispose()
 
@@ -88,9 +94,12 @@ async def lending_factory(async_session_factory, user_factory, book_factory):
         async with async_session_factory() as session:
             lending = Lending(user_id=user.id, book_id=book.id, quantity=qty)
             session.add(lending)
-            await session.flush()
-            lending.book = book
-            lending.apply()
+            await session.execute(
+                update(Book)
+                .where(Book.id == book.id)
+                .values(available_copies=Book.available_copies - qty)
+            )
+            lending.book = await session.get(Book, book.id)
             await session.commit()
             return lending
 
@@ -102,7 +111,7 @@ async def client(async_session_factory, prepare_db):
     orig_create = app_settings.CREATE_DEV_ADMIN
     app_settings.CREATE_DEV_ADMIN = False
 
-    async def _override_get_user_service(*args, **kwargs):
+    async def _override_get_user_service():
         async with async_session_factory() as session:
             repo = UserRepository(session)
             svc = UserService(repo, session=session)
@@ -112,6 +121,7 @@ async def client(async_session_factory, prepare_db):
         _override_get_user_service
     )
 
+    await app_main.rate_limit_storage.reset()
     client = TestClient(app_main.app)
 
     yield client
@@ -120,6 +130,72 @@ async def client(async_session_factory, prepare_db):
     app_settings.CREATE_DEV_ADMIN = orig_create
 
 
+@pytest.fixture
+def principal():
+    """Role the service clients below authenticate as (user id 1), or None
+    for anonymous requests. Override it in a module to change the role."""
+    return None
+
+
+@contextmanager
+def _serving(dependency, build, session_factory, role):
+    """A TestClient whose `dependency` is `build(session)` on the test
+    database, authenticated as `role` unless it is None."""
+
+    async def _override():
+        async with session_factory() as session:
+            yield build(session)
+
+    overrides = app_main.app.dependency_overrides
+    overrides[dependency] = _override
+    if role is not None:
+        overrides[get_current_principal] = lambda: TokenPrincipal(
+            id=1, role=role
+        )
+    try:
+        yield TestClient(app_main.app)
+    finally:
+        overrides.pop(dependency, None)
+        overrides.pop(get_current_principal, None)
+
+
+@pytest.fixture
+async def books_client(async_session_factory, prepare_db, principal):
+    await app_main.rate_limit_storage.reset()
+    with _serving(
+        get_book_service,
+        lambda session: BookService(BookRepository(session), session=session),
+        async_session_factory,
+        principal,
+    ) as client:
+        yield client
+
+
+@pytest.fixture
+async def lendings_client(async_session_factory, prepare_db, principal):
+    await app_main.rate_limit_storage.reset()
+    with _serving(
+        get_lending_service,
+        lambda session: LendingService(
+            LendingRepository(session), BookRepository(session), session
+        ),
+        async_session_factory,
+        principal,
+    ) as client:
+        yield client
+
+
+@pytest.fixture
+def byte_chunks():
+    """Split bytes into small chunks, the way a streamed body arrives."""
+
+    async def _chunks(data: bytes, size: int = 7):
+        for i in range(0, len(data), size):
+            yield data[i : i + size]
+
+    return _chunks
+
+
 @pytest.fixture
 async def book_service(async_session_factory, prepare_db):
     async with async_session_factory() as session:
@@ -0,0 +1,177 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytest_asyncio
+from fastapi import status
+from sqlalchemy import func, select, text, update
+
+from app.db.database import create_engine
+from app.db.migrations import migrate
+from app.models.book import Book, BookCategoryEnum
+from app.repositories.book import BookQuery, BookRepository
+
+CUTOFF = datetime(2024, 6, 1)
+
+
+@pytest_asyncio.fixture
+async def shelf(async_session_factory, book_factory):
+    books = {
+        'Dune': await book_factory(name='Dune', author='Frank Herbert'),
+        'SICP': await book_factory(
+            name='SICP', author='Abelson', category=BookCategoryEnum.TECH
+        ),
+        'Algorithms': await book_factory(
+            name='Algorithms', author='Sedgewick', category='tech'
+        ),
+        'Emma': await book_factory(name='Emma', author='Jane Austen'),
+    }
+    async with async_session_factory() as session:
+        await session.execute(
+            update(Book).where(Book.name == 'SICP').values(available_copies=0)
+        )
+        for offset, name in enumerate(['Dune', 'SICP', 'Algorithms']):
+            await session.execute(
+                update(Book)
+                .where(Book.name == name)
+                .values(created_at=CUTOFF - timedelta(days=offset + 1))
+            )
+        await session.execute(
+            update(Book)
+            .where(Book.name == 'Emma')
+            .values(created_at=CUTOFF + timedelta(days=1))
+        )
+        await session.commit()
+    return books
+
+
+async def _names(async_session_factory, query):
+    async with async_session_factory() as session:
+        repo = BookRepository(session)
+        books, total = await repo.list_books(query=query)
+    assert total == len(books)
+    return [book.name for book in books]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ('query', 'expected'),
+    [
+        (BookQuery(category=BookCategoryEnum.TECH), ['SICP', 'Algorithms']),
+        (
+            BookQuery(category=BookCategoryEnum.TECH, available_only=True),
+            ['Algorithms'],
+        ),
+        (BookQuery(author='frank HERBERT'), ['Dune']),
+        (BookQuery(created_after=CUTOFF), ['Emma']),
+        (
+            BookQuery(created_after=CUTOFF.replace(tzinfo=timezone.utc)),
+            ['Emma'],
+        ),
+        (BookQuery(sort='name'), ['Algorithms', 'Dune', 'Emma', 'SICP']),
+        (BookQuery(sort='newest'), ['Emma', 'Dune', 'SICP', 'Algorithms']),
+    ],
+)
+async def test_list_books_filters_and_sorts(
+    async_session_factory, shelf, query, expected
+):
+    assert await _names(async_session_factory, query) == expected
+
+
+@pytest.mark.asyncio
+async def test_keyset_pages_follow_the_sort(async_session_factory, shelf):
+    query = BookQuery(sort='name')
+    names, cursor = [], ''
+    async with async_session_factory() as session:
+        repo = BookRepository(session)
+        while cursor is not None:
+            books, cursor = await repo.list_books_keyset(
+                limit=3, cursor=cursor, query=query
+            )
+            names += [book.name for book in books]
+
+    assert names == ['Algorithms', 'Dune', 'Emma', 'SICP']
+
+
+@pytest.mark.usefixtures('shelf')
+def test_books_endpoint_filters_and_sorts(books_client):
+    body = books_client.get(
+        '/books/',
+        params={'category': 'tech', 'sort': 'name', 'available_only': False},
+    ).json()
+    assert [b['name'] for b in body['items']] == ['Algorithms', 'SICP']
+    assert body['total'] == len(body['items'])
+
+    body = books_client.get(
+        '/books/',
+        params={'created_after': '2024-06-01T00:00:00Z', 'cursor': ''},
+    ).json()
+    assert [b['name'] for b in body['items']] == ['Emma']
+    assert body['total'] == 1
+
+
+@pytest.mark.parametrize(
+    'params', [{'sort': 'created_at'}, {'category': 'poetry'}]
+)
+def test_books_endpoint_rejects_unknown_sort_and_category(
+    books_client, params
+):
+    resp = books_client.get('/books/', params=params)
+    assert resp.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ('query', 'index'),
+    [
+        (BookQuery(sort='name'), 'ix_books_name'),
+        (BookQuery(sort='newest'), 'ix_books_created_at'),
+        (BookQuery(category=BookCategoryEnum.TECH), 'ix_books_category'),
+        (
+            BookQuery(category=BookCategoryEnum.TECH, sort='name'),
+            'ix_books_category_name',
+        ),
+        (
+            BookQuery(category=BookCategoryEnum.TECH, available_only=True),
+            'ix_books_available_category',
+        ),
+        (BookQuery(author='Frank Herbert'), 'ix_books_author_nocase'),
+        (BookQuery(available_only=True), 'ix_books_available'),
+        (
+            BookQuery(created_after=CUTOFF, sort='newest'),
+            'ix_books_created_at',
+        ),
+    ],
+)
+async def test_listing_walks_an_index_in_keyset_order(tmp_path, query, index):
+    # The index serves both the filter and the (key..., id) keyset order,
+    # so a page reads `limit` entries and never sorts.
+    order = query.order
+    stmt = query.apply(select(Book)).order_by(
+        *(key.desc() if order.descending else key for key in order.keys)
+    )
+    plan = await _plan(tmp_path, stmt.limit(10))
+    assert f'USING INDEX {index} ' in f'{plan} '
+    assert 'TEMP B-TREE' not in plan
+
+
+@pytest.mark.asyncio
+async def test_created_after_count_uses_index(tmp_path):
+    # Listing by id with a LIMIT walks the primary key instead; the range
+    # index serves the total.
+    query = BookQuery(created_after=CUTOFF)
+    stmt = query.apply(select(func.count()).select_from(Book))
+    assert 'ix_books_created_at' in await _plan(tmp_path, stmt)
+
+
+async def _plan(tmp_path, stmt):
+    engine = create_engine(f'sqlite+aiosqlite:///{tmp_path / "plan.db"}')
+    try:
+        await migrate(engine)
+        compiled = stmt.compile(
+            engine.sync_engine, compile_kwargs={'literal_binds': True}
+        )
+        async with engine.connect() as conn:
+            plan = await conn.execute(text(f'EXPLAIN QUERY PLAN {compiled}'))
+            return ' '.join(row.detail for row in plan)
+    finally:
+        await engine.dispose()
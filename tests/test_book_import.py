@@ -0,0 +1,166 @@
+import json
+
+import pytest
+import pytest_asyncio
+from fastapi import status
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from app.db.import_books import import_books_file
+from app.db.query_stats import track_queries
+from app.models.book import Book
+from app.models.user import Role
+from app.repositories.book import BookRepository
+from app.repositories.row_count import RowCountRepository
+from app.services.book import BookService
+from app.services.importing import NDJSON, parse_rows, retry_on_conflict
+
+CSV_BODY = (
+    'name,author,category,total_copies\n'
+    'Dune,Frank Herbert,fiction,2\n'
+    'SICP,Abelson,TECH,\n'
+    ' dune ,frank  herbert,fiction,1\n'
+    'Old,Someone,fiction,1\n'
+    'Nameless,,fiction,1\n'
+    ',Nobody,tech,1\n'
+    'Poems,Poet,poetry,1\n'
+    'Zero,Author,tech,0\n'
+    'Short,Author\n'
+)
+
+
+@pytest.fixture
+def principal():
+    return Role.ADMIN
+
+
+@pytest_asyncio.fixture
+async def old_book(book_factory):
+    return await book_factory(name='Old', author='Someone', total_copies=3)
+
+
+async def _books(async_session_factory):
+    async with async_session_factory() as session:
+        result = await session.execute(select(Book).order_by(Book.id))
+        return {
+            book.name: (book.total_copies, book.available_copies)
+            for book in result.scalars()
+        }
+
+
+def _post(client, upsert=False):
+    return client.post(
+        '/books/import',
+        params={'upsert': upsert},
+        content=CSV_BODY.encode(),
+        headers={'Content-Type': 'text/csv'},
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures('old_book')
+async def test_import_books_endpoint_reports_row_errors(
+    books_client, async_session_factory
+):
+    resp = _post(books_client)
+
+    assert resp.status_code == status.HTTP_200_OK, resp.text
+    body = resp.json()
+    assert (body['created'], body['updated']) == (3, 0)
+    assert body['errors'] == [
+        {'row': 3, 'detail': 'Duplicate book in import'},
+        {'row': 6, 'detail': 'Missing field(s): name'},
+        {'row': 7, 'detail': 'Invalid category: poetry'},
+        {'row': 8, 'detail': 'Invalid total_copies: 0'},
+        {'row': 9, 'detail': 'Expected 4 columns, got 2'},
+        {'row': 4, 'detail': 'Book already exists'},
+    ]
+    assert body['failed'] == len(body['errors'])
+    assert body['rows_per_second'] > 0
+    assert await _books(async_session_factory) == {
+        'Old': (3, 3),
+        'Dune': (2, 2),
+        'SICP': (1, 1),
+        'Nameless': (1, 1),
+    }
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures('old_book')
+async def test_import_books_upsert_adds_copies(
+    books_client, async_session_factory
+):
+    body = _post(books_client, upsert=True).json()
+
+    assert (body['created'], body['updated'], body['failed']) == (3, 2, 4)
+    assert await _books(async_session_factory) == {
+        'Old': (4, 4),
+        'Dune': (3, 3),
+        'SICP': (1, 1),
+        'Nameless': (1, 1),
+    }
+
+
+@pytest.mark.asyncio
+async def test_import_books_batches_queries_per_chunk(
+    async_session_factory, prepare_db, byte_chunks
+):
+    lines = [
+        json.dumps({'name': f'Book {i}', 'category': 'tech'}) for i in range(5)
+    ]
+    body = '\n'.join(lines).encode()
+
+    async with async_session_factory() as session:
+        svc = BookService(BookRepository(session), session=session)
+        with track_queries() as stats:
+            report = await svc.import_books(
+                parse_rows(byte_chunks(body), NDJSON), chunk_size=2
+            )
+        total = await RowCountRepository(session).get('books')
+
+    assert report.created == len(lines)
+    assert total == len(lines)
+    lookups = [s for s in stats.statements if ' IN (' in s]
+    assert sum(stats.statements[s] for s in lookups) == 3  # noqa: PLR2004
+    inserts = [s for s in stats.statements if s.startswith('INSERT')]
+    assert sum(stats.statements[s] for s in inserts) == 3  # noqa: PLR2004
+
+
+@pytest.mark.asyncio
+async def test_import_books_file_cli(engine, prepare_db, tmp_path):
+    path = tmp_path / 'catalogue.ndjson'
+    path.write_text(
+        '{"name": "Dune", "author": "Frank Herbert", "category": "fiction"}\n'
+        '{"name": "Dune", "author": "Frank Herbert", "category": "fiction",'
+        ' "total_copies": 2}\n'
+    )
+
+    report = await import_books_file(
+        str(path), upsert=True, engine_override=engine
+    )
+
+    assert (report.created, report.updated, report.failed) == (1, 1, 0)
+
+
+@pytest.mark.asyncio
+async def test_retry_on_conflict_looks_again_once():
+    class Session:
+        rollbacks = 0
+
+        async def rollback(self):
+            self.rollbacks += 1
+
+    conflict = IntegrityError('INSERT', {}, Exception('UNIQUE'))
+    outcomes = [conflict, 'inserted', conflict, conflict]
+
+    async def attempt():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    session = Session()
+    assert await retry_on_conflict(session, attempt) == 'inserted'
+    with pytest.raises(IntegrityError):
+        await retry_on_conflict(session, attempt)
+    assert session.rollbacks == 3  # noqa: PLR2004
@@ -1,4 +1,4 @@
-from app.models.book import Book, BookCategoryEnum
+from app.models.book import Book, BookCategoryEnum, title_key
 
 PRAGMATIC_TITLE = 'The Pragmatic Programmer'
 PRAGMATIC_AUTHOR = 'Andrew Hunt'
@@ -66,3 +66,13 @@ def test_add_copies_increases_both():
     b.add_copies(ADD_QTY)
     assert b.total_copies == INITIAL_TOTAL + ADD_QTY
     assert b.available_copies == INITIAL_AVAILABLE + ADD_QTY
+
+
+def test_title_key_folds_case_and_whitespace():
+    book = Book(name='  The  Pragmatic\tProgrammer ', author='ANDREW Hunt')
+
+    assert book.title_key == title_key(PRAGMATIC_TITLE, PRAGMATIC_AUTHOR)
+    assert title_key(CLEAN_CODE_TITLE, None) == title_key('clean code', '')
+
+    book.author = 'Dave Thomas'
+    assert book.title_key == title_key(PRAGMATIC_TITLE, 'dave thomas')
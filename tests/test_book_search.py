@@ -0,0 +1,114 @@
+import pytest
+import pytest_asyncio
+from fastapi import status
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.db.migrations import BOOKS_FTS_TRIGGERS
+from app.repositories.book import BookRepository
+
+TITLES = [
+    ('Dune', 'Frank Herbert'),
+    ('Dune Messiah', 'Frank Herbert'),
+    ('Children of Dune', 'Frank Herbert'),
+    ('Duna e o Deserto', 'Autora Convidada'),
+    ('Neuromancer', 'William Gibson'),
+    ('Memórias Póstumas', 'Machado de Assis'),
+]
+
+
+@pytest_asyncio.fixture
+async def catalogue(book_factory):
+    return {
+        name: await book_factory(name=name, author=author)
+        for name, author in TITLES
+    }
+
+
+async def _search(async_session_factory, query, limit=10, cursor=None):
+    async with async_session_factory() as session:
+        return await BookRepository(session).search_books(
+            query, limit=limit, cursor=cursor
+        )
+
+
+@pytest.mark.asyncio
+async def test_search_matches_prefixes_and_folds_accents(
+    async_session_factory, catalogue
+):
+    books, _ = await _search(async_session_factory, 'frank dun')
+    assert {b.name for b in books} == {
+        'Dune',
+        'Dune Messiah',
+        'Children of Dune',
+    }
+
+    books, _ = await _search(async_session_factory, 'memorias machado')
+    assert [b.name for b in books] == ['Memórias Póstumas']
+
+    assert await _search(async_session_factory, '"*) OR (') == ([], None)
+
+
+@pytest.mark.asyncio
+async def test_search_pages_by_rank(async_session_factory, catalogue):
+    everything, _ = await _search(async_session_factory, 'dune')
+    pages, cursor = [], ''
+    while cursor is not None:
+        books, cursor = await _search(async_session_factory, 'dune', 1, cursor)
+        pages.extend(books)
+
+    assert [b.id for b in pages] == [b.id for b in everything]
+    assert everything[0].name == 'Dune'
+
+
+@pytest.mark.asyncio
+async def test_search_index_follows_renames(async_session_factory, catalogue):
+    async with async_session_factory() as session:
+        book = await BookRepository(session).get_by_id(
+            catalogue['Neuromancer'].id
+        )
+        book.name = 'Count Zero'
+        await session.commit()
+
+    assert await _search(async_session_factory, 'neuromancer') == ([], None)
+    books, _ = await _search(async_session_factory, 'count zero')
+    assert [b.id for b in books] == [catalogue['Neuromancer'].id]
+
+
+@pytest.mark.asyncio
+async def test_search_falls_back_to_like_without_fts(
+    engine, async_session_factory, catalogue
+):
+    async with engine.begin() as conn:
+        for statement in BOOKS_FTS_TRIGGERS:
+            name = statement.split()[5]
+            await conn.execute(text(f'DROP TRIGGER {name}'))
+        await conn.execute(text('DROP TABLE books_fts'))
+
+    books, _ = await _search(async_session_factory, 'dune herbert')
+    assert [b.name for b in books] == [
+        'Dune',
+        'Dune Messiah',
+        'Children of Dune',
+    ]
+
+
+@pytest.mark.usefixtures('catalogue')
+def test_search_endpoint(books_client):
+    resp = books_client.get('/books/search', params={'q': 'gibson'})
+    assert resp.status_code == status.HTTP_200_OK
+    body = resp.json()
+    assert [b['name'] for b in body['items']] == ['Neuromancer']
+    assert body['next_cursor'] is None
+
+    missing = books_client.get('/books/search')
+    assert missing.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
+
+
+def test_search_endpoint_rate_limit(books_client):
+    rules = settings.RATE_LIMIT_RULES
+    resp = books_client.get('/books/search', params={'q': 'dune'})
+
+    limit = resp.headers['RateLimit-Limit']
+    assert limit == rules['GET /books/search'].split('/')[0]
+    assert int(limit) >= int(rules['GET /books/'].split('/')[0])
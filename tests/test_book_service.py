@@ -10,6 +10,7 @@ from app.models.book import BookCategoryEnum
 from app.services.book import BookService
 
 TOTAL_COPIES = 2
+CATALOGUE_SIZE = 12
 
 
 @pytest.mark.asyncio
@@ -42,6 +43,32 @@ async def test_create_book_duplicate(book_service: BookService):
         await book_service.create_book(data)
 
 
+@pytest.mark.asyncio
+async def test_create_book_duplicate_beyond_first_page(
+    book_service: BookService,
+):
+    for i in range(CATALOGUE_SIZE):
+        await book_service.create_book(
+            BookCreate(
+                name=f'Título {i}',
+                author='Autor',
+                total_copies=1,
+                category=BookCategoryEnum.FICTION,
+            )
+        )
+    with pytest.raises(BookAlreadyExists):
+        await book_service.create_book(
+            BookCreate(
+                name='  título   0',
+                author='AUTOR ',
+                total_copies=1,
+                category=BookCategoryEnum.FICTION,
+            )
+        )
+    _, total = await book_service.list_books()
+    assert total == CATALOGUE_SIZE
+
+
 @pytest.mark.asyncio
 async def test_create_book_invalid_data(book_service: BookService):
     data = BookCreate(
@@ -1,8 +1,13 @@
+import asyncio
+
+import pytest
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
 from app.db import database
 
+WRITERS = 8
+
 
 def test_settings_DATABASE_URL_is_sqlite():
     assert settings.DATABASE_URL.startswith('sqlite+aiosqlite://')
@@ -12,3 +17,57 @@ def test_engine_and_sessionmaker_present():
     assert database.engine is not None
     session = database.async_session()
     assert isinstance(session, AsyncSession)
+
+
+@pytest.mark.asyncio
+async def test_file_engine_applies_sqlite_profile(tmp_path):
+    engine = database.create_engine(
+        f'sqlite+aiosqlite:///{tmp_path / "profile.db"}'
+    )
+    try:
+        async with engine.connect() as conn:
+            pragmas = {
+                name: (await conn.exec_driver_sql(f'PRAGMA {name}')).scalar()
+                for name in ('journal_mode', 'synchronous', 'busy_timeout')
+            }
+    finally:
+        await engine.dispose()
+
+    assert pragmas == {
+        'journal_mode': 'wal',
+        'synchronous': 1,
+        'busy_timeout': settings.SQLITE_BUSY_TIMEOUT_MS,
+    }
+    assert engine.pool.size() == settings.DB_POOL_SIZE
+    assert engine.pool._pre_ping == settings.DB_POOL_PRE_PING
+
+
+def test_memory_database_detection():
+    assert database.is_memory_database('sqlite+aiosqlite:///:memory:')
+    assert database.is_memory_database(
+        'sqlite+aiosqlite:///file:mem?mode=memory&cache=shared&uri=true'
+    )
+    assert not database.is_memory_database('sqlite+aiosqlite:///./lib.db')
+
+
+@pytest.mark.asyncio
+async def test_concurrent_writers_wait_instead_of_failing(tmp_path):
+    engine = database.create_engine(
+        f'sqlite+aiosqlite:///{tmp_path / "writers.db"}'
+    )
+    try:
+        async with engine.begin() as conn:
+            await conn.exec_driver_sql('CREATE TABLE t (n INTEGER)')
+
+        async def write(n):
+            async with engine.begin() as conn:
+                await conn.exec_driver_sql('SELECT count(*) FROM t')
+                await asyncio.sleep(0)
+                await conn.exec_driver_sql(f'INSERT INTO t VALUES ({n})')
+
+        await asyncio.gather(*(write(n) for n in range(WRITERS)))
+        async with engine.connect() as conn:
+            count = await conn.exec_driver_sql('SELECT count(*) FROM t')
+            assert count.scalar() == WRITERS
+    finally:
+        await engine.dispose()
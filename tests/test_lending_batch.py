@@ -0,0 +1,268 @@
+import asyncio
+import contextlib
+from datetime import timedelta
+
+import pytest
+import pytest_asyncio
+from fastapi import status
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.api.v1.schemas.lending import LendingBatchCreate, LendingBatchReturn
+from app.core.exceptions import (
+    BaseServiceException,
+    BookNotAvailable,
+    LendingAlreadyExists,
+    LendingLimitReached,
+    LendingNotFound,
+)
+from app.db.database import create_db_and_tables, create_engine
+from app.db.query_stats import track_queries
+from app.models.book import Book, BookCategoryEnum
+from app.models.user import Role, User
+from app.repositories.book import BookRepository
+from app.repositories.lending import LendingRepository
+from app.services.lending import FINE_PER_DAY, MAX_LENDINGS, LendingService
+
+DAYS_LATE = 6
+
+
+@pytest_asyncio.fixture
+async def service(async_session_factory, prepare_db):
+    async with async_session_factory() as session:
+        yield LendingService(
+            LendingRepository(session), BookRepository(session), session
+        )
+
+
+@pytest_asyncio.fixture
+async def cart(book_factory):
+    return [await book_factory(name=f'Book {i}') for i in range(3)]
+
+
+@pytest_asyncio.fixture
+async def borrower(user_factory, lending_factory, book_factory, cart):
+    """A user holding the first of four books."""
+    user = await user_factory()
+    await lending_factory(user=user, book=cart[0])
+    return user, [*cart, await book_factory(name='Book 3')]
+
+
+async def _available(async_session_factory, books):
+    async with async_session_factory() as session:
+        return [
+            (await session.get(Book, book.id)).available_copies
+            for book in books
+        ]
+
+
+@pytest.mark.asyncio
+async def test_checkout_cart_in_one_transaction(
+    service, async_session_factory, user_factory, cart
+):
+    user = await user_factory()
+    with track_queries() as stats:
+        result = await service.create_lendings(
+            LendingBatchCreate(user_id=user.id, book_ids=[b.id for b in cart])
+        )
+
+    assert (result.created, result.failed) == (len(cart), 0)
+    assert [item.lending.book_id for item in result.items] == [
+        b.id for b in cart
+    ]
+    assert await _available(async_session_factory, cart) == [0, 0, 0]
+    # One guarded update of the books, one read of the user's lendings and
+    # one insert of the lendings.
+    assert stats.count == 3  # noqa: PLR2004
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ('picks', 'error'),
+    [
+        ([1, 1], LendingAlreadyExists),
+        ([1, 0], LendingAlreadyExists),
+        ([1, None], BookNotAvailable),
+        ([1, 2, 3], LendingLimitReached),
+    ],
+)
+async def test_atomic_checkout_rejects_whole_cart(
+    service, async_session_factory, borrower, picks, error
+):
+    user, shelf = borrower
+    ids = [shelf[i].id if i is not None else 999 for i in picks]
+
+    with pytest.raises(error):
+        await service.create_lendings(
+            LendingBatchCreate(user_id=user.id, book_ids=ids)
+        )
+
+    assert await _available(async_session_factory, shelf) == [0, 1, 1, 1]
+
+
+@pytest.mark.asyncio
+async def test_checkout_reports_each_item(
+    service, async_session_factory, user_factory, cart, book_factory
+):
+    user = await user_factory()
+    extra = await book_factory(name='Book 3')
+    ids = [cart[0].id, cart[0].id, 999, cart[1].id, cart[2].id, extra.id]
+
+    result = await service.create_lendings(
+        LendingBatchCreate(user_id=user.id, book_ids=ids, atomic=False)
+    )
+
+    assert result.created == MAX_LENDINGS
+    assert [item.error for item in result.items] == [
+        None,
+        'User already has an active lending for this book',
+        'Book is not available for lending',
+        None,
+        None,
+        'User has reached the maximum number of active lendings',
+    ]
+    assert await _available(async_session_factory, [*cart, extra]) == [
+        0,
+        0,
+        0,
+        1,
+    ]
+
+
+@pytest.mark.asyncio
+async def test_batch_return_sums_fines(
+    service, async_session_factory, user_factory, lending_factory, cart
+):
+    user = await user_factory()
+    lendings = [await lending_factory(user=user, book=b) for b in cart[:2]]
+    late = lendings[0].lending_date + timedelta(days=14 + DAYS_LATE)
+    ids = [lendings[0].id, lendings[1].id]
+
+    with pytest.raises(LendingNotFound):
+        await service.return_lendings(
+            LendingBatchReturn(lending_ids=[*ids, 999], returned_at=late)
+        )
+    with track_queries() as stats:
+        result = await service.return_lendings(
+            LendingBatchReturn(
+                lending_ids=[*ids, ids[0]], returned_at=late, atomic=False
+            )
+        )
+
+    assert (result.returned, result.failed) == (2, 1)
+    assert result.total_fine == 2 * FINE_PER_DAY * DAYS_LATE
+    assert result.items[-1].error == 'Lending not found'
+    assert await _available(async_session_factory, cart) == [1, 1, 1]
+    # One read of lendings and books, one update for each table.
+    assert stats.count == 3  # noqa: PLR2004
+
+
+@pytest_asyncio.fixture
+async def file_db(tmp_path):
+    """Sessions on a file database, where each one has its own connection
+    and concurrent checkouts really overlap."""
+    engine = create_engine(f'sqlite+aiosqlite:///{tmp_path / "desk.db"}')
+    await create_db_and_tables(engine_override=engine)
+    factory = async_sessionmaker(
+        bind=engine, expire_on_commit=False, class_=AsyncSession
+    )
+    async with factory() as session:
+        session.add_all([
+            User(name=f'user {i}', email=f'user{i}@example.com', password='x')
+            for i in range(2)
+        ])
+        session.add_all([
+            Book(name=f'Book {i}', category=BookCategoryEnum.FICTION)
+            for i in range(MAX_LENDINGS + 1)
+        ])
+        await session.commit()
+    yield factory
+    await engine.dispose()
+
+
+class _RacingLendingRepository(LendingRepository):
+    """Once it has read the user's lendings, waits a moment for the other
+    checkout to read them too, which opens the check-then-write window."""
+
+    def __init__(self, session, barrier):
+        super().__init__(session)
+        self.barrier = barrier
+
+    async def active_book_ids(self, *args):
+        found = await super().active_book_ids(*args)
+        with contextlib.suppress(TimeoutError):
+            await asyncio.wait_for(asyncio.shield(self.barrier.wait()), 0.2)
+        return found
+
+
+async def _checkout_concurrently(factory, carts):
+    barrier = asyncio.Barrier(len(carts))
+
+    async def _checkout(user_id, book_ids):
+        async with factory() as session:
+            service = LendingService(
+                _RacingLendingRepository(session, barrier),
+                BookRepository(session),
+                session,
+            )
+            return await service.create_lendings(
+                LendingBatchCreate(user_id=user_id, book_ids=book_ids)
+            )
+
+    return await asyncio.gather(
+        *(_checkout(user_id, ids) for user_id, ids in carts),
+        return_exceptions=True,
+    )
+
+
+@pytest.mark.asyncio
+async def test_concurrent_checkouts_never_oversell(file_db):
+    results = await _checkout_concurrently(file_db, [(1, [1]), (2, [1])])
+
+    assert sorted(type(r).__name__ for r in results) == [
+        'BookNotAvailable',
+        'LendingBatchResult',
+    ]
+    assert await _available(file_db, [Book(id=1)]) == [0]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_checkouts_respect_lending_limit(file_db):
+    held = list(range(1, MAX_LENDINGS))
+    await _checkout_concurrently(file_db, [(1, held)])
+
+    results = await _checkout_concurrently(
+        file_db, [(1, [MAX_LENDINGS]), (1, [MAX_LENDINGS + 1])]
+    )
+
+    errors = [r for r in results if isinstance(r, BaseServiceException)]
+    assert [type(e) for e in errors] == [LendingLimitReached]
+    assert sum(await _available(file_db, [Book(id=3), Book(id=4)])) == 1
+
+
+@pytest.fixture
+def principal():
+    return Role.LIBRARIAN
+
+
+@pytest.mark.asyncio
+async def test_batch_endpoints(lendings_client, user_factory, cart):
+    user = await user_factory()
+    book_ids = [b.id for b in cart[:2]]
+
+    resp = lendings_client.post(
+        '/lendings/batch', json={'user_id': user.id, 'book_ids': book_ids}
+    )
+    assert resp.status_code == status.HTTP_200_OK, resp.text
+    lending_ids = [item['lending']['id'] for item in resp.json()['items']]
+
+    resp = lendings_client.post(
+        '/lendings/returns/batch', json={'lending_ids': lending_ids}
+    )
+    assert resp.status_code == status.HTTP_200_OK, resp.text
+    assert resp.json()['returned'] == len(lending_ids)
+    assert resp.json()['total_fine'] == 0
+
+    resp = lendings_client.post(
+        '/lendings/returns/batch', json={'lending_ids': lending_ids}
+    )
+    assert resp.status_code == LendingNotFound.code
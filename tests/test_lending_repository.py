@@ -1,17 +1,15 @@
 import pytest
+from sqlalchemy.exc import InvalidRequestError
 
+from app.db.query_stats import track_queries
 from app.models.lending import Lending
 from app.repositories.lending import LendingRepository
 
 USER_ID_1 = 1
-USER_ID_2 = 2
-USER_ID_3 = 3
 USER_ID_4 = 4
 USER_ID_5 = 5
 USER_ID_6 = 6
 BOOK_ID_1 = 1
-BOOK_ID_2 = 2
-BOOK_ID_3 = 3
 BOOK_ID_4 = 4
 BOOK_ID_5 = 5
 BOOK_ID_6 = 6
@@ -28,29 +26,6 @@ async def test_create_lending(async_session_factory, prepare_db):
         assert result.book_id == BOOK_ID_1
 
 
-@pytest.mark.asyncio
-async def test_get_active_lendings_by_user(async_session_factory, prepare_db):
-    async with async_session_factory() as session:
-        repo = LendingRepository(session)
-        lending = Lending(user_id=USER_ID_2, book_id=BOOK_ID_2, quantity=1)
-        await repo.create_lending(lending)
-        result = await repo.get_active_lendings_by_user(USER_ID_2)
-        assert len(result) == 1
-        assert result[0].user_id == USER_ID_2
-
-
-@pytest.mark.asyncio
-async def test_get_lending_by_user_and_book(async_session_factory, prepare_db):
-    async with async_session_factory() as session:
-        repo = LendingRepository(session)
-        lending = Lending(user_id=USER_ID_3, book_id=BOOK_ID_3, quantity=1)
-        await repo.create_lending(lending)
-        result = await repo.get_lending_by_user_and_book(USER_ID_3, BOOK_ID_3)
-        assert result is not None
-        assert result.user_id == USER_ID_3
-        assert result.book_id == BOOK_ID_3
-
-
 @pytest.mark.asyncio
 async def test_get_lending_by_id(async_session_factory, prepare_db):
     async with async_session_factory() as session:
@@ -83,3 +58,17 @@ async def test_user_lending_history(async_session_factory, prepare_db):
         result = await repo.user_lending_history(USER_ID_6)
         assert len(result) >= 1
         assert result[0].user_id == USER_ID_6
+
+
+@pytest.mark.asyncio
+async def test_lending_reads_do_not_load_relations(
+    async_session_factory, lending_factory
+):
+    created = await lending_factory()
+    async with async_session_factory() as session:
+        repo = LendingRepository(session)
+        with track_queries() as stats:
+            lending = await repo.get_lending_by_id(created.id)
+        assert 'JOIN' not in next(iter(stats.statements))
+        with pytest.raises(InvalidRequestError):
+            _ = lending.user
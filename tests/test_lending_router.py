@@ -28,7 +28,7 @@ def test_create_lending_endpoint(client, user_factory, book_factory):
 
 def test_lending_limit_endpoint(client, user_factory, book_factory):
     user = asyncio.run(user_factory(role='admin'))
-    books = [asyncio.run(book_factory()) for _ in range(3)]
+    books = [asyncio.run(book_factory(name=f'Book {i}')) for i in range(3)]
     token = create_access_token({'sub': str(user.id)})
     for book in books:
         client.post(
@@ -45,7 +45,7 @@ async def test_lending_limit(
 ):
     async with async_session_factory() as session:
         user = await user_factory()
-        books = [await book_factory() for _ in range(3)]
+        books = [await book_factory(name=f'Book {i}') for i in range(3)]
         lending_repo = LendingRepository(session)
         book_repo = BookRepository(session)
         service = LendingService(
@@ -109,6 +109,9 @@ async def test_return_lending_success(
         assert result.lending_id == lending.id
         assert result.fine == 0
 
+        returned_book = await book_repo.get_by_id(book.id)
+        assert returned_book.available_copies == book.total_copies
+
 
 @pytest.mark.asyncio
 async def test_return_lending_with_fine(
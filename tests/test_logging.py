@@ -0,0 +1,87 @@
+import io
+import json
+import logging
+
+from fastapi import FastAPI, HTTPException, status
+from fastapi.testclient import TestClient
+
+from app.core.logging_config import (
+    JsonFormatter,
+    configure_logging,
+    request_id_var,
+)
+from app.main import LoggingMiddleware
+
+REQUEST_ID = 'abc-123'
+
+
+def _app(sample_rate):
+    app = FastAPI()
+    app.add_middleware(LoggingMiddleware, sample_rate=sample_rate)
+
+    @app.get('/ok')
+    def ok():
+        return {'request_id': request_id_var.get()}
+
+    @app.get('/fail')
+    def fail():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+
+    return app
+
+
+def test_json_formatter_includes_extra_and_request_id():
+    record = logging.LogRecord(
+        'LIBRARY', logging.INFO, __file__, 1, 'hello %s', ('world',), None
+    )
+    record.request_id = REQUEST_ID
+    record.status = status.HTTP_200_OK
+
+    data = json.loads(JsonFormatter().format(record))
+    assert data['message'] == 'hello world'
+    assert data['request_id'] == REQUEST_ID
+    assert data['status'] == status.HTTP_200_OK
+    assert data['level'] == 'INFO'
+
+
+def test_configure_logging_writes_through_listener():
+    stream = io.StringIO()
+    root = logging.getLogger()
+    previous_level, previous_handlers = root.level, root.handlers[:]
+    listener = configure_logging('INFO', 'json', stream=stream)
+    try:
+        token = request_id_var.set(REQUEST_ID)
+        logging.getLogger('LIBRARY').info('queued %d', 1)
+        request_id_var.reset(token)
+    finally:
+        listener.stop()
+        root.setLevel(previous_level)
+        root.handlers[:] = previous_handlers
+
+    data = json.loads(stream.getvalue().splitlines()[-1])
+    assert data['message'] == 'queued 1'
+    assert data['request_id'] == REQUEST_ID
+
+
+def test_middleware_propagates_request_id():
+    client = TestClient(_app(sample_rate=1.0))
+
+    resp = client.get('/ok', headers={'X-Request-ID': REQUEST_ID})
+    assert resp.headers['X-Request-ID'] == REQUEST_ID
+    assert resp.json()['request_id'] == REQUEST_ID
+
+    resp = client.get('/ok', headers={'X-Request-ID': 'bad id\n'})
+    assert resp.headers['X-Request-ID'] != 'bad id\n'
+    assert resp.json()['request_id'] == resp.headers['X-Request-ID']
+
+
+def test_middleware_samples_successes_but_logs_errors(caplog):
+    client = TestClient(_app(sample_rate=0.0))
+
+    with caplog.at_level(logging.INFO, logger='LIBRARY'):
+        client.get('/ok')
+        client.get('/fail')
+
+    access = [r for r in caplog.records if r.msg.startswith('RESPONSE')]
+    assert [r.status for r in access] == [status.HTTP_404_NOT_FOUND]
+    assert access[0].path == '/fail'
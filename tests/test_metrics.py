@@ -0,0 +1,82 @@
+import pytest
+from fastapi import FastAPI, status
+from fastapi.testclient import TestClient
+
+from app.core.metrics import (
+    HTTP_LATENCY,
+    HTTP_REQUESTS,
+    Counter,
+    Histogram,
+    Metric,
+    MetricsMiddleware,
+)
+
+
+def test_counter_renders_labels():
+    counter = Counter('hits_total', 'Hits.', ('route',))
+    counter.inc('/a')
+    counter.inc('/a')
+    counter.inc('/"b"')
+
+    assert counter.render().splitlines() == [
+        '# HELP hits_total Hits.',
+        '# TYPE hits_total counter',
+        'hits_total{route="/a"} 2',
+        'hits_total{route="/\\"b\\""} 1',
+    ]
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram('latency', 'Latency.', buckets=(0.1, 1.0))
+    histogram.observe(value=0.05)
+    histogram.observe(value=0.5)
+    histogram.observe(value=5.0)
+
+    lines = histogram.render().splitlines()[2:]
+    assert lines == [
+        'latency_bucket{le="0.1"} 1',
+        'latency_bucket{le="1.0"} 2',
+        'latency_bucket{le="+Inf"} 3',
+        'latency_sum 5.55',
+        'latency_count 3',
+    ]
+
+
+def test_metric_subclasses_must_yield_samples():
+    with pytest.raises(TypeError, match='samples'):
+        Metric('bare', 'No samples.')
+
+
+def test_middleware_labels_by_route_template():
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get('/items/{item_id}')
+    def item(item_id: int):
+        return {'id': item_id}
+
+    client = TestClient(app)
+    client.get('/items/1')
+    client.get('/items/2')
+    client.get('/nope')
+
+    labels = ('GET', '/items/{item_id}', '200')
+    assert HTTP_REQUESTS.values[labels] >= 2  # noqa: PLR2004
+    assert ('GET', '/items/{item_id}') in HTTP_LATENCY.values
+    assert ('GET', '<unmatched>', '404') in HTTP_REQUESTS.values
+    assert not any('/items/1' in key for key in HTTP_REQUESTS.values)
+
+
+def test_metrics_endpoint(client):
+    client.get('/health')
+    resp = client.get('/metrics')
+
+    assert resp.status_code == status.HTTP_200_OK
+    assert resp.headers['content-type'].startswith('text/plain')
+    body = resp.text
+    assert (
+        'http_requests_total{method="GET",route="/health",status="200"}'
+        in body
+    )
+    assert 'http_request_duration_seconds_bucket' in body
+    assert 'rate_limit_keys{stat="size"}' in body
@@ -0,0 +1,153 @@
+import pytest
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.db.database import create_engine
+from app.db.migrations import (
+    LATEST_VERSION,
+    MIGRATIONS,
+    SchemaOutdated,
+    check_schema,
+    current_version,
+    migrate,
+)
+from app.db.setup import setup_database
+from app.models.base import Base
+from app.models.book import title_key
+
+INDEXES = {
+    'ix_lendings_user_id',
+    'ix_lendings_book_id',
+    'ix_lendings_returned_at',
+    'ix_lendings_active_user_book',
+    'ix_users_name',
+    'ix_books_name_author',
+    'ux_books_title_key',
+    'ix_books_category_name',
+    'ix_books_available_category',
+    'ix_books_author_nocase',
+    'ix_books_created_at',
+    'ix_books_name',
+    'ix_books_category',
+    'ix_books_available',
+}
+
+
+async def _indexes(engine):
+    async with engine.connect() as conn:
+        result = await conn.execute(
+            text("SELECT name FROM sqlite_master WHERE type = 'index'")
+        )
+        return set(result.scalars())
+
+
+async def _version(engine):
+    async with engine.connect() as conn:
+        return await current_version(conn)
+
+
+@pytest.mark.asyncio
+async def test_fresh_database_is_created_at_latest_version(engine):
+    applied = await migrate(engine)
+
+    assert applied == [m.version for m in MIGRATIONS]
+    assert await _version(engine) == LATEST_VERSION
+    assert INDEXES <= await _indexes(engine)
+    assert await migrate(engine) == []
+
+
+@pytest.mark.asyncio
+async def test_unversioned_database_is_upgraded_in_place(engine):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        for name in INDEXES:
+            await conn.execute(text(f'DROP INDEX {name}'))
+        await conn.execute(
+            text(
+                'INSERT INTO users (name, email, password, role) '
+                "VALUES ('kept', 'kept@example.com', 'x', 'READER')"
+            )
+        )
+
+    applied = await migrate(engine)
+
+    assert applied == [m.version for m in MIGRATIONS[1:]]
+    assert INDEXES <= await _indexes(engine)
+    async with engine.connect() as conn:
+        names = await conn.execute(text('SELECT name FROM users'))
+        assert names.scalars().all() == ['kept']
+        users = await conn.execute(
+            text("SELECT total FROM row_counts WHERE name = 'users'")
+        )
+        assert users.scalar_one() == 1
+
+
+@pytest.mark.asyncio
+async def test_active_lending_lookup_uses_partial_index(tmp_path):
+    engine = create_engine(f'sqlite+aiosqlite:///{tmp_path / "plan.db"}')
+    try:
+        await migrate(engine)
+        async with engine.connect() as conn:
+            plan = await conn.execute(
+                text(
+                    'EXPLAIN QUERY PLAN SELECT * FROM lendings '
+                    'WHERE user_id = 1 AND book_id = 2 '
+                    'AND returned_at IS NULL'
+                )
+            )
+            details = ' '.join(row.detail for row in plan)
+    finally:
+        await engine.dispose()
+
+    assert 'ix_lendings_active_user_book' in details
+
+
+@pytest.mark.asyncio
+async def test_check_schema_requires_current_version(engine):
+    with pytest.raises(SchemaOutdated, match='at version 0'):
+        await check_schema(engine)
+
+    await migrate(engine)
+    assert await check_schema(engine) == LATEST_VERSION
+
+
+@pytest.mark.asyncio
+async def test_setup_database_creates_dev_admin(engine, monkeypatch):
+    monkeypatch.setattr(settings, 'APP_ENV', 'development')
+    monkeypatch.setattr(settings, 'CREATE_DEV_ADMIN', True)
+    monkeypatch.setattr(settings, 'PASSWORD_HASH_COST', 1_000)
+
+    assert await setup_database(engine) == [m.version for m in MIGRATIONS]
+    assert await setup_database(engine) == []
+
+    async with engine.connect() as conn:
+        admins = await conn.execute(
+            text("SELECT count(*) FROM users WHERE name = 'admin'")
+        )
+        assert admins.scalar_one() == 1
+
+
+@pytest.mark.asyncio
+async def test_title_key_is_backfilled_for_existing_books(engine):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(text('DROP INDEX ux_books_title_key'))
+        await conn.execute(text('ALTER TABLE books DROP COLUMN title_key'))
+        await conn.execute(
+            text(
+                'INSERT INTO books (name, author, total_copies, '
+                'available_copies, category) VALUES '
+                "('Dune', 'Frank Herbert', 1, 1, 'FICTION'), "
+                "(' dune', 'frank  herbert', 1, 1, 'FICTION')"
+            )
+        )
+
+    await migrate(engine)
+
+    async with engine.connect() as conn:
+        keys = await conn.execute(
+            text('SELECT id, title_key FROM books ORDER BY id')
+        )
+        (_, first), (second_id, second) = keys.all()
+    assert first == title_key('Dune', 'Frank Herbert')
+    assert second == f'{first}\x1f{second_id}'
@@ -0,0 +1,204 @@
+import pytest
+import pytest_asyncio
+from fastapi import status
+
+from app.core.config import settings
+from app.core.exceptions import InvalidCursor
+from app.db.query_stats import track_queries
+from app.models.book import Book
+from app.repositories.book import BookRepository
+from app.repositories.lending import LendingRepository
+from app.repositories.pagination import (
+    KeysetOrder,
+    decode_cursor,
+    encode_cursor,
+)
+
+
+@pytest_asyncio.fixture
+async def books(book_factory):
+    return [await book_factory(name=f'Book {i}') for i in range(5)]
+
+
+async def _walk(fetch, limit):
+    pages, cursor = [], ''
+    while cursor is not None:
+        items, cursor = await fetch(limit=limit, cursor=cursor)
+        pages.append([item.id for item in items])
+    return pages
+
+
+@pytest.mark.asyncio
+async def test_keyset_pages_cover_every_row_once(async_session_factory, books):
+    async with async_session_factory() as session:
+        pages = await _walk(BookRepository(session).list_books_keyset, 2)
+
+    ids = sorted(book.id for book in books)
+    assert pages == [ids[0:2], ids[2:4], ids[4:]]
+
+
+@pytest.mark.asyncio
+async def test_keyset_page_is_stable_under_inserts(
+    async_session_factory, book_factory, books
+):
+    async with async_session_factory() as session:
+        repo = BookRepository(session)
+        first, cursor = await repo.list_books_keyset(limit=2, cursor='')
+        await book_factory(name='Late arrival')
+        second, _ = await repo.list_books_keyset(limit=2, cursor=cursor)
+
+    assert [b.id for b in second] == [books[2].id, books[3].id]
+    assert {b.id for b in first}.isdisjoint(b.id for b in second)
+
+
+@pytest.mark.asyncio
+async def test_keyset_filters_user_history(
+    async_session_factory, lending_factory, user_factory, book_factory
+):
+    alice = await user_factory()
+    bob = await user_factory(name='bob', email='bob@example.com')
+    mine = [
+        await lending_factory(user=alice, book=await book_factory(name=n))
+        for n in 'abc'
+    ]
+    await lending_factory(user=bob, book=await book_factory(name='d'))
+
+    async with async_session_factory() as session:
+        repo = LendingRepository(session)
+        pages = await _walk(
+            lambda **kw: repo.user_lending_history_keyset(alice.id, **kw), 2
+        )
+
+    assert pages == [[mine[0].id, mine[1].id], [mine[2].id]]
+
+
+def test_cursor_round_trip_and_validation():
+    order = KeysetOrder('id', (Book.id,))
+    cursor = encode_cursor('id', [42])
+
+    assert decode_cursor(cursor, order) == [42]
+    with pytest.raises(InvalidCursor):
+        decode_cursor('not a cursor!', order)
+    with pytest.raises(InvalidCursor):
+        decode_cursor(encode_cursor('name', [42]), order)
+    with pytest.raises(InvalidCursor):
+        decode_cursor(encode_cursor('id', [1, 2]), order)
+
+
+PAGE_SIZE = 3
+
+
+def test_books_endpoint_pages_with_cursor(books_client, books):
+    first = books_client.get(
+        '/books/', params={'limit': PAGE_SIZE, 'cursor': ''}
+    )
+    assert first.status_code == status.HTTP_200_OK
+    body = first.json()
+    assert body['size'] == PAGE_SIZE
+    assert body['total'] == len(books)
+    assert body['total_exact'] is True
+    assert body['next_cursor']
+
+    rest = books_client.get(
+        '/books/', params={'limit': PAGE_SIZE, 'cursor': body['next_cursor']}
+    ).json()
+    assert [b['id'] for b in body['items'] + rest['items']] == [
+        b.id for b in books
+    ]
+    assert rest['next_cursor'] is None
+
+
+@pytest.mark.usefixtures('books')
+def test_books_endpoint_offset_mode_unchanged(books_client):
+    body = books_client.get('/books/', params={'limit': 2, 'offset': 2})
+    assert body.json() | {'items': None} == {
+        'items': None,
+        'total': 5,
+        'total_exact': True,
+        'page': 2,
+        'size': 2,
+        'next_cursor': None,
+    }
+
+
+@pytest.mark.usefixtures('books')
+def test_books_endpoint_rejects_bad_cursor(books_client):
+    resp = books_client.get('/books/', params={'cursor': 'garbage'})
+    assert resp.status_code == status.HTTP_400_BAD_REQUEST
+    assert resp.json()['detail'] == 'Invalid pagination cursor'
+
+
+@pytest.mark.usefixtures('books')
+@pytest.mark.parametrize(
+    ('path', 'cursor'),
+    [
+        ('/books/', encode_cursor('id', [None])),
+        ('/books/', encode_cursor('id', [{}])),
+        ('/books/', encode_cursor('id', [True])),
+        ('/books/search', encode_cursor('relevance', [[1], 1])),
+        ('/books/search', encode_cursor('relevance', ['x', 1])),
+    ],
+)
+def test_books_endpoint_rejects_mistyped_cursor(books_client, path, cursor):
+    resp = books_client.get(path, params={'q': 'book', 'cursor': cursor})
+    assert resp.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.usefixtures('books')
+def test_books_endpoint_can_skip_total(books_client):
+    body = books_client.get(
+        '/books/', params={'limit': 2, 'include_total': False}
+    ).json()
+    assert body['total'] is None
+    assert body['total_exact'] is None
+
+
+@pytest.mark.asyncio
+async def test_windowed_page_returns_rows_and_total_in_one_query(
+    async_session_factory, books
+):
+    async with async_session_factory() as session:
+        with track_queries() as stats:
+            items, total = await BookRepository(session).list_books(
+                limit=2, offset=2, total_mode='window'
+            )
+
+    assert [b.id for b in items] == [books[2].id, books[3].id]
+    assert total == len(books)
+    assert stats.count == 1
+
+
+@pytest.mark.asyncio
+async def test_windowed_page_falls_back_when_empty(
+    async_session_factory, prepare_db, lending_factory
+):
+    async with async_session_factory() as session:
+        repo = LendingRepository(session)
+        assert await repo.list_active_lendings(total_mode='window') == ([], 0)
+
+    lending = await lending_factory()
+    async with async_session_factory() as session:
+        repo = LendingRepository(session)
+        items, total = await repo.list_active_lendings(total_mode='window')
+        assert [item.id for item in items] == [lending.id]
+        assert items[0].book_id == lending.book_id
+        assert total == 1
+        assert await repo.list_active_lendings(
+            offset=5, total_mode='window'
+        ) == (
+            [],
+            1,
+        )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(('mode', 'queries'), [('counter', 2), ('window', 1)])
+async def test_list_total_mode_setting(
+    book_service, books, monkeypatch, mode, queries
+):
+    monkeypatch.setattr(settings, 'LIST_TOTAL_MODE', mode)
+    with track_queries() as stats:
+        _, total = await book_service.list_books(limit=2)
+
+    assert total == len(books)
+    assert stats.count == queries
@@ -0,0 +1,84 @@
+import logging
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.db.query_stats import (
+    QueryStatsMiddleware,
+    assert_max_queries,
+    track_queries,
+)
+from app.repositories.book import BookRepository
+
+LIST_QUERIES = 2
+REPEATS = 6
+
+
+@pytest.mark.asyncio
+async def test_track_queries_counts_statements(
+    async_session_factory, book_factory
+):
+    await book_factory()
+    async with async_session_factory() as session:
+        with track_queries() as stats:
+            await BookRepository(session).list_books()
+
+    assert stats.count == LIST_QUERIES
+    assert stats.duration > 0
+    assert len(stats.statements) == LIST_QUERIES
+
+
+@pytest.mark.asyncio
+async def test_queries_outside_tracking_are_ignored(
+    async_session_factory, prepare_db
+):
+    with track_queries() as stats:
+        pass
+    async with async_session_factory() as session:
+        await session.execute(text('SELECT 1'))
+    assert stats.count == 0
+
+
+@pytest.mark.asyncio
+async def test_assert_max_queries(async_session_factory, prepare_db):
+    async with async_session_factory() as session:
+        repo = BookRepository(session)
+        with assert_max_queries(LIST_QUERIES):
+            await repo.list_books()
+
+        with pytest.raises(AssertionError, match='at most 1 queries, got 2'):
+            with assert_max_queries(1):
+                await repo.list_books()
+
+
+def _app(async_session_factory):
+    app = FastAPI()
+    app.add_middleware(QueryStatsMiddleware, budget=3, server_timing=True)
+
+    async def session():
+        async with async_session_factory() as s:
+            yield s
+
+    @app.get('/n-plus-one')
+    async def n_plus_one(s=Depends(session)):
+        for i in range(REPEATS):
+            await s.execute(text('SELECT :i'), {'i': i})
+        return {}
+
+    return app
+
+
+def test_middleware_reports_timing_budget_and_repeats(
+    async_session_factory, caplog
+):
+    client = TestClient(_app(async_session_factory))
+
+    with caplog.at_level(logging.WARNING, logger='LIBRARY'):
+        resp = client.get('/n-plus-one')
+
+    assert f'desc="{REPEATS} queries"' in resp.headers['Server-Timing']
+    messages = [r.getMessage() for r in caplog.records]
+    assert any('Query budget exceeded: 6 queries' in m for m in messages)
+    assert any('Possible N+1' in m for m in messages)
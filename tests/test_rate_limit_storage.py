@@ -0,0 +1,278 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from app.core.gcra import RateLimit
+from app.core.rate_limit_storage import (
+    MemoryStorage,
+    RateLimitStorage,
+    RedisStorage,
+    SQLiteStorage,
+    create_storage,
+    sweep_periodically,
+)
+
+LIMIT = 5
+RULE = RateLimit(LIMIT, 60.0)
+NOW = 1000.0
+WORKERS = 4
+
+
+class FakeRedisServer:
+    """In-process stand-in speaking enough RESP2 for `RedisStorage`."""
+
+    def __init__(self) -> None:
+        self.data: dict[bytes, bytes] = {}
+        self.versions: dict[bytes, int] = {}
+        self.server: asyncio.AbstractServer | None = None
+
+    @property
+    def port(self) -> int:
+        return self.server.sockets[0].getsockname()[1]
+
+    async def start(self) -> None:
+        self.server = await asyncio.start_server(self._handle, '127.0.0.1', 0)
+
+    async def stop(self) -> None:
+        self.server.close()
+        await self.server.wait_closed()
+
+    @staticmethod
+    async def _read_command(reader):
+        line = await reader.readline()
+        if not line:
+            return None
+        args = []
+        for _ in range(int(line[1:-2])):
+            size = int((await reader.readline())[1:-2])
+            args.append((await reader.readexactly(size + 2))[:-2])
+        return args
+
+    @staticmethod
+    def _encode(value) -> bytes:
+        if value is None:
+            return b'$-1\r\n'
+        if isinstance(value, str):
+            return f'+{value}\r\n'.encode()
+        if isinstance(value, int):
+            return f':{value}\r\n'.encode()
+        if isinstance(value, list):
+            return f'*{len(value)}\r\n'.encode() + b''.join(
+                FakeRedisServer._encode(item) for item in value
+            )
+        return f'${len(value)}\r\n'.encode() + value + b'\r\n'
+
+    def _set(self, key, value) -> None:
+        self.data[key] = value
+        self.versions[key] = self.versions.get(key, 0) + 1
+
+    async def _handle(self, reader, writer):
+        watched: dict[bytes, int] = {}
+        queued: list | None = None
+        while (args := await self._read_command(reader)) is not None:
+            name, *rest = args
+            name = name.upper()
+            if queued is not None and name != b'EXEC':
+                queued.append(rest)
+                reply = 'QUEUED'
+            elif name == b'WATCH':
+                watched.update({k: self.versions.get(k, 0) for k in rest})
+                reply = 'OK'
+            elif name == b'UNWATCH':
+                watched.clear()
+                reply = 'OK'
+            elif name == b'GET':
+                reply = self.data.get(rest[0])
+            elif name == b'MULTI':
+                queued = []
+                reply = 'OK'
+            elif name == b'EXEC':
+                dirty = any(
+                    self.versions.get(k, 0) != v for k, v in watched.items()
+                )
+                reply = None if dirty else ['OK'] * len(queued)
+                if not dirty:
+                    for key, value, *_ in queued:
+                        self._set(key, value)
+                queued = None
+                watched.clear()
+            elif name == b'SCAN':
+                reply = [b'0', list(self.data)]
+            elif name == b'DEL':
+                reply = sum(self.data.pop(k, None) is not None for k in rest)
+            else:
+                reply = 'OK'
+            writer.write(self._encode(reply))
+            await writer.drain()
+        writer.close()
+
+
+def _hit_shared_sqlite(path: str) -> int:
+    async def inner():
+        storage = SQLiteStorage(path)
+        allowed = 0
+        for _ in range(LIMIT):
+            decision = await storage.hit('client', RULE, NOW)
+            allowed += decision.allowed
+        await storage.close()
+        return allowed
+
+    return asyncio.run(inner())
+
+
+@pytest.mark.asyncio
+async def test_memory_storage_enforces_limit():
+    storage = MemoryStorage()
+    results = [await storage.hit('k', RULE, NOW) for _ in range(LIMIT + 1)]
+    assert [r.allowed for r in results].count(True) == LIMIT
+    await storage.reset()
+    assert (await storage.hit('k', RULE, NOW)).allowed
+
+
+@pytest.mark.asyncio
+async def test_memory_storage_evicts_least_recently_seen_key():
+    storage = MemoryStorage(max_entries=2)
+    await storage.hit('a', RULE, NOW)
+    await storage.hit('b', RULE, NOW)
+    await storage.hit('a', RULE, NOW)
+    await storage.hit('c', RULE, NOW)
+
+    assert list(storage.tats) == ['a', 'c']
+    assert storage.stats() == {'size': 2, 'evictions': 1, 'expirations': 0}
+
+
+@pytest.mark.asyncio
+async def test_memory_storage_keeps_throttled_keys_recent():
+    storage = MemoryStorage(max_entries=2)
+    for _ in range(LIMIT + 1):
+        await storage.hit('a', RULE, NOW)
+    await storage.hit('b', RULE, NOW)
+    assert not (await storage.hit('a', RULE, NOW)).allowed
+    await storage.hit('c', RULE, NOW)
+
+    assert list(storage.tats) == ['a', 'c']
+    assert not (await storage.hit('a', RULE, NOW)).allowed
+
+
+@pytest.mark.asyncio
+async def test_memory_storage_sweep_is_bounded():
+    storage = MemoryStorage(sweep_batch=2)
+    for key in 'abcde':
+        await storage.hit(key, RULE, NOW)
+
+    later = NOW + RULE.emission_interval
+    assert await storage.sweep(later) == 2  # noqa: PLR2004
+    assert list(storage.tats) == ['c', 'd', 'e']
+    assert await storage.sweep(later) == 2  # noqa: PLR2004
+    assert await storage.sweep(later) == 1
+
+
+@pytest.mark.asyncio
+async def test_memory_storage_sweep_drops_only_idle_keys():
+    storage = MemoryStorage()
+    slow = RateLimit(1, 600.0)
+    await storage.hit('fast', RULE, NOW)
+    await storage.hit('slow', slow, NOW)
+
+    assert await storage.sweep(NOW + RULE.emission_interval) == 1
+    assert list(storage.tats) == ['slow']
+    assert storage.stats()['expirations'] == 1
+    # The slow client is still throttled after the sweep.
+    assert not (await storage.hit('slow', slow, NOW + 1)).allowed
+
+
+@pytest.mark.asyncio
+async def test_sqlite_storage_sweep(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / 'limits.db'))
+    await storage.hit('a', RULE, NOW)
+    await storage.hit('b', RateLimit(1, 600.0), NOW)
+
+    assert await storage.sweep(NOW + RULE.period) == 1
+    assert storage.stats() == {'size': 1, 'expirations': 1}
+    await storage.close()
+
+
+@pytest.mark.asyncio
+async def test_sweep_periodically_runs_until_cancelled():
+    storage = MemoryStorage()
+    await storage.hit('a', RULE, NOW)
+    task = asyncio.create_task(
+        sweep_periodically(storage, 0.001, clock=lambda: NOW + RULE.period)
+    )
+    for _ in range(100):
+        await asyncio.sleep(0.001)
+        if not storage.tats:
+            break
+    task.cancel()
+
+    assert storage.stats()['size'] == 0
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+
+@pytest.mark.asyncio
+async def test_sqlite_storage_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / 'limits.db')
+    first, second = SQLiteStorage(path), SQLiteStorage(path)
+    allowed = 0
+    for i in range(LIMIT * 2):
+        storage = first if i % 2 else second
+        allowed += (await storage.hit('client', RULE, NOW)).allowed
+    assert allowed == LIMIT
+    await first.reset()
+    assert (await second.hit('client', RULE, NOW)).allowed
+    await first.close()
+    await second.close()
+
+
+def test_sqlite_storage_holds_limit_across_processes(tmp_path):
+    path = str(tmp_path / 'limits.db')
+    with ProcessPoolExecutor(max_workers=WORKERS) as pool:
+        allowed = sum(pool.map(_hit_shared_sqlite, [path] * WORKERS))
+    assert allowed == LIMIT
+
+
+@pytest.mark.asyncio
+async def test_redis_storage_against_stand_in():
+    server = FakeRedisServer()
+    await server.start()
+    storage = RedisStorage(f'redis://127.0.0.1:{server.port}/0', pool_size=2)
+    try:
+        results = await asyncio.gather(*[
+            storage.hit('client', RULE, NOW) for _ in range(LIMIT * 2)
+        ])
+        assert [r.allowed for r in results].count(True) == LIMIT
+        assert float(server.data[b'ratelimit:client']) > NOW
+
+        await storage.reset()
+        assert server.data == {}
+    finally:
+        await storage.close()
+        await server.stop()
+
+
+@pytest.mark.parametrize(
+    ('url', 'expected'),
+    [
+        ('memory://', MemoryStorage),
+        ('sqlite:///./limits.db', SQLiteStorage),
+        ('redis://localhost:6379/1', RedisStorage),
+    ],
+)
+def test_create_storage(url, expected):
+    assert isinstance(create_storage(url), expected)
+
+
+def test_storage_backends_must_implement_hit_and_reset():
+    class Incomplete(RateLimitStorage):
+        async def reset(self):
+            pass
+
+    with pytest.raises(TypeError, match='hit'):
+        Incomplete()
+
+
+def test_create_storage_rejects_unknown_scheme():
+    with pytest.raises(ValueError, match='Unsupported'):
+        create_storage('memcached://localhost')
@@ -0,0 +1,237 @@
+import pytest
+from fastapi import FastAPI, status
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core import security
+from app.core.config import settings
+from app.core.rate_limiter import (
+    RateLimit,
+    RateLimiterMiddleware,
+    RateLimitRules,
+    client_identity,
+    gcra,
+)
+from app.core.security import create_access_token, decode_request_token
+
+LIMIT = 3
+PERIOD = 60.0
+
+
+def _app(rules):
+    app = FastAPI()
+    app.add_middleware(RateLimiterMiddleware, rules=rules)
+
+    @app.get('/cheap')
+    def cheap():
+        return {'ok': True}
+
+    @app.post('/login')
+    def login():
+        return {'ok': True}
+
+    @app.get('/stream')
+    def stream():
+        return StreamingResponse(iter([b'a', b'b', b'c']))
+
+    return app
+
+
+@pytest.mark.parametrize(
+    ('value', 'expected'),
+    [
+        ('10/minute', RateLimit(10, 60.0)),
+        ('10/60', RateLimit(10, 60.0)),
+        ('5/2hours', RateLimit(5, 7200.0)),
+        (' 1 / second ', RateLimit(1, 1.0)),
+    ],
+)
+def test_rate_limit_parse(value, expected):
+    assert RateLimit.parse(value) == expected
+
+
+@pytest.mark.parametrize('value', ['', 'ten/minute', '0/minute', '5/week'])
+def test_rate_limit_parse_invalid(value):
+    with pytest.raises(ValueError, match='Invalid rate limit'):
+        RateLimit.parse(value)
+
+
+def test_gcra_allows_burst_then_rejects():
+    rule = RateLimit(LIMIT, PERIOD)
+    tat = None
+    now = 1000.0
+    for expected_remaining in range(LIMIT - 1, -1, -1):
+        tat, decision = gcra(tat, now, rule)
+        assert decision.allowed
+        assert decision.remaining == expected_remaining
+
+    new_tat, decision = gcra(tat, now, rule)
+    assert new_tat is None
+    assert not decision.allowed
+    assert decision.retry_after == pytest.approx(PERIOD / LIMIT)
+
+
+def test_gcra_replenishes_one_request_per_interval():
+    rule = RateLimit(LIMIT, PERIOD)
+    tat = None
+    now = 1000.0
+    for _ in range(LIMIT):
+        tat, _ = gcra(tat, now, rule)
+
+    tat, decision = gcra(tat, now + PERIOD / LIMIT, rule)
+    assert decision.allowed
+    assert decision.remaining == 0
+
+
+def test_rules_resolve_method_path_then_path_then_default():
+    rules = RateLimitRules(
+        '10/minute', {'POST /login': '1/minute', '/cheap': '100/minute'}
+    )
+    assert rules.resolve('POST', '/login') == (
+        'POST /login',
+        RateLimit(1, 60.0),
+    )
+    assert rules.resolve('GET', '/cheap') == ('/cheap', RateLimit(100, 60.0))
+    assert rules.resolve('GET', '/other') == ('*', RateLimit(10, 60.0))
+
+
+def test_middleware_sets_headers_and_rejects():
+    rules = RateLimitRules('100/minute', {'POST /login': f'{LIMIT}/minute'})
+    client = TestClient(_app(rules))
+
+    for _ in range(LIMIT):
+        resp = client.post('/login')
+        assert resp.status_code == status.HTTP_200_OK
+        assert resp.headers['RateLimit-Limit'] == str(LIMIT)
+
+    resp = client.post('/login')
+    assert resp.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert resp.headers['RateLimit-Remaining'] == '0'
+    assert int(resp.headers['Retry-After']) >= 1
+
+
+def test_middleware_keeps_separate_budget_per_rule():
+    rules = RateLimitRules('100/minute', {'POST /login': '1/minute'})
+    client = TestClient(_app(rules))
+
+    assert client.post('/login').status_code == status.HTTP_200_OK
+    assert client.post('/login').status_code == (
+        status.HTTP_429_TOO_MANY_REQUESTS
+    )
+    resp = client.get('/cheap')
+    assert resp.status_code == status.HTTP_200_OK
+    assert resp.headers['RateLimit-Remaining'] == '99'
+
+
+def test_middleware_passes_streaming_responses_through():
+    client = TestClient(_app(RateLimitRules('100/minute', {})))
+
+    resp = client.get('/stream')
+    assert resp.status_code == status.HTTP_200_OK
+    assert resp.content == b'abc'
+    assert resp.headers['RateLimit-Remaining'] == '99'
+
+
+def _scope(token=None, client=('10.0.0.1', 1234)):
+    headers = []
+    if token is not None:
+        headers.append((b'authorization', f'Bearer {token}'.encode()))
+    return {'type': 'http', 'headers': headers, 'client': client}
+
+
+def test_client_identity_uses_token_claims():
+    token = create_access_token({'sub': '7', 'role': 'librarian'})
+    assert client_identity(_scope(token)) == ('user:7', 'librarian')
+
+
+@pytest.mark.parametrize('token', [None, 'not-a-jwt'])
+def test_client_identity_falls_back_to_ip(token):
+    assert client_identity(_scope(token)) == ('ip:10.0.0.1', None)
+
+
+def test_request_token_is_decoded_once(monkeypatch):
+    calls = []
+    verify = security.verify_access_token
+
+    def counting_verify(token):
+        calls.append(token)
+        return verify(token)
+
+    monkeypatch.setattr(security, 'verify_access_token', counting_verify)
+    token = create_access_token({'sub': '7', 'role': 'reader'})
+    scope = _scope(token)
+
+    client_identity(scope)
+    assert decode_request_token(scope, token)['sub'] == '7'
+    assert calls == [token]
+
+
+def test_rules_resolve_role_budget_after_route_rules():
+    rules = RateLimitRules(
+        '10/minute', {'/cheap': '100/minute'}, {'admin': '50/minute'}
+    )
+    assert rules.resolve('GET', '/cheap', 'admin') == (
+        '/cheap',
+        RateLimit(100, 60.0),
+    )
+    assert rules.resolve('GET', '/other', 'admin') == (
+        'role:admin',
+        RateLimit(50, 60.0),
+    )
+    assert rules.resolve('GET', '/other', 'reader')[1] == RateLimit(10, 60.0)
+
+
+def test_route_role_rules_win_over_the_route_rule():
+    rules = RateLimitRules(
+        '10/minute',
+        {'GET /books/': '100/minute', '/cheap': '100/minute'},
+        {'admin': '50/minute'},
+        {'GET /books/': {'admin': '500/minute'}},
+    )
+    assert rules.resolve('GET', '/books/', 'admin') == (
+        'GET /books/ role:admin',
+        RateLimit(500, 60.0),
+    )
+    # Roles without a route budget, and anonymous clients, share the route
+    # rule; a route rule still replaces the role budget elsewhere.
+    assert rules.resolve('GET', '/books/', 'reader') == (
+        'GET /books/',
+        RateLimit(100, 60.0),
+    )
+    assert rules.resolve('GET', '/books/') == (
+        'GET /books/',
+        RateLimit(100, 60.0),
+    )
+    assert rules.resolve('GET', '/cheap', 'admin')[0] == '/cheap'
+
+
+def test_default_rules_scale_book_listing_by_role():
+    rules = RateLimitRules(
+        settings.RATE_LIMIT_DEFAULT,
+        settings.RATE_LIMIT_RULES,
+        settings.RATE_LIMIT_ROLE_RULES,
+        settings.RATE_LIMIT_ROUTE_ROLE_RULES,
+    )
+    for path in ('/books/', '/books/search'):
+        anonymous = rules.resolve('GET', path)[1].limit
+        assert rules.resolve('GET', path, 'reader')[1].limit == anonymous
+        assert rules.resolve('GET', path, 'librarian')[1].limit > anonymous
+        assert rules.resolve('GET', path, 'admin')[1].limit > anonymous
+
+
+def test_middleware_keys_authenticated_clients_by_subject():
+    rules = RateLimitRules('1/minute', {}, {'admin': f'{LIMIT}/minute'})
+    client = TestClient(_app(rules))
+    admin = create_access_token({'sub': '1', 'role': 'admin'})
+    reader = create_access_token({'sub': '2', 'role': 'reader'})
+
+    for _ in range(LIMIT):
+        resp = client.get(
+            '/cheap', headers={'Authorization': f'Bearer {admin}'}
+        )
+        assert resp.status_code == status.HTTP_200_OK
+    # Same IP, different identities: each keeps its own budget.
+    assert client.get('/cheap').status_code == status.HTTP_200_OK
+    resp = client.get('/cheap', headers={'Authorization': f'Bearer {reader}'})
+    assert resp.status_code == status.HTTP_200_OK
+    assert resp.headers['RateLimit-Limit'] == '1'
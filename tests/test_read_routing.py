@@ -0,0 +1,93 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.exceptions import EmailAlreadyExists
+from app.db.database import create_db_and_tables, create_engine
+from app.db.routing import RoutingSession, read_only_url, use_primary
+from app.models.book import Book, BookCategoryEnum
+from app.repositories.user import UserRepository
+from app.services.user import UserService
+
+
+def test_read_only_url():
+    assert read_only_url('sqlite+aiosqlite:///./library.db') == (
+        'sqlite+aiosqlite:///file:./library.db?mode=ro&uri=true'
+    )
+    with pytest.raises(ValueError, match='No read-only SQLite file'):
+        read_only_url('sqlite+aiosqlite:///:memory:')
+
+
+@pytest_asyncio.fixture
+async def routed(tmp_path):
+    url = f'sqlite+aiosqlite:///{tmp_path / "routed.db"}'
+    writer = create_engine(url)
+    reader = create_engine(read_only_url(url), read_only=True)
+    await create_db_and_tables(engine_override=writer)
+
+    used = []
+    for name, engine in (('writer', writer), ('reader', reader)):
+        event.listen(
+            engine.sync_engine,
+            'before_cursor_execute',
+            lambda *args, name=name: used.append(name),
+        )
+
+    factory = async_sessionmaker(
+        bind=writer,
+        expire_on_commit=False,
+        class_=AsyncSession,
+        sync_session_class=RoutingSession,
+        reader=reader,
+    )
+    yield factory, used
+    await writer.dispose()
+    await reader.dispose()
+
+
+def _book(name):
+    return Book(name=name, category=BookCategoryEnum.TECH)
+
+
+@pytest.mark.asyncio
+async def test_reads_go_to_reader_until_the_session_writes(routed):
+    factory, used = routed
+    async with factory() as session:
+        session.add(_book('Seed'))
+        await session.commit()
+
+    used.clear()
+    async with factory() as session:
+        await session.scalars(select(Book))
+        assert set(used) == {'reader'}
+
+        used.clear()
+        session.add(_book('Fresh'))
+        names = (await session.scalars(select(Book.name))).all()
+        assert set(used) == {'writer'}
+        assert 'Fresh' in names
+        await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_use_primary_overrides_routing(routed):
+    factory, used = routed
+    async with factory() as session:
+        use_primary(session)
+        await session.scalars(select(Book))
+    assert used == ['writer']
+
+
+@pytest.mark.asyncio
+async def test_write_services_check_on_the_primary(routed):
+    factory, used = routed
+    async with factory() as session:
+        users = UserService(UserRepository(session), session=session)
+        await users.create_user('ann', 'ann@example.com', 'secret')
+    async with factory() as session:
+        users = UserService(UserRepository(session), session=session)
+        await users.authenticate_user('ann@example.com', 'secret')
+        with pytest.raises(EmailAlreadyExists):
+            await users.create_user('ann', 'ann@example.com', 'secret')
+    assert 'reader' not in used
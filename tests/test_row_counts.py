@@ -0,0 +1,85 @@
+from datetime import datetime
+
+import pytest
+
+from app.core.count_cache import CountCache
+from app.db.query_stats import track_queries
+from app.models.book import Book
+from app.repositories.book import BookRepository
+from app.repositories.lending import LendingRepository
+from app.repositories.user import UserRepository
+
+LENDINGS = 3
+BOOKS_WITH_DRAFT = 2
+
+
+@pytest.mark.asyncio
+async def test_counters_follow_inserts_and_returns(
+    async_session_factory, lending_factory, book_factory, user_factory
+):
+    user = await user_factory()
+    lendings = [
+        await lending_factory(user=user, book=await book_factory(name=n))
+        for n in 'abc'
+    ]
+
+    async with async_session_factory() as session:
+        returned = await LendingRepository(session).get_lending_by_id(
+            lendings[0].id
+        )
+        returned.returned_at = datetime.now()
+        await session.commit()
+
+    async with async_session_factory() as session:
+        assert await BookRepository(session).count_books() == LENDINGS
+        assert await UserRepository(session).count_users() == 1
+        lending_repo = LendingRepository(session)
+        assert await lending_repo.count_active_lendings() == LENDINGS - 1
+        assert await lending_repo.count_user_lendings(user.id) == LENDINGS
+
+
+@pytest.mark.asyncio
+async def test_rolled_back_insert_is_not_counted(
+    async_session_factory, book_factory
+):
+    await book_factory()
+    async with async_session_factory() as session:
+        repo = BookRepository(session)
+        await repo.create_book(Book(name='Draft', category='fiction'))
+        assert await repo.count_books() == BOOKS_WITH_DRAFT
+        await session.rollback()
+        assert await repo.count_books() == 1
+
+
+@pytest.mark.asyncio
+async def test_list_without_total_skips_count(
+    async_session_factory, book_factory
+):
+    await book_factory()
+    async with async_session_factory() as session:
+        with track_queries() as stats:
+            items, total = await BookRepository(session).list_books(
+                total_mode=None
+            )
+
+    assert len(items) == 1
+    assert total is None
+    assert stats.count == 1
+
+
+@pytest.mark.asyncio
+async def test_count_cache_reports_cached_totals_as_estimates():
+    cache = CountCache(max_entries=10, ttl=60)
+    calls = []
+
+    async def count():
+        calls.append(1)
+        return 7
+
+    assert await cache.get_or_count('k', count) == (7, True)
+    assert await cache.get_or_count('k', count) == (7, False)
+    assert len(calls) == 1
+
+    uncached = CountCache(max_entries=10, ttl=0)
+    assert await uncached.get_or_count('k', count) == (7, True)
+    assert len(uncached) == 0
@@ -1,4 +1,11 @@
-from app.core.security import hash_password, verify_password
+from app.core import security
+from app.core.config import settings
+from app.core.security import (
+    calibrate_cost,
+    hash_password,
+    needs_rehash,
+    verify_password,
+)
 
 
 def test_hash_and_verify():
@@ -18,3 +25,58 @@ def test_uniqueness_due_to_salt():
 
 def test_invalid_hash_returns_false():
     assert not verify_password('not-a-valid-hash', 'anything')
+
+
+def test_scrypt_hash_and_verify():
+    hashed = hash_password('secret123', 2**10, algorithm='scrypt')
+    assert hashed.startswith('scrypt$1024$')
+    assert verify_password(hashed, 'secret123')
+    assert not verify_password(hashed, 'wrong')
+
+
+def test_needs_rehash_on_algorithm_or_cost_change(monkeypatch):
+    hashed = hash_password('secret123', 1_000)
+    assert needs_rehash(hashed)
+
+    monkeypatch.setattr(settings, 'PASSWORD_HASH_COST', 1_000)
+    assert not needs_rehash(hashed)
+
+    monkeypatch.setattr(settings, 'PASSWORD_HASH_ALGORITHM', 'scrypt')
+    assert needs_rehash(hashed)
+    assert verify_password(hashed, 'secret123')
+
+
+# A fake clock that a fake hasher advances by `cost` ticks, so the
+# calibration sees hashing time exactly proportional to cost. A power of two
+# keeps the arithmetic exact.
+TICK = 2**-20
+
+
+def _fake_hashing(monkeypatch, algorithm):
+    clock = [0.0]
+
+    def hasher(password, salt, cost):
+        clock[0] += cost * TICK
+
+    monkeypatch.setitem(security.HASHERS, algorithm, hasher)
+    return lambda: clock[0]
+
+
+def test_calibrate_cost_scales_pbkdf2_to_target(monkeypatch):
+    timer = _fake_hashing(monkeypatch, 'pbkdf2_sha256')
+
+    cost = calibrate_cost('pbkdf2_sha256', 50_000 * TICK, timer=timer)
+    assert cost == 50_000  # noqa: PLR2004
+    cost = calibrate_cost('pbkdf2_sha256', 12_345 * TICK, timer=timer)
+    assert cost == 12_000  # noqa: PLR2004
+    # Never below the 1,000 iteration floor.
+    cost = calibrate_cost('pbkdf2_sha256', TICK, timer=timer)
+    assert cost == 1_000  # noqa: PLR2004
+
+
+def test_calibrate_cost_doubles_scrypt_n_up_to_target(monkeypatch):
+    timer = _fake_hashing(monkeypatch, 'scrypt')
+
+    assert calibrate_cost('scrypt', 5_000 * TICK, timer=timer) == 2**12
+    assert calibrate_cost('scrypt', 8_192 * TICK, timer=timer) == 2**13
+    assert calibrate_cost('scrypt', TICK, timer=timer) == 2**10
@@ -2,11 +2,13 @@ import asyncio
 
 import pytest
 
+from app.core.config import settings
 from app.core.exceptions import (
     EmailAlreadyExists,
     IncorrectPassword,
     UserNotFound,
 )
+from app.db.query_stats import track_queries
 from app.repositories.user import UserRepository
 from app.services.user import UserService
 
@@ -52,3 +54,28 @@ def test_authenticate_user_errors(user_factory, async_session_factory):
                 await svc.authenticate_user('alice@example.com', 'wrong')
 
     asyncio.run(inner())
+
+
+def test_authenticate_user_rehashes_outdated_password(
+    user_factory, async_session_factory, monkeypatch
+):
+    async def inner():
+        user = await user_factory('alice', 'alice@example.com', 'secret')
+        assert user.password.startswith('pbkdf2_sha256$')
+
+        monkeypatch.setattr(settings, 'PASSWORD_HASH_ALGORITHM', 'scrypt')
+        monkeypatch.setattr(settings, 'PASSWORD_HASH_COST', 2**10)
+        async with async_session_factory() as session:
+            svc = UserService(UserRepository(session), session=session)
+            with track_queries() as stats:
+                await svc.authenticate_user('alice@example.com', 'secret')
+        updates = [s for s in stats.statements if s.startswith('UPDATE')]
+        assert [stats.statements[s] for s in updates] == [1]
+
+        async with async_session_factory() as session:
+            stored = await UserRepository(session).get_by_id(user.id)
+            assert stored.password.startswith('scrypt$1024$')
+            assert stored.check_password('secret')
+            assert not stored.password_needs_rehash()
+
+    asyncio.run(inner())
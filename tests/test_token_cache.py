@@ -0,0 +1,174 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import FastAPI, status
+from fastapi.testclient import TestClient
+from jose import jwt
+
+from app.api.deps.auth import AdminOnlyDep
+from app.api.deps.services import get_user_service
+from app.core import security
+from app.core.config import settings
+from app.core.exceptions import UserNotFound
+from app.core.security import create_access_token, verify_access_token
+from app.core.token_cache import (
+    TokenCache,
+    TokenRevocations,
+    token_cache,
+    token_revocations,
+)
+from app.models.user import Role
+
+NOW = 1_000.0
+TTL = 60.0
+
+
+@pytest.fixture(autouse=True)
+def _clear_caches():
+    token_cache.clear()
+    token_revocations.clear()
+    yield
+    token_cache.clear()
+    token_revocations.clear()
+
+
+def test_cache_entry_never_outlives_token_expiry():
+    cache = TokenCache(max_entries=10, ttl=TTL)
+    cache.put('long', {'exp': NOW + 3600}, NOW)
+    cache.put('short', {'exp': NOW + 5}, NOW)
+
+    assert cache.get('long', NOW + TTL - 1) == {'exp': NOW + 3600}
+    assert cache.get('short', NOW + 4) is not None
+    assert cache.get('short', NOW + 5) is None
+    assert cache.get('long', NOW + TTL) is None
+    assert len(cache) == 0
+
+
+def test_cache_evicts_least_recently_used():
+    cache = TokenCache(max_entries=2, ttl=TTL)
+    cache.put('a', {}, NOW)
+    cache.put('b', {}, NOW)
+    cache.get('a', NOW)
+    cache.put('c', {}, NOW)
+
+    assert cache.get('a', NOW) is not None
+    assert cache.get('b', NOW) is None
+    assert len(cache) == 2  # noqa: PLR2004
+
+
+def test_revocation_rejects_tokens_issued_before_it():
+    revocations = TokenRevocations(retention=TTL)
+    revocations.revoke(7, NOW)
+
+    assert revocations.is_revoked({'sub': '7', 'iat': NOW - 1})
+    assert not revocations.is_revoked({'sub': '7', 'iat': NOW})
+    assert not revocations.is_revoked({'sub': '8', 'iat': NOW - 1})
+
+    revocations.revoke(8, NOW + TTL + 1)
+    assert not revocations.is_revoked({'sub': '7', 'iat': NOW - 1})
+
+
+def test_token_issued_in_the_revocation_second_is_accepted():
+    revocations = TokenRevocations(retention=TTL)
+    revocations.revoke(7, NOW + 0.5)
+
+    assert revocations.is_revoked({'sub': '7', 'iat': NOW - 1})
+    assert not revocations.is_revoked({'sub': '7', 'iat': NOW})
+
+
+def test_login_right_after_revocation_is_accepted():
+    token_revocations.revoke('1', time.time())
+    token = create_access_token({'sub': '1', 'role': 'reader'})
+
+    assert verify_access_token(token)['sub'] == '1'
+
+
+def _earlier_token(sub, role):
+    # Issued a few seconds ago, so a revocation "now" covers it.
+    issued = datetime.now(timezone.utc) - timedelta(seconds=5)
+    return jwt.encode(
+        {
+            'sub': str(sub),
+            'role': role,
+            'iat': issued,
+            'exp': issued + timedelta(minutes=1),
+        },
+        settings.SECRET_KEY,
+        algorithm=security.TOKEN_ALGORITHM,
+    )
+
+
+def test_verify_access_token_decodes_once(monkeypatch):
+    token = _earlier_token(1, 'reader')
+    calls = []
+    decode = security.decode_access_token
+
+    def counting_decode(value):
+        calls.append(value)
+        return decode(value)
+
+    monkeypatch.setattr(security, 'decode_access_token', counting_decode)
+
+    assert verify_access_token(token)['sub'] == '1'
+    assert verify_access_token(token)['sub'] == '1'
+    assert calls == [token]
+
+    token_revocations.revoke('1', time.time())
+    with pytest.raises(ValueError, match='revoked'):
+        verify_access_token(token)
+
+
+def _admin_app():
+    app = FastAPI()
+
+    @app.get('/admin', dependencies=[AdminOnlyDep])
+    async def admin():
+        return {}
+
+    class NoDatabase:
+        async def get_user(self, user_id):  # noqa: PLR6301
+            raise AssertionError('user lookup should be skipped')
+
+    app.dependency_overrides[get_user_service] = NoDatabase
+    return app
+
+
+def _bearer(role, sub=1):
+    token = create_access_token({'sub': str(sub), 'role': role})
+    return {'Authorization': f'Bearer {token}'}
+
+
+def test_trusted_claims_authorize_without_user_lookup(monkeypatch):
+    monkeypatch.setattr(settings, 'AUTH_TRUST_TOKEN_CLAIMS', True)
+    client = TestClient(_admin_app())
+
+    assert client.get('/admin', headers=_bearer('admin')).status_code == (
+        status.HTTP_200_OK
+    )
+    assert client.get('/admin', headers=_bearer('reader')).status_code == (
+        status.HTTP_403_FORBIDDEN
+    )
+
+    headers = {'Authorization': f'Bearer {_earlier_token(1, "admin")}'}
+    token_revocations.revoke('1', time.time())
+    assert client.get('/admin', headers=headers).status_code == (
+        status.HTTP_401_UNAUTHORIZED
+    )
+
+
+@pytest.mark.asyncio
+async def test_admin_revokes_a_users_tokens(client, user_factory):
+    user = await user_factory()
+    admin = await user_factory('root', 'root@example.com', role=Role.ADMIN)
+    token = _earlier_token(user.id, 'reader')
+    assert verify_access_token(token)['sub'] == str(user.id)
+
+    headers = _bearer('admin', sub=admin.id)
+    resp = client.post(f'/users/{user.id}/revoke-tokens', headers=headers)
+    assert resp.status_code == status.HTTP_204_NO_CONTENT
+    with pytest.raises(ValueError, match='revoked'):
+        verify_access_token(token)
+
+    resp = client.post('/users/999/revoke-tokens', headers=headers)
+    assert resp.status_code == UserNotFound.code
@@ -0,0 +1,138 @@
+import asyncio
+
+import pytest
+from fastapi import status
+
+from app.core import security
+from app.core.config import settings
+from app.core.exceptions import UnsupportedImportFormat
+from app.core.security import create_access_token
+from app.db.query_stats import track_queries
+from app.models.user import Role
+from app.repositories.user import UserRepository
+from app.services.importing import CSV, NDJSON, parse_rows
+from app.services.user import UserService
+
+CSV_BODY = (
+    'name,email,password,role\n'
+    'ana,ana@example.com,pw-ana,\n'
+    'bia,bia@example.com,pw-bia,librarian\n'
+    'bad,not-an-email,pw,\n'
+    'dup,ana@example.com,pw,\n'
+    'old,alice@example.com,pw,\n'
+    'odd,odd@example.com,pw,wizard\n'
+    'short,short@example.com\n'
+    ',nameless@example.com,pw,\n'
+)
+
+
+@pytest.fixture(autouse=True)
+def _cheap_hashing(monkeypatch):
+    monkeypatch.setattr(settings, 'PASSWORD_HASH_COST', 1_000)
+    monkeypatch.setattr(settings, 'PASSWORD_HASH_PROCESSES', 2)
+    yield
+    security.shutdown_hash_executors()
+
+
+async def _collect(rows):
+    return [row async for row in rows]
+
+
+def test_parse_rows_across_chunk_boundaries(byte_chunks):
+    csv_rows = asyncio.run(
+        _collect(parse_rows(byte_chunks('a,b\r\n1,2\n\n3\n'.encode()), CSV))
+    )
+    assert [(r.number, r.data, r.error) for r in csv_rows] == [
+        (1, {'a': '1', 'b': '2'}, None),
+        (2, None, 'Expected 2 columns, got 1'),
+    ]
+
+    body = '{"a": 1}\n[1]\n{oops\n{"b": "é"}'.encode()
+    json_rows = asyncio.run(_collect(parse_rows(byte_chunks(body), NDJSON)))
+    assert [(r.number, r.data, r.error) for r in json_rows] == [
+        (1, {'a': 1}, None),
+        (2, None, 'Expected a JSON object'),
+        (3, None, 'Invalid JSON'),
+        (4, {'b': 'é'}, None),
+    ]
+
+
+def test_import_users_endpoint_reports_row_errors(
+    client, user_factory, async_session_factory
+):
+    admin = asyncio.run(
+        user_factory('alice', 'alice@example.com', 'secret', Role.ADMIN)
+    )
+    token = create_access_token({'sub': str(admin.id), 'role': 'admin'})
+
+    resp = client.post(
+        '/users/import',
+        content=CSV_BODY.encode(),
+        headers={
+            'Authorization': f'Bearer {token}',
+            'Content-Type': 'text/csv; charset=utf-8',
+        },
+    )
+
+    assert resp.status_code == status.HTTP_200_OK, resp.text
+    body = resp.json()
+    assert body['created'] == 2  # noqa: PLR2004
+    assert body['errors'] == [
+        {'row': 3, 'detail': 'Invalid email address'},
+        {'row': 4, 'detail': 'Duplicate email in import'},
+        {'row': 6, 'detail': 'Invalid role: wizard'},
+        {'row': 7, 'detail': 'Expected 4 columns, got 2'},
+        {'row': 8, 'detail': 'Missing field(s): name'},
+        {'row': 5, 'detail': 'Email already registered'},
+    ]
+    assert body['failed'] == len(body['errors'])
+
+    async def stored():
+        async with async_session_factory() as session:
+            return await UserRepository(session).get_by_email(
+                'bia@example.com'
+            )
+
+    bia = asyncio.run(stored())
+    assert bia.role == Role.LIBRARIAN
+    assert bia.check_password('pw-bia')
+
+
+def test_import_users_rejects_unknown_format(client, user_factory):
+    admin = asyncio.run(user_factory(role=Role.ADMIN))
+    token = create_access_token({'sub': str(admin.id), 'role': 'admin'})
+
+    resp = client.post(
+        '/users/import',
+        content=b'<users/>',
+        headers={
+            'Authorization': f'Bearer {token}',
+            'Content-Type': 'application/xml',
+        },
+    )
+
+    assert resp.status_code == UnsupportedImportFormat.code
+
+
+@pytest.mark.asyncio
+async def test_import_checks_duplicates_once_per_chunk(
+    async_session_factory, prepare_db, byte_chunks
+):
+    lines = [
+        f'{{"name": "u{i}", "email": "u{i}@example.com", "password": "p"}}'
+        for i in range(5)
+    ]
+    body = '\n'.join(lines).encode()
+
+    async with async_session_factory() as session:
+        svc = UserService(UserRepository(session), session=session)
+        with track_queries() as stats:
+            report = await svc.import_users(
+                parse_rows(byte_chunks(body), NDJSON), chunk_size=2
+            )
+        users, total = await svc.list_users()
+
+    assert report.created == len(lines)
+    assert total == len(lines)
+    lookups = [s for s in stats.statements if ' IN (' in s]
+    assert sum(stats.statements[s] for s in lookups) == 3  # noqa: PLR2004
@@ -1,3 +1,8 @@
+import threading
+
+import pytest
+
+from app.core import security
 from app.models.user import User
 
 
@@ -27,3 +32,23 @@ def test_invalid_stored_hash():
     u = User()
     u.password = 'not-a-valid-hash'
     assert not u.check_password('anything')
+
+
+@pytest.mark.asyncio
+async def test_async_password_helpers_run_off_the_loop(monkeypatch):
+    loop_thread = threading.get_ident()
+    threads = []
+    original = security.hash_password
+
+    def recording_hash(*args):
+        threads.append(threading.get_ident())
+        return original(*args)
+
+    monkeypatch.setattr(security, 'hash_password', recording_hash)
+    user = User()
+    await user.set_password_async('secret123')
+
+    assert threads
+    assert loop_thread not in threads
+    assert await user.check_password_async('secret123')
+    assert not await user.check_password_async('wrong')